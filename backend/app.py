@@ -1,126 +1,137 @@
 
 
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import json
 import pickle
-import random
 from datetime import datetime, timedelta
-from deepface import DeepFace
 import jwt
 from functools import wraps
 import sqlite3
-from PIL import Image
-import pytesseract
-import pdf2image
 import io
 import re
+from recognition import FaceRecognition
+from inference import InferenceService, InferenceBusy
+from password_hashing import PasswordHasher, PasswordHashingBusy
+import ocr_jobs
+import ocr_cache
+import od_verification
+import od_search
+import db
+from db import get_db
+import migrations
+import rollups
+import pagination
+import reports
+import enrollment
+import preprocess
+import metrics
+from principal_cache import PrincipalCache
+from frame_cache import RecognitionCache, MarkCache, dhash
+from write_log import AttendanceWriteLog
+import blob_store
+from blob_store import BlobStore
+import time
+
+class UploadRequest(Request):
+    # OD documents are parsed straight into the blob store, hashed as they are written
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'upload_od':
+            return blobs.spool()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['UPLOAD_FOLDER'] = 'od_uploads'
+# Let a fronting nginx/Apache send documents (X-Sendfile) instead of the worker
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+# Build current_user from signed token claims instead of the users table
+# (role/profile changes then only apply once the user logs in again)
+app.config['TRUST_TOKEN_CLAIMS'] = os.environ.get('TRUST_TOKEN_CLAIMS') == '1'
+db.init_app(app)
+metrics.init_app(app)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+blobs = BlobStore(app.config['UPLOAD_FOLDER'])
 
 # Database setup
 def init_db():
-    conn = sqlite3.connect('attendance.db')
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT UNIQUE NOT NULL,
-                  password TEXT NOT NULL,
-                  role TEXT NOT NULL,
-                  student_id TEXT,
-                  name TEXT,
-                  department TEXT,
-                  year TEXT,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # Attendance table
-    c.execute('''CREATE TABLE IF NOT EXISTS attendance
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  student_id TEXT NOT NULL,
-                  student_name TEXT NOT NULL,
-                  date TEXT NOT NULL,
-                  time TEXT NOT NULL,
-                  status TEXT NOT NULL,
-                  confidence REAL,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # OD Requests table with extracurricular focus
-    c.execute('''CREATE TABLE IF NOT EXISTS od_requests
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  student_id TEXT NOT NULL,
-                  student_name TEXT NOT NULL,
-                  activity_type TEXT NOT NULL,
-                  activity_name TEXT NOT NULL,
-                  event_date TEXT NOT NULL,
-                  event_venue TEXT,
-                  organized_by TEXT,
-                  coordinator_name TEXT,
-                  coordinator_contact TEXT,
-                  od_reason TEXT NOT NULL,
-                  od_file_path TEXT NOT NULL,
-                  ocr_text TEXT,
-                  status TEXT DEFAULT 'pending',
-                  admin_notes TEXT,
-                  verified_by_ocr BOOLEAN DEFAULT FALSE,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # Extracurricular activities catalog
-    c.execute('''CREATE TABLE IF NOT EXISTS activities
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  name TEXT NOT NULL,
-                  type TEXT NOT NULL,
-                  description TEXT,
-                  approved BOOLEAN DEFAULT TRUE)''')
-    
-    # Insert default admin user
-    try:
-        c.execute("INSERT INTO users (username, password, role, name) VALUES (?, ?, ?, ?)",
-                  ('admin', generate_password_hash('admin123'), 'admin', 'System Administrator'))
-    except:
-        pass
-    
-    # Insert sample extracurricular activities
-    activities = [
-        ('Inter-College Sports Tournament', 'sports', 'Basketball, Cricket, Football competitions'),
-        ('National Level Hackathon', 'hackathon', '24-hour coding competition'),
-        ('Cultural Fest', 'cultural', 'Music, Dance, Drama competitions'),
-        ('Technical Symposium', 'technical', 'Paper presentation, Project expo'),
-        ('Workshop on AI/ML', 'workshop', 'Hands-on training session'),
-        ('Sports Practice', 'sports', 'Regular team practice sessions'),
-        ('Robotics Competition', 'technical', 'Inter-department robotics challenge'),
-        ('Debate Competition', 'cultural', 'Inter-college debate championship'),
-        ('Code Debugging Contest', 'technical', 'Debugging competition'),
-        ('Athletics Meet', 'sports', 'Track and field events')
-    ]
-    
-    for activity in activities:
-        try:
-            c.execute("INSERT INTO activities (name, type, description) VALUES (?, ?, ?)", activity)
-        except:
-            pass
-    
-    conn.commit()
+    """Create or upgrade the schema and seed defaults; once per deployment, not per worker"""
+    conn = db.connect()
+    migrations.migrate(conn)
+    migrations.seed_defaults(conn)
     conn.close()
 
-init_db()
+# OCR runs off the request thread; the queue is started when the server boots
+ocr_queue = ocr_jobs.OCRJobQueue()
+
+# Created by load_models() in each serving process, never at import, so a
+# pre-fork master (see wsgi.py) can import this module without loading models
+inference = None
+face_recog = None
+
+@app.errorhandler(InferenceBusy)
+def inference_busy(e):
+    return jsonify({'success': False, 'error': str(e), 'message': str(e)}), 503, {'Retry-After': '1'}
 
-class FaceRecognition:
-    def __init__(self):
-        self.known_face_names = ['Sujithra B', 'Yasodha R']
-        self.known_face_ids = ['23IT56', '23IT63']
-        print(f"✅ Loaded {len(self.known_face_names)} registered faces")
+@app.errorhandler(PasswordHashingBusy)
+def password_hashing_busy(e):
+    return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
 
-face_recog = FaceRecognition()
+principal_cache = PrincipalCache()
+
+# Password hashing runs on its own few threads so login bursts don't tie up the server's
+password_hasher = PasswordHasher()
+
+# Peak-hour marks are group-committed through a durable log once the server boots;
+# until attendance_log.start() runs, marks are inserted directly
+attendance_log = AttendanceWriteLog()
+
+# Repeat kiosk frames reuse a recent match; repeat marks skip the database
+recognition_cache = RecognitionCache()
+mark_cache = MarkCache()
+
+def refresh_gallery():
+    """Pick up enrollments made through other worker processes, dropping cached matches with the old gallery"""
+    if face_recog.reload_if_changed():
+        recognition_cache.clear()
+        print("🔄 Face gallery changed on disk, reloaded")
+
+def identify_frame(image, client):
+    """face_recog.identify through recognition_cache; returns (match, timings, cached)"""
+    refresh_gallery()
+    timings = {}
+    try:
+        with preprocess.stage(timings, 'frame_hash'):
+            frame_hash = dhash(image)
+    except ValueError:
+        frame_hash = None  # let identify report the undecodable image
+    if frame_hash is not None:
+        hit, match = recognition_cache.get(client, frame_hash)
+        if hit:
+            metrics.record_timings(timings)
+            return match, timings, True
+    match, stage_timings = face_recog.identify(image)
+    if frame_hash is not None:
+        recognition_cache.put(client, frame_hash, match)
+    timings.update(stage_timings)
+    metrics.record_timings(timings)
+    return match, timings, False
+
+metrics.registry.gauge('inference_queue_depth', 'Face inference calls queued or running',
+                       lambda: inference.queue_depth)
+metrics.registry.gauge('ocr_queue_depth', 'OCR jobs queued or running', ocr_queue.queue_depth)
+metrics.registry.gauge('password_hash_queue_depth', 'Password hashes queued or running',
+                       lambda: password_hasher.queue_depth)
+metrics.registry.gauge('write_log_queue_depth', 'Attendance marks logged but not yet committed',
+                       lambda: attendance_log.queue_depth)
+
+# Serialises enrollment store writes between concurrent admin requests, in every worker process
+enrollment_lock = enrollment.EnrollmentLock()
 
 # JWT Authentication decorator
 def token_required(f):
@@ -130,22 +141,41 @@ def token_required(f):
         if not token:
             return jsonify({'error': 'Token is missing'}), 401
         
+        start = time.perf_counter()
         try:
             token = token.split(' ')[1]  # Remove 'Bearer ' prefix
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user = get_user_by_username(data['username'])
+            with metrics.timed('jwt_decode'):
+                data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            with metrics.timed('user_lookup'):
+                current_user = resolve_principal(data)
         except:
             return jsonify({'error': 'Token is invalid'}), 401
+        principal_cache.record_auth(time.perf_counter() - start)
+        
+        if not current_user:
+            return jsonify({'error': 'Token is invalid'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
 
+def resolve_principal(data):
+    """current_user for decoded token claims, from the claims, the cache or the database"""
+    if app.config['TRUST_TOKEN_CLAIMS'] and 'principal' in data:
+        return {'username': data['username'], **data['principal']}
+    
+    key = (data['username'], data.get('role'))
+    current_user = principal_cache.get(key)
+    if current_user is None:
+        current_user = get_user_by_username(data['username'])
+        if current_user:
+            principal_cache.put(key, current_user)
+    return current_user
+
 def get_user_by_username(username):
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute("SELECT * FROM users WHERE username = ?", (username,))
     user = c.fetchone()
-    conn.close()
     
     if user:
         return {
@@ -159,56 +189,6 @@ def get_user_by_username(username):
         }
     return None
 
-# OCR Function for OD Verification
-def extract_text_from_file(file_path, file_type):
-    try:
-        if file_type == 'pdf':
-            images = pdf2image.convert_from_path(file_path)
-            text = ''
-            for image in images:
-                text += pytesseract.image_to_string(image)
-        else:  # image
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-        
-        return text.strip()
-    except Exception as e:
-        return f"OCR Error: {str(e)}"
-
-def verify_od_content(text):
-    """Enhanced OD verification for extracurricular activities"""
-    text_lower = text.lower()
-    
-    # Keywords for extracurricular activities
-    activity_keywords = {
-        'sports': ['sports', 'tournament', 'match', 'game', 'practice', 'coach', 'team', 'athlete'],
-        'technical': ['hackathon', 'workshop', 'symposium', 'technical', 'coding', 'programming', 'project'],
-        'cultural': ['cultural', 'fest', 'music', 'dance', 'drama', 'debate', 'competition'],
-        'general': ['certificate', 'participation', 'event', 'activity', 'program', 'college', 'institute']
-    }
-    
-    # Verification keywords
-    verification_keywords = [
-        'on duty', 'od', 'permission', 'authorized', 'approved', 'coordinator',
-        'faculty', 'head', 'department', 'signature', 'stamp', 'official'
-    ]
-    
-    # Count matches for each category
-    category_scores = {}
-    for category, keywords in activity_keywords.items():
-        category_scores[category] = sum(1 for keyword in keywords if keyword in text_lower)
-    
-    verification_score = sum(1 for keyword in verification_keywords if keyword in text_lower)
-    
-    # Determine activity type
-    detected_activity = max(category_scores, key=category_scores.get)
-    total_score = sum(category_scores.values()) + verification_score
-    
-    if total_score >= 3:
-        return True, f"Valid {detected_activity.capitalize()} activity detected", detected_activity
-    else:
-        return False, "Insufficient evidence of valid extracurricular activity", None
-
 # Authentication Routes
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -224,18 +204,19 @@ def register():
     if not username or not password or not role:
         return jsonify({'error': 'Missing required fields'}), 400
     
-    conn = sqlite3.connect('attendance.db')
+    # Hashed before taking a pooled connection, which the wait for the hasher would otherwise hold
+    hashed_password = password_hasher.hash(password)
+    
+    conn = get_db()
     c = conn.cursor()
     
     try:
-        hashed_password = generate_password_hash(password)
         c.execute("INSERT INTO users (username, password, role, student_id, name, department, year) VALUES (?, ?, ?, ?, ?, ?, ?)",
                   (username, hashed_password, role, student_id, name, department, year))
         conn.commit()
-        conn.close()
+        principal_cache.invalidate(username)
         return jsonify({'message': 'User registered successfully'}), 201
     except sqlite3.IntegrityError:
-        conn.close()
         return jsonify({'error': 'Username already exists'}), 400
 
 @app.route('/api/login', methods=['POST'])
@@ -244,16 +225,33 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute("SELECT * FROM users WHERE username = ?", (username,))
     user = c.fetchone()
-    conn.close()
-    
-    if user and check_password_hash(user[2], password):
+    # Give the connection back before queueing for the hasher, so a login burst can't drain the pool
+    db.close_db()
+    
+    if user and password_hasher.verify(user[2], password):
+        # Upgrade hashes made with older cost parameters while the plaintext is at hand
+        if password_hasher.needs_rehash(user[2]):
+            new_hash = password_hasher.hash(password)
+            conn = get_db()
+            conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?", (new_hash, user[0], user[2]))
+            conn.commit()
+        
         token = jwt.encode({
             'username': username,
             'role': user[3],
+            # Signed profile, used instead of a users lookup when TRUST_TOKEN_CLAIMS is on
+            'principal': {
+                'id': user[0],
+                'role': user[3],
+                'student_id': user[4],
+                'name': user[5],
+                'department': user[6],
+                'year': user[7]
+            },
             'exp': datetime.utcnow() + timedelta(hours=24)
         }, app.config['SECRET_KEY'], algorithm='HS256')
         
@@ -275,11 +273,10 @@ def login():
 @app.route('/api/activities', methods=['GET'])
 @token_required
 def get_activities(current_user):
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute("SELECT * FROM activities WHERE approved = TRUE")
     activities = c.fetchall()
-    conn.close()
     
     activity_list = []
     for activity in activities:
@@ -299,7 +296,7 @@ def student_dashboard(current_user):
     if current_user['role'] != 'student':
         return jsonify({'error': 'Access denied'}), 403
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     today = datetime.now().strftime('%Y-%m-%d')
     
@@ -318,8 +315,6 @@ def student_dashboard(current_user):
               (current_user['student_id'],))
     recent_activities = c.fetchall()
     
-    conn.close()
-    
     od_stats_dict = {status: count for status, count in od_stats}
     
     return jsonify({
@@ -345,31 +340,123 @@ def mark_attendance(current_user):
     if current_user['role'] != 'student':
         return jsonify({'error': 'Access denied'}), 403
     
-    # Mock face recognition
-    student_index = random.randint(0, len(face_recog.known_face_names) - 1)
-    name = face_recog.known_face_names[student_index]
-    student_id = face_recog.known_face_ids[student_index]
-    confidence = round(random.uniform(0.7, 0.95), 2)
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image provided'}), 400
+    
+    try:
+        match, timings, cached = identify_frame(request.files['image'].read(), ('user', current_user['username']))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not match:
+        return jsonify({'error': 'Face not recognized', 'cached': cached, 'timings_ms': timings}), 404
+    
+    name = match['name']
+    student_id = match['student_id']
+    confidence = round(match['confidence'], 2)
     
     # Record attendance
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     
     today = datetime.now().strftime('%Y-%m-%d')
     current_time = datetime.now().strftime('%H:%M:%S')
     
-    c.execute("INSERT INTO attendance (student_id, student_name, date, time, status, confidence) VALUES (?, ?, ?, ?, ?, ?)",
-              (student_id, name, today, current_time, 'present', confidence))
-    
-    conn.commit()
-    conn.close()
+    # First mark of the day wins; repeats leave the existing row alone
+    if mark_cache.seen(student_id, today):
+        already_marked = True
+    elif attendance_log.running:
+        try:
+            already_marked = not attendance_log.mark(conn, student_id, name, today, current_time, 'present', confidence)
+        except TimeoutError as e:
+            return jsonify({'success': False, 'error': str(e), 'message': 'Attendance is busy, please retry'}), 503, {'Retry-After': '1'}
+    else:
+        c.execute('''INSERT INTO attendance (student_id, student_name, date, time, status, confidence)
+                     VALUES (?, ?, ?, ?, ?, ?)
+                     ON CONFLICT (student_id, date) DO NOTHING''',
+                  (student_id, name, today, current_time, 'present', confidence))
+        already_marked = c.rowcount == 0
+        conn.commit()
+    mark_cache.add(student_id, today)
     
     return jsonify({
         'success': True,
-        'message': 'Attendance marked successfully!',
+        'message': 'Attendance already marked for today' if already_marked else 'Attendance marked successfully!',
+        'already_marked': already_marked,
         'student': {'name': name, 'student_id': student_id},
         'confidence': confidence,
-        'timestamp': f"{today} {current_time}"
+        'timestamp': f"{today} {current_time}",
+        'cached': cached,
+        'timings_ms': timings
+    })
+
+@app.route('/api/attendance/batch-recognize', methods=['POST'])
+@token_required
+def batch_recognize(current_user):
+    """Mark a whole classroom from one or more camera frames"""
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    frames = request.files.getlist('frames')
+    if not frames:
+        return jsonify({'error': 'No frames provided'}), 400
+    
+    refresh_gallery()
+    faces, errors, timings = face_recog.recognize_frames([frame.read() for frame in frames])
+    metrics.record_timings(timings)
+    
+    # Keep the most confident sighting per student across all frames
+    best = {}
+    for face in faces:
+        match = face['match']
+        if match and match['matched']:
+            current = best.get(match['student_id'])
+            if current is None or match['confidence'] > current['confidence']:
+                best[match['student_id']] = match
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    current_time = datetime.now().strftime('%H:%M:%S')
+    
+    conn = get_db()
+    c = conn.cursor()
+    already_marked = {student_id for student_id in best if mark_cache.seen(student_id, today)}
+    unknown = [student_id for student_id in best if student_id not in already_marked]
+    if unknown:
+        placeholders = ','.join('?' * len(unknown))
+        c.execute(f"SELECT student_id FROM attendance WHERE date = ? AND student_id IN ({placeholders})",
+                  (today, *unknown))
+        already_marked.update(row[0] for row in c.fetchall())
+    
+    c.executemany('''INSERT INTO attendance (student_id, student_name, date, time, status, confidence)
+                     VALUES (?, ?, ?, ?, ?, ?)
+                     ON CONFLICT (student_id, date) DO NOTHING''',
+                  [(student_id, match['name'], today, current_time, 'present', round(match['confidence'], 2))
+                   for student_id, match in best.items() if student_id not in already_marked])
+    conn.commit()
+    for student_id in best:
+        mark_cache.add(student_id, today)
+    
+    results = []
+    for face in faces:
+        match = face['match']
+        recognized = bool(match and match['matched'])
+        results.append({
+            'frame': face['frame'],
+            'facial_area': face['facial_area'],
+            'recognized': recognized,
+            'student': {'name': match['name'], 'student_id': match['student_id']} if recognized else None,
+            'confidence': round(match['confidence'], 2) if match else None,
+            'already_marked': recognized and match['student_id'] in already_marked
+        })
+    
+    return jsonify({
+        'success': True,
+        'timestamp': f"{today} {current_time}",
+        'faces_detected': len(faces),
+        'students_marked': len(best) - len(already_marked),
+        'results': results,
+        'errors': errors,
+        'timings_ms': timings
     })
 
 @app.route('/api/student/upload-od', methods=['POST'])
@@ -396,33 +483,41 @@ def upload_od(current_user):
         if file_extension not in ['pdf', 'jpg', 'jpeg', 'png']:
             return jsonify({'error': 'Invalid file format. Please upload PDF or image files.'}), 400
         
-        filename = f"od_{current_user['student_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_extension}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        # Extract text using OCR
-        ocr_text = extract_text_from_file(file_path, 'pdf' if file_extension == 'pdf' else 'image')
-        
-        # Verify OD content
-        is_valid, verification_message, detected_activity = verify_od_content(ocr_text)
+        # Identical documents are stored once; the hash is also the OCR cache key
+        content_hash, file_path = blobs.put(file.stream, file_extension)
+        file_type = 'pdf' if file_extension == 'pdf' else 'image'
         
-        # Create OD request record
-        conn = sqlite3.connect('attendance.db')
+        conn = get_db()
         c = conn.cursor()
         
+        # Identical documents reuse the cached OCR text and verdict; others are queued
+        cached = ocr_cache.lookup(c, content_hash)
+        if cached:
+            ocr_text, is_valid, verification_message, detected_activity = cached
+            ocr_status = 'done'
+        else:
+            ocr_text, is_valid, detected_activity = None, False, None
+            verification_message = 'Document verification in progress'
+            ocr_status = 'queued'
+        
         c.execute('''INSERT INTO od_requests 
                     (student_id, student_name, activity_type, activity_name, event_date, 
                      event_venue, organized_by, coordinator_name, coordinator_contact,
-                     od_reason, od_file_path, ocr_text, verified_by_ocr) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                     od_reason, od_file_path, ocr_text, verified_by_ocr, ocr_status) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
                   (current_user['student_id'], current_user['name'],
                    data.get('activity_type'), data.get('activity_name'), data.get('event_date'),
                    data.get('event_venue'), data.get('organized_by'), 
                    data.get('coordinator_name'), data.get('coordinator_contact'),
-                   data.get('od_reason'), file_path, ocr_text, is_valid))
+                   data.get('od_reason'), file_path, ocr_text, is_valid, ocr_status))
+        request_id = c.lastrowid
+        job_id = None
+        if not cached:
+            job_id = ocr_jobs.enqueue(c, request_id, file_path, file_type, content_hash)
         
         conn.commit()
-        conn.close()
+        if job_id:
+            ocr_queue.notify()
         
         return jsonify({
             'success': True,
@@ -432,39 +527,66 @@ def upload_od(current_user):
                 'message': verification_message,
                 'detected_activity': detected_activity
             },
-            'request_id': c.lastrowid
-        })
+            'request_id': request_id,
+            'ocr_job_id': job_id,
+            'ocr_status': ocr_status
+        }), 200 if cached else 202
         
     except Exception as e:
         return jsonify({'error': f'Failed to upload OD: {str(e)}'}), 500
 
+# List views never read ocr_text, which can be many KB per row
+STUDENT_OD_LIST_COLUMNS = ['id', 'activity_type', 'activity_name', 'event_date', 'status',
+                           'admin_notes', 'verified_by_ocr', 'created_at', 'ocr_status']
+ADMIN_OD_LIST_COLUMNS = ['id', 'student_id', 'student_name', 'activity_type', 'activity_name', 'event_date',
+                         'event_venue', 'organized_by', 'coordinator_name', 'coordinator_contact', 'od_reason',
+                         'status', 'admin_notes', 'verified_by_ocr', 'created_at', 'ocr_status']
+
 @app.route('/api/student/od-requests', methods=['GET'])
 @token_required
 def get_student_od_requests(current_user):
     if current_user['role'] != 'student':
         return jsonify({'error': 'Access denied'}), 403
     
-    conn = sqlite3.connect('attendance.db')
-    c = conn.cursor()
-    c.execute('''SELECT * FROM od_requests WHERE student_id = ? ORDER BY created_at DESC''',
-              (current_user['student_id'],))
-    requests = c.fetchall()
-    conn.close()
+    try:
+        conn = get_db()
+        c = conn.cursor()
+        requests, next_cursor = pagination.keyset_page(
+            c, STUDENT_OD_LIST_COLUMNS, 'od_requests', ['student_id = ?'], [current_user['student_id']],
+            pagination.page_size(), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     od_requests = []
     for req in requests:
         od_requests.append({
             'id': req[0],
-            'activity_type': req[3],
-            'activity_name': req[4],
-            'event_date': req[5],
-            'status': req[13],
-            'admin_notes': req[14],
-            'verified_by_ocr': bool(req[15]),
-            'created_at': req[16]
+            'activity_type': req[1],
+            'activity_name': req[2],
+            'event_date': req[3],
+            'status': req[4],
+            'admin_notes': req[5],
+            'verified_by_ocr': bool(req[6]),
+            'created_at': req[7],
+            'ocr_status': req[8]
         })
     
-    return jsonify({'od_requests': od_requests})
+    return pagination.etag_json({'od_requests': od_requests, 'next_cursor': next_cursor})
+
+@app.route('/api/student/ocr-jobs/<int:job_id>', methods=['GET'])
+@token_required
+def get_student_ocr_job(current_user, job_id):
+    if current_user['role'] != 'student':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    conn = get_db()
+    c = conn.cursor()
+    job = ocr_jobs.get_job(c, job_id)
+    
+    if not job or job[-1] != current_user['student_id']:
+        return jsonify({'error': 'OCR job not found'}), 404
+    
+    return jsonify(ocr_jobs.job_to_dict(job))
 
 # Admin Routes
 @app.route('/api/admin/dashboard', methods=['GET'])
@@ -473,21 +595,18 @@ def admin_dashboard(current_user):
     if current_user['role'] != 'admin':
         return jsonify({'error': 'Access denied'}), 403
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     
-    # Get statistics
-    c.execute("SELECT COUNT(*) FROM users WHERE role = 'student'")
-    total_students = c.fetchone()[0]
-    
-    c.execute("SELECT COUNT(*) FROM attendance WHERE date = ?", (datetime.now().strftime('%Y-%m-%d'),))
-    today_attendance = c.fetchone()[0]
-    
-    c.execute("SELECT COUNT(*) FROM od_requests WHERE status = 'pending'")
-    pending_od = c.fetchone()[0]
+    # Get statistics from the trigger-maintained rollups
+    today = datetime.now().strftime('%Y-%m-%d')
+    total_students = rollups.total_students(c)
+    today_summary = rollups.daily_summary(c, today, today)
+    today_present = sum(row['present'] for row in today_summary)
+    today_on_duty = sum(row['on_duty'] for row in today_summary)
+    od_stats = rollups.od_counts(c)
     
-    c.execute("SELECT status, COUNT(*) FROM od_requests GROUP BY status")
-    od_stats = c.fetchall()
+    ocr_cache_stats = ocr_cache.stats(c)
     
     # Get recent OD requests
     c.execute('''SELECT r.id, r.student_name, r.activity_name, r.activity_type, 
@@ -496,14 +615,22 @@ def admin_dashboard(current_user):
                  ORDER BY r.created_at DESC LIMIT 5''')
     recent_requests = c.fetchall()
     
-    conn.close()
-    
     return jsonify({
         'stats': {
             'total_students': total_students,
-            'today_attendance': today_attendance,
-            'pending_od_requests': pending_od,
-            'od_breakdown': {status: count for status, count in od_stats}
+            'today_attendance': today_present + today_on_duty,
+            'today_breakdown': {
+                'present': today_present,
+                'on_duty': today_on_duty,
+                'absent': sum(row['absent'] for row in today_summary)
+            },
+            'pending_od_requests': od_stats.get('pending', 0),
+            'od_breakdown': od_stats,
+            'ocr_cache': ocr_cache_stats,
+            'auth_cache': principal_cache.stats(),
+            'frame_cache': recognition_cache.stats(),
+            'mark_cache': mark_cache.stats(),
+            'blob_store': blobs.stats
         },
         'recent_requests': [
             {
@@ -518,6 +645,46 @@ def admin_dashboard(current_user):
         ]
     })
 
+@app.route('/api/admin/attendance-summary', methods=['GET'])
+@token_required
+def attendance_summary(current_user):
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    date_from = request.args.get('from', today)
+    date_to = request.args.get('to', date_from)
+    
+    conn = get_db()
+    c = conn.cursor()
+    summary = rollups.daily_summary(c, date_from, date_to)
+    
+    department = request.args.get('department')
+    if department:
+        summary = [row for row in summary if row['department'] == department]
+    
+    return jsonify({'from': date_from, 'to': date_to, 'summary': summary})
+
+@app.route('/api/admin/reports/<report>', methods=['GET'])
+@token_required
+def export_report(current_user, report):
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    date_from = request.args.get('from', today)
+    date_to = request.args.get('to', date_from)
+    fmt = request.args.get('format', 'csv')
+    
+    try:
+        chunks = reports.stream(report, fmt, date_from, date_to, request.args.get('department'))
+    except reports.ReportError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = re.sub(r'[^\w.-]', '_', f"{report}_{date_from}_{date_to}.{fmt}")
+    return Response(stream_with_context(chunks), mimetype=reports.FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @app.route('/api/admin/od-requests', methods=['GET'])
 @token_required
 def get_all_od_requests(current_user):
@@ -526,16 +693,16 @@ def get_all_od_requests(current_user):
     
     status_filter = request.args.get('status', 'all')
     
-    conn = sqlite3.connect('attendance.db')
-    c = conn.cursor()
-    
-    if status_filter == 'all':
-        c.execute('''SELECT * FROM od_requests ORDER BY created_at DESC''')
-    else:
-        c.execute('''SELECT * FROM od_requests WHERE status = ? ORDER BY created_at DESC''', (status_filter,))
+    where, params = ([], []) if status_filter == 'all' else (['status = ?'], [status_filter])
     
-    requests = c.fetchall()
-    conn.close()
+    try:
+        conn = get_db()
+        c = conn.cursor()
+        requests, next_cursor = pagination.keyset_page(
+            c, ADMIN_OD_LIST_COLUMNS, 'od_requests', where, params,
+            pagination.page_size(), request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     od_requests = []
     for req in requests:
@@ -551,13 +718,60 @@ def get_all_od_requests(current_user):
             'coordinator_name': req[8],
             'coordinator_contact': req[9],
             'od_reason': req[10],
-            'status': req[13],
-            'admin_notes': req[14],
-            'verified_by_ocr': bool(req[15]),
-            'created_at': req[16]
+            'status': req[11],
+            'admin_notes': req[12],
+            'verified_by_ocr': bool(req[13]),
+            'created_at': req[14],
+            'ocr_status': req[15],
+            'document_url': f"/api/od-request/{req[0]}/document",
+            'thumbnail_url': f"/api/od-request/{req[0]}/thumbnail"
         })
     
-    return jsonify({'od_requests': od_requests})
+    return pagination.etag_json({'od_requests': od_requests, 'next_cursor': next_cursor})
+
+@app.route('/api/admin/od-search', methods=['GET'])
+@token_required
+def search_od_requests(current_user):
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    query = request.args.get('q', '')
+    status_filter = request.args.get('status', 'all')
+    limit = pagination.page_size()
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'error': 'Invalid offset'}), 400
+    
+    try:
+        conn = get_db()
+        c = conn.cursor()
+        rows, has_more = od_search.search(c, query, limit, offset,
+                                          None if status_filter == 'all' else status_filter)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except sqlite3.OperationalError:
+        return jsonify({'error': 'Invalid search query'}), 400
+    
+    results = []
+    for row in rows:
+        results.append({
+            'id': row[0],
+            'student_id': row[1],
+            'student_name': row[2],
+            'activity_type': row[3],
+            'activity_name': row[4],
+            'event_date': row[5],
+            'organized_by': row[6],
+            'coordinator_name': row[7],
+            'status': row[8],
+            'verified_by_ocr': bool(row[9]),
+            'created_at': row[10],
+            'snippet': row[11],
+            'score': round(-row[12], 4)
+        })
+    
+    return pagination.etag_json({'results': results, 'next_offset': offset + limit if has_more else None})
 
 @app.route('/api/admin/od-request/<int:request_id>', methods=['GET'])
 @token_required
@@ -565,11 +779,10 @@ def get_od_request_details(current_user, request_id):
     if current_user['role'] != 'admin':
         return jsonify({'error': 'Access denied'}), 403
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute('''SELECT * FROM od_requests WHERE id = ?''', (request_id,))
     request_data = c.fetchone()
-    conn.close()
     
     if not request_data:
         return jsonify({'error': 'OD request not found'}), 404
@@ -587,12 +800,78 @@ def get_od_request_details(current_user, request_id):
         'coordinator_contact': request_data[9],
         'od_reason': request_data[10],
         'ocr_text': request_data[12],
+        'verification_breakdown': od_verification.score_od_content(request_data[12]) if request_data[12] else None,
         'status': request_data[13],
         'admin_notes': request_data[14],
         'verified_by_ocr': bool(request_data[15]),
-        'created_at': request_data[16]
+        'created_at': request_data[16],
+        'ocr_status': request_data[17]
     })
 
+def od_document_path(current_user, request_id):
+    """Stored document path for an OD request the user may see, or an error response"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT student_id, od_file_path FROM od_requests WHERE id = ?", (request_id,))
+    row = c.fetchone()
+    
+    if not row or (current_user['role'] != 'admin' and row[0] != current_user.get('student_id')):
+        return None, (jsonify({'error': 'OD request not found'}), 404)
+    file_path = blob_store.local_path(row[1])
+    if not blobs.contains(file_path) or not os.path.exists(file_path):
+        return None, (jsonify({'error': 'Document not found'}), 404)
+    return file_path, None
+
+@app.route('/api/od-request/<int:request_id>/document', methods=['GET'])
+@token_required
+def get_od_document(current_user, request_id):
+    file_path, error = od_document_path(current_user, request_id)
+    if error:
+        return error
+    
+    # conditional=True answers Range and If-None-Match; full bodies go out through
+    # the server's file wrapper (sendfile under gunicorn) or X-Sendfile
+    extension = file_path.rsplit('.', 1)[-1].lower()
+    response = send_file(os.path.abspath(file_path), mimetype=blob_store.MIMETYPES.get(extension),
+                         download_name=f"od_request_{request_id}.{extension}",
+                         etag=blobs.content_hash(file_path), conditional=True, max_age=None)
+    # A request's document never changes, but it is private to the student and admins
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+@app.route('/api/od-request/<int:request_id>/thumbnail', methods=['GET'])
+@token_required
+def get_od_thumbnail(current_user, request_id):
+    file_path, error = od_document_path(current_user, request_id)
+    if error:
+        return error
+    
+    content_hash = blobs.content_hash(file_path)
+    try:
+        thumb_path = blobs.thumbnail(file_path, content_hash)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 415
+    
+    response = send_file(os.path.abspath(thumb_path), mimetype='image/jpeg',
+                         etag=f"{content_hash}-thumb{blob_store.THUMBNAIL_SIZE}", conditional=True, max_age=None)
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+@app.route('/api/admin/ocr-jobs/<int:job_id>', methods=['GET'])
+@token_required
+def get_ocr_job(current_user, job_id):
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    conn = get_db()
+    c = conn.cursor()
+    job = ocr_jobs.get_job(c, job_id)
+    
+    if not job:
+        return jsonify({'error': 'OCR job not found'}), 404
+    
+    return jsonify(ocr_jobs.job_to_dict(job))
+
 @app.route('/api/admin/approve-od/<int:request_id>', methods=['POST'])
 @token_required
 def approve_od_request(current_user, request_id):
@@ -602,7 +881,7 @@ def approve_od_request(current_user, request_id):
     data = request.get_json()
     notes = data.get('notes', '')
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     
     # Get OD request details
@@ -610,7 +889,6 @@ def approve_od_request(current_user, request_id):
     od_request = c.fetchone()
     
     if not od_request:
-        conn.close()
         return jsonify({'error': 'OD request not found'}), 404
     
     student_id, student_name, event_date = od_request
@@ -619,14 +897,16 @@ def approve_od_request(current_user, request_id):
     c.execute('''UPDATE od_requests SET status = 'approved', admin_notes = ? WHERE id = ?''',
               (notes, request_id))
     
-    # Mark attendance as OD for that date
-    c.execute('''INSERT OR REPLACE INTO attendance 
+    # Mark attendance as OD for that date, overriding any face mark
+    c.execute('''INSERT INTO attendance 
                  (student_id, student_name, date, time, status, confidence) 
-                 VALUES (?, ?, ?, ?, ?, ?)''',
+                 VALUES (?, ?, ?, ?, ?, ?)
+                 ON CONFLICT (student_id, date) DO UPDATE SET
+                     student_name = excluded.student_name, time = excluded.time,
+                     status = excluded.status, confidence = excluded.confidence''',
               (student_id, student_name, event_date, '00:00:00', 'on_duty', 1.0))
     
     conn.commit()
-    conn.close()
     
     return jsonify({
         'success': True,
@@ -642,7 +922,7 @@ def reject_od_request(current_user, request_id):
     data = request.get_json()
     notes = data.get('notes', '')
     
-    conn = sqlite3.connect('attendance.db')
+    conn = get_db()
     c = conn.cursor()
     
     # Update OD request status
@@ -650,35 +930,148 @@ def reject_od_request(current_user, request_id):
               (notes, request_id))
     
     conn.commit()
-    conn.close()
     
     return jsonify({
         'success': True,
         'message': 'OD request rejected'
     })
 
+@app.route('/api/admin/enroll', methods=['POST'])
+@token_required
+def enroll_student(current_user):
+    """Enroll or re-enroll one student's face without re-embedding anyone else"""
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    student_id = request.form.get('student_id', '').strip()
+    file = request.files.get('image')
+    if not student_id or not file:
+        return jsonify({'error': 'student_id and image are required'}), 400
+    if not re.fullmatch(r'[\w-]+', student_id):
+        return jsonify({'error': 'Invalid student_id'}), 400
+    
+    extension = os.path.splitext(file.filename)[1].lower()
+    if extension not in enrollment.IMAGE_EXTENSIONS:
+        return jsonify({'error': 'Invalid file format. Please upload JPG or PNG images.'}), 400
+    
+    name = request.form.get('name')
+    if not name:
+        c = get_db().cursor()
+        c.execute("SELECT name FROM users WHERE student_id = ? AND role = 'student'", (student_id,))
+        row = c.fetchone()
+        known = dict(zip(face_recog.known_face_ids, face_recog.known_face_names))
+        name = row[0] if row else known.get(student_id, student_id)
+    
+    faces_dir = face_recog.faces_dir
+    upload_path = os.path.join(faces_dir, f'.{student_id}.upload{extension}')
+    file.save(upload_path)
+    try:
+        # Embed before touching the enrolled image so a bad photo changes nothing
+        embeddings = enrollment.embed_image(face_recog.embedder, upload_path)
+    except ValueError as e:
+        os.remove(upload_path)
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        os.remove(upload_path)
+        raise
+    
+    with enrollment_lock:
+        # Patch a gallery that includes other workers' enrollments
+        refresh_gallery()
+        store = enrollment.EnrollmentStore()
+        # One image per student: drop images saved under another extension
+        for other in enrollment.IMAGE_EXTENSIONS:
+            other_path = os.path.join(faces_dir, student_id + other)
+            if other != extension and os.path.exists(other_path):
+                os.remove(other_path)
+                store.remove_source(student_id + other)
+        image_path = os.path.join(faces_dir, student_id + extension)
+        os.replace(upload_path, image_path)
+        store.put(student_id + extension, enrollment.hash_image(image_path), student_id, name, embeddings)
+        store.save()
+        enrollment.apply_to(face_recog, store, [student_id])
+        recognition_cache.clear()
+    
+    return jsonify({
+        'success': True,
+        'message': f'{name} enrolled successfully',
+        'student': {'name': name, 'student_id': student_id},
+        'embeddings': len(embeddings)
+    })
+
+@app.route('/api/admin/enroll/<student_id>', methods=['DELETE'])
+@token_required
+def unenroll_student(current_user, student_id):
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    if not re.fullmatch(r'[\w-]+', student_id):
+        return jsonify({'error': 'Invalid student_id'}), 400
+    
+    with enrollment_lock:
+        refresh_gallery()
+        store = enrollment.EnrollmentStore()
+        for extension in enrollment.IMAGE_EXTENSIONS:
+            image_path = os.path.join(face_recog.faces_dir, student_id + extension)
+            if os.path.exists(image_path):
+                os.remove(image_path)
+        store.remove_student(student_id)
+        store.save()
+        removed = face_recog.remove_student(student_id)
+        recognition_cache.clear()
+    
+    if not removed:
+        return jsonify({'error': 'Student is not enrolled'}), 404
+    
+    return jsonify({'success': True, 'message': 'Student removed from face recognition', 'embeddings': removed})
+
+@app.route('/api/admin/enroll/sync', methods=['POST'])
+@token_required
+def sync_enrollment(current_user):
+    """Embed new or changed images in registered_faces/ and swap them into the live index"""
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    c = get_db().cursor()
+    c.execute("SELECT student_id, name FROM users WHERE role = 'student'")
+    names = dict(zip(face_recog.known_face_ids, face_recog.known_face_names))
+    names.update(c.fetchall())
+    
+    with enrollment_lock:
+        store = enrollment.EnrollmentStore()
+        changed, removed, errors = enrollment.sync(store, face_recog.embedder, face_recog.faces_dir, names)
+        # Rebuild from disk rather than patching, so changes made by the CLI are picked up too
+        face_recog.reload()
+        recognition_cache.clear()
+    
+    return jsonify({
+        'success': True,
+        'enrolled': changed,
+        'removed': removed,
+        'errors': errors,
+        'students': len(face_recog.known_face_ids)
+    })
+
 @app.route('/recognize', methods=['POST'])
 def recognize():
     try:
         if 'image' not in request.files:
             return jsonify({'success': False, 'message': 'No image provided'}), 400
 
-        image_file = request.files['image']
+        refresh_gallery()
+        embeddings, timings = face_recog.embed(request.files['image'].read())
+        if len(embeddings) == 0:
+            metrics.record_timings(timings)
+            return jsonify({'success': False, 'message': 'No face detected', 'timings_ms': timings}), 400
 
-        # Mock face recognition - simulate processing time
-        import time
-        time.sleep(1)
+        with preprocess.stage(timings, 'match'):
+            match = face_recog.match(embeddings[:1], k=1)[0][0]
+        metrics.record_timings(timings)
+        if not match['matched']:
+            return jsonify({'success': False, 'message': 'Face not recognized', 'timings_ms': timings}), 404
 
-        # Randomly select a known face for demo
-        student_index = random.randint(0, len(face_recog.known_face_names) - 1)
-        name = face_recog.known_face_names[student_index]
-        student_id = face_recog.known_face_ids[student_index]
-        confidence = round(random.uniform(0.75, 0.98), 2)
-
-        # In a real implementation, you would:
-        # 1. Save the uploaded image temporarily
-        # 2. Use DeepFace.find() or similar to match against known faces
-        # 3. Return the matched student information
+        name = match['name']
+        student_id = match['student_id']
+        confidence = round(match['confidence'], 2)
 
         return jsonify({
             'success': True,
@@ -687,9 +1080,14 @@ def recognize():
                 'name': name,
                 'student_id': student_id
             },
-            'confidence': confidence
+            'confidence': confidence,
+            'timings_ms': timings
         })
 
+    except InferenceBusy:
+        raise
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -704,7 +1102,40 @@ def home():
         "features": ["Face Recognition", "OD Management", "Extracurricular Tracking"]
     })
 
+def load_models():
+    """Inference pool, face gallery and index for this process"""
+    global inference, face_recog
+    inference = InferenceService()
+    face_recog = FaceRecognition(embedder=inference)
+
+def start_services(write_log_path=None, recover_ocr=True):
+    """Warm the models and start the OCR queue and attendance write log.
+
+    Processes serving side by side each pass their own write_log_path and
+    recover_ocr=False, leaving recovery to whoever runs init_db.
+    """
+    global attendance_log
+    if write_log_path:
+        attendance_log = AttendanceWriteLog(write_log_path)
+    inference.start()
+    ocr_queue.start(recover=recover_ocr)
+    attendance_log.start()
+
+def stop_services():
+    """Drain the write log and stop background workers"""
+    attendance_log.stop()
+    ocr_queue.stop()
+    inference.shutdown()
+
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn (see wsgi.py)
+    debug = os.environ.get('FLASK_DEBUG', '1') == '1'
     print("🚀 AI Attendance System with OD Management Started")
     print("📊 Features: Face Recognition + Extracurricular OD Tracking")
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    # The debug reloader runs this block in its watcher process too; only
+    # the serving child (WERKZEUG_RUN_MAIN) should load models and start workers
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_db()
+        load_models()
+        start_services()
+    app.run(debug=debug, port=5000, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""ASGI adapter for gunicorn's UvicornWorker (see wsgi.py and gunicorn.conf.py).
+
+Flask views stay synchronous; asgiref runs each request on a thread while
+uvicorn's event loop handles the connections.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from wsgi import load_app
+
+application = WsgiToAsgi(load_app())
@@ -0,0 +1,98 @@
+"""Recall@1 and latency of the ANN face indexes against exact search.
+
+Run from backend/:  python benchmarks/bench_ann.py --sizes 10000 50000 100000
+Synthetic Facenet-sized embeddings are drawn around a few hundred centres
+so the gallery has cluster structure like real faces do; probes are noisy
+copies of enrolled rows. Recall is measured against exact search's top-1.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import face_index  # noqa: E402
+from recognition import EmbeddingMatrix  # noqa: E402
+
+EMBEDDING_DIM = 128  # Facenet
+
+
+def synthetic_gallery(size, rng, centres=256):
+    centre_vectors = rng.standard_normal((centres, EMBEDDING_DIM)).astype(np.float32)
+    embeddings = centre_vectors[rng.integers(0, centres, size)] + \
+        0.6 * rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+    ids = [f'S{i:06d}' for i in range(size)]
+    return embeddings, ids
+
+
+def measure(index, probes, truth):
+    index.search(probes[:1], 1)  # warm up
+    latencies, hits = [], 0
+    for probe, expected in zip(probes, truth):
+        start = time.perf_counter()
+        indices, _ = index.search(probe, 1)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += int(indices[0, 0] == expected)
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'recall@1': round(hits / len(probes), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--ef', type=int, nargs='+', default=[16, 64, 128])
+    args = parser.parse_args()
+
+    try:
+        import hnswlib  # noqa: F401
+        has_hnsw = True
+    except ImportError:
+        has_hnsw = False
+
+    rng = np.random.default_rng(0)
+    results = []
+    for size in args.sizes:
+        embeddings, ids = synthetic_gallery(size, rng)
+        exact = EmbeddingMatrix(embeddings, ids, ids)
+        probes = exact.matrix[rng.integers(0, size, args.queries)] + \
+            0.05 * rng.standard_normal((args.queries, EMBEDDING_DIM)).astype(np.float32)
+        truth = exact.search(probes, 1)[0][:, 0]
+        results.append({'gallery': size, 'index': 'exact', 'build_s': 0.0, **measure(exact, probes, truth)})
+
+        start = time.perf_counter()
+        ivf = face_index.IVFIndex(embeddings, ids, ids)
+        build = round(time.perf_counter() - start, 2)
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            results.append({'gallery': size, 'index': f'ivf nprobe={nprobe}', 'build_s': build,
+                            **measure(ivf, probes, truth)})
+
+        if has_hnsw:
+            start = time.perf_counter()
+            hnsw = face_index.HNSWIndex(embeddings, ids, ids)
+            build = round(time.perf_counter() - start, 2)
+            for ef in args.ef:
+                hnsw.ef = ef
+                results.append({'gallery': size, 'index': f'hnsw ef={ef}', 'build_s': build,
+                                **measure(hnsw, probes, truth)})
+
+    print(f"{'gallery':>8} {'index':<16} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall@1':>9}")
+    for r in results:
+        print(f"{r['gallery']:>8} {r['index']:<16} {r['build_s']:>8} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['recall@1']:>9.4f}")
+    if not has_hnsw:
+        print("(hnswlib not installed; HNSW rows skipped)")
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
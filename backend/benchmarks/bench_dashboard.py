@@ -0,0 +1,90 @@
+"""Dashboard latency under concurrent load, through the Flask test client.
+
+Run from backend/:  python benchmarks/bench_dashboard.py --threads 16 --requests 2000
+Runs against a throwaway copy of attendance.db seeded with synthetic rows.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(path, students, days):
+    from werkzeug.security import generate_password_hash
+    password = generate_password_hash('bench')
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.executemany("INSERT OR IGNORE INTO users (username, password, role, student_id, name) VALUES (?, ?, ?, ?, ?)",
+                  [(f'bench{i}', password, 'student', f'B{i:05d}', f'Bench {i}') for i in range(students)])
+    c.executemany("INSERT INTO attendance (student_id, student_name, date, time, status, confidence) VALUES (?, ?, ?, ?, ?, ?)",
+                  [(f'B{i:05d}', f'Bench {i}', f'2025-{1 + d // 28:02d}-{1 + d % 28:02d}', '09:00:00', 'present', 0.9)
+                   for d in range(days) for i in range(students)])
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, 'attendance.db')
+    shutil.copy(os.path.join(BACKEND, 'attendance.db'), database)
+    os.environ['DATABASE_PATH'] = database
+    os.chdir(BACKEND)
+    sys.path.insert(0, BACKEND)
+    import app as backend  # noqa: E402
+    backend.init_db()  # creates tables in the copy
+    seed(database, args.students, args.days)
+
+    client = backend.app.test_client()
+    tokens = {
+        'admin': client.post('/api/login', json={'username': 'admin', 'password': 'admin123'}).json['token'],
+        'student': client.post('/api/login', json={'username': 'bench0', 'password': 'bench'}).json.get('token')
+    }
+    routes = [('/api/admin/dashboard', 'admin'), ('/api/student/dashboard', 'student')]
+    latencies = {route: [] for route, _ in routes}
+    lock = threading.Lock()
+
+    def hit(i):
+        route, role = routes[i % len(routes)]
+        if not tokens[role]:
+            return
+        start = time.perf_counter()
+        client.get(route, headers={'Authorization': f'Bearer {tokens[role]}'})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[route].append(elapsed)
+
+    with ThreadPoolExecutor(args.threads) as executor:
+        list(executor.map(hit, range(args.requests)))
+
+    print(json.dumps({
+        route: {
+            'requests': len(values),
+            'p50_ms': round(percentile(values, 50), 3),
+            'p99_ms': round(percentile(values, 99), 3)
+        } for route, values in latencies.items() if values
+    }, indent=2))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Match latency of the in-memory embedding index at growing gallery sizes.
+
+Run from backend/:  python benchmarks/bench_face_match.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognition import EmbeddingMatrix  # noqa: E402
+
+EMBEDDING_DIM = 128  # Facenet
+
+
+def synthetic_gallery(size, rng):
+    embeddings = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+    ids = [f'S{i:06d}' for i in range(size)]
+    return EmbeddingMatrix(embeddings, ids, ids)
+
+
+def bench(size, queries, k, rng):
+    index = synthetic_gallery(size, rng)
+    # Probes are noisy copies of enrolled faces, like a real camera capture
+    targets = rng.integers(0, size, queries)
+    probes = index.matrix[targets] + 0.03 * rng.standard_normal((queries, EMBEDDING_DIM)).astype(np.float32)
+
+    index.search(probes[:1], k)  # warm up BLAS
+    latencies = []
+    hits = 0
+    for target, probe in zip(targets, probes):
+        start = time.perf_counter()
+        indices, _ = index.search(probe, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += int(indices[0, 0] == target)
+
+    latencies = np.asarray(latencies)
+    return {
+        'gallery': size,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'recall@1': hits / queries
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'gallery':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall@1':>9}")
+    for size in args.sizes:
+        result = bench(size, args.queries, args.k, rng)
+        print(f"{result['gallery']:>8} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} {result['recall@1']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Sustained attendance marks/sec: per-request commits vs the group-committed write log.
+
+Run from backend/:  python benchmarks/bench_mark_attendance.py --threads 64 --marks 5000
+Face recognition is left out; both paths receive already-identified students,
+so the numbers isolate the write path. Runs against a throwaway copy of attendance.db.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(label, mark, threads, marks):
+    latencies = []
+
+    def hit(i):
+        start = time.perf_counter()
+        mark(f'M{i:06d}', f'Mark {i}')
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(hit, range(marks)))
+    elapsed = time.perf_counter() - start
+    return label, {
+        'marks': marks,
+        'marks_per_sec': round(marks / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--marks', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, 'attendance.db')
+    shutil.copy(os.path.join(BACKEND, 'attendance.db'), database)
+    os.environ['DATABASE_PATH'] = database
+    sys.path.insert(0, BACKEND)
+    import db  # noqa: E402
+    import migrations  # noqa: E402
+    from write_log import AttendanceWriteLog, INSERT_ATTENDANCE  # noqa: E402
+
+    conn = db.connect(database)
+    migrations.migrate(conn)
+    conn.close()
+
+    def direct(student_id, name):
+        # What mark-attendance did before: one INSERT and commit per request
+        with db.pool.connection() as conn:
+            conn.execute(INSERT_ATTENDANCE, (student_id, name, '2030-01-01', '09:00:00', 'present', 0.9))
+            conn.commit()
+
+    log = AttendanceWriteLog(path=os.path.join(workdir, 'attendance_marks.log'), db_path=database)
+    log.start()
+
+    def logged(student_id, name):
+        with db.pool.connection() as conn:
+            log.mark(conn, student_id, name, '2030-01-02', '09:00:00', 'present', 0.9)
+
+    results = dict([run('direct_commit', direct, args.threads, args.marks),
+                    run('write_log', logged, args.threads, args.marks)])
+    log.stop()
+    print(json.dumps({'threads': args.threads, **results}, indent=2))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""OD full-text search latency at scale, straight against SQLite.
+
+Run from backend/:  python benchmarks/bench_od_search.py --documents 100000
+Seeds a throwaway copy of attendance.db with synthetic OD requests whose OCR
+text draws from a Zipf-like vocabulary, then times od_search.search() for
+rare terms (a phone number, an exact reference), mid-frequency terms and
+very common ones. Latency grows with the number of matches, since every
+match is ranked.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ORGANIZERS = ['IEEE Student Branch', 'Rotaract Club', 'NSS Unit', 'Google Developer Group', 'Anna University',
+              'Zonal Sports Board', 'Literary Society', 'CSI Chapter']
+VENUES = ['Main Auditorium', 'Chennai', 'Coimbatore', 'Madurai', 'Online', 'Indoor Stadium']
+
+
+def seed(path, documents, rnd):
+    vocabulary = [f'w{i}' for i in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    rows = []
+    for i in range(documents):
+        words = rnd.choices(vocabulary, weights, k=200)
+        rows.append((f'B{i % 5000:05d}', f'Bench {i % 5000}', 'technical', f'Event {i}', '2025-03-01',
+                     rnd.choice(VENUES), rnd.choice(ORGANIZERS), f'Coordinator {rnd.randint(1, 5000)}',
+                     f'9{rnd.randint(100000000, 999999999)}', 'Benchmark', 'bench.pdf',
+                     ' '.join(words) + f' ref{i}', rnd.choice(['pending', 'approved', 'rejected'])))
+    conn = sqlite3.connect(path)
+    conn.executemany('''INSERT INTO od_requests (student_id, student_name, activity_type, activity_name, event_date,
+                        event_venue, organized_by, coordinator_name, coordinator_contact, od_reason, od_file_path,
+                        ocr_text, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, 'attendance.db')
+    shutil.copy(os.path.join(BACKEND, 'attendance.db'), database)
+    os.environ['DATABASE_PATH'] = database
+    sys.path.insert(0, BACKEND)
+    import db  # noqa: E402
+    import migrations  # noqa: E402
+    import od_search  # noqa: E402
+
+    conn = db.connect()
+    migrations.migrate(conn)
+    rnd = random.Random(7)
+    start = time.perf_counter()
+    rows = seed(database, args.documents, rnd)
+    indexed_s = time.perf_counter() - start
+    od_search.optimize(conn.cursor())
+    conn.commit()
+
+    sample = rows[rnd.randrange(len(rows))]
+    queries = {
+        'phone number': sample[8],
+        'exact reference': f'ref{args.documents // 2}',
+        'coordinator name': sample[7],
+        'organizer and venue': 'rotaract madurai',
+        'prefix': 'goog*',
+        'mid-frequency term': 'w500',
+        'common term': 'w3',
+    }
+    c = conn.cursor()
+    results = {}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            page, _ = od_search.search(c, query, 50)
+            timings.append((time.perf_counter() - start) * 1000)
+        matches = c.execute("SELECT COUNT(*) FROM od_search WHERE od_search MATCH ?",
+                            (od_search.match_expression(query),)).fetchone()[0]
+        results[name] = {'query': query, 'matches': matches, 'median_ms': round(statistics.median(timings), 2),
+                         'max_ms': round(max(timings), 2)}
+    conn.close()
+
+    print(json.dumps({'documents': args.documents, 'insert_and_index_s': round(indexed_s, 1), 'queries': results},
+                     indent=2))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
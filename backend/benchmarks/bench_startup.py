@@ -0,0 +1,71 @@
+"""Worker start-up time, phase by phase, each run in a fresh interpreter.
+
+Run from backend/:  python benchmarks/bench_startup.py --runs 5
+Phases follow wsgi.py: importing app.py (which no longer touches the
+database or models), prepare() as the gunicorn master runs it,
+load_app() (gallery and index) and start_services() (model warm-up, OCR
+and write log) as each worker runs them. Runs against a throwaway copy of
+attendance.db.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = '''
+import json, time
+timings = {}
+start = time.perf_counter()
+import wsgi
+wsgi.prepare()
+timings['prepare'] = time.perf_counter() - start
+start = time.perf_counter()
+import app
+timings['import_app'] = time.perf_counter() - start
+start = time.perf_counter()
+wsgi.load_app()
+timings['load_app'] = time.perf_counter() - start
+start = time.perf_counter()
+wsgi.start_services()
+timings['start_services'] = time.perf_counter() - start
+wsgi.stop_services()
+print('TIMINGS ' + json.dumps(timings))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database = os.path.join(workdir, 'attendance.db')
+    shutil.copy(os.path.join(BACKEND, 'attendance.db'), database)
+    env = {**os.environ, 'DATABASE_PATH': database,
+           'ATTENDANCE_LOG_PATH': os.path.join(workdir, 'attendance_marks.log'),
+           'PYTHONPATH': os.pathsep.join(filter(None, [BACKEND, os.environ.get('PYTHONPATH')]))}
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, '-c', PHASES], cwd=BACKEND, env=env,
+                                capture_output=True, text=True, check=True)
+        line = next(line for line in result.stdout.splitlines() if line.startswith('TIMINGS '))
+        runs.append(json.loads(line[len('TIMINGS '):]))
+
+    phases = {phase: round(statistics.median(run[phase] for run in runs) * 1000, 1) for phase in runs[0]}
+    print(json.dumps({
+        'runs': args.runs,
+        'median_ms': phases,
+        'worker_ready_ms': round(phases['import_app'] + phases['load_app'] + phases['start_services'], 1)
+    }, indent=2))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
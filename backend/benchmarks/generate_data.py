@@ -0,0 +1,230 @@
+"""Synthetic college-scale data: students, a semester of attendance and OD requests.
+
+Run from backend/:
+    python benchmarks/generate_data.py --database college.db --students 10000 --days 90 --od-requests 5000
+
+Creates or upgrades the schema in --database and adds students stu00000...
+(password 'student'), one attendance row per student per working day, and OD
+requests whose OCR text reads like scanned participation certificates, OCR
+slips included. Their documents are sample PDFs stored through the blob store
+under --uploads, which defaults to od_uploads next to the database. --pdfs
+also writes plain sample PDFs to a directory, for upload traffic in
+load_test.py. Runs are reproducible for a given --seed.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+STUDENT_PASSWORD = 'student'
+DEPARTMENTS = ['IT', 'CSE', 'ECE', 'EEE', 'MECH', 'CIVIL']
+FIRST_NAMES = ['Aarthi', 'Bharath', 'Deepika', 'Gokul', 'Harini', 'Karthik', 'Keerthana', 'Lokesh', 'Madhu',
+               'Nandhini', 'Pranav', 'Priya', 'Rahul', 'Sandhya', 'Sujithra', 'Surya', 'Vignesh', 'Yasodha']
+INITIALS = 'ABCDEGKMNPRSTV'
+EVENTS = {
+    'sports': ['Inter-College Basketball Tournament', 'Zonal Athletics Meet', 'State Level Cricket Match',
+               'University Football Championship'],
+    'hackathon': ['National Level Hackathon', 'Smart India Hackathon', '24 Hour Coding Marathon'],
+    'technical': ['Technical Symposium', 'Robotics Competition', 'Paper Presentation Contest', 'Project Expo'],
+    'workshop': ['Workshop on AI/ML', 'Cloud Computing Workshop', 'IoT Hands-on Workshop'],
+    'cultural': ['Cultural Fest', 'Inter-College Dance Competition', 'Debate Championship', 'Music Fest'],
+}
+ORGANIZERS = ['IEEE Student Branch', 'Rotaract Club', 'NSS Unit', 'Google Developer Group', 'Anna University',
+              'Zonal Sports Board', 'Literary Society', 'CSI Chapter', 'Department of CSE', 'Fine Arts Club']
+VENUES = ['Main Auditorium', 'Indoor Stadium', 'Seminar Hall', 'PSG Tech, Coimbatore', 'IIT Madras, Chennai',
+          'Thiagarajar College, Madurai', 'Online']
+# Characters tesseract tends to swap, applied at random to make OCR text realistic
+OCR_SLIPS = {'o': '0', 'l': '1', 'i': 'l', 'm': 'rn', 's': '5'}
+
+
+def username(i):
+    return f'stu{i:05d}'
+
+
+def student(i):
+    department = DEPARTMENTS[i % len(DEPARTMENTS)]
+    year = str(1 + (i // len(DEPARTMENTS)) % 4)
+    intake = 25 - int(year)
+    rnd = random.Random(i)
+    name = f'{rnd.choice(FIRST_NAMES)} {rnd.choice(INITIALS)}'
+    return {'username': username(i), 'student_id': f'{intake}{department}{i:05d}', 'name': name,
+            'department': department, 'year': year}
+
+
+def working_days(days, end=None):
+    """The last `days` weekdays up to end (default yesterday), oldest first"""
+    day = end or date.today() - timedelta(days=1)
+    result = []
+    while len(result) < days:
+        if day.weekday() < 5:
+            result.append(day.isoformat())
+        day -= timedelta(days=1)
+    return result[::-1]
+
+
+def od_document(rnd, person):
+    """Form fields and certificate text for one OD request"""
+    activity_type = rnd.choice(list(EVENTS))
+    event = rnd.choice(EVENTS[activity_type])
+    coordinator = f'{rnd.choice(["Dr.", "Prof.", "Mr.", "Ms."])} {rnd.choice(FIRST_NAMES)} {rnd.choice(INITIALS)}'
+    fields = {
+        'activity_type': activity_type,
+        'activity_name': event,
+        'event_date': (date.today() - timedelta(days=rnd.randint(1, 120))).isoformat(),
+        'event_venue': rnd.choice(VENUES),
+        'organized_by': rnd.choice(ORGANIZERS),
+        'coordinator_name': coordinator,
+        'coordinator_contact': f'9{rnd.randint(100000000, 999999999)}',
+        'od_reason': f'Participation in {event}',
+    }
+    lines = [
+        rnd.choice(['CERTIFICATE OF PARTICIPATION', 'CERTIFICATE OF MERIT', 'ON DUTY PERMISSION LETTER']),
+        f'This is to certify that {person["name"]} ({person["student_id"]}), {person["department"]} department,',
+        f'has participated in the {event} organized by {fields["organized_by"]}',
+        f'held at {fields["event_venue"]} on {fields["event_date"]}.',
+        rnd.choice(['We appreciate the team effort and sportsmanship shown.',
+                    'The student presented a project and took part in every session.',
+                    'The event was approved by the college and the student is granted on duty.',
+                    'Thank you for your participation.']),
+        f'Event Coordinator: {coordinator}  Contact: {fields["coordinator_contact"]}',
+        rnd.choice(['Head of the Department', 'Faculty Advisor', 'Principal']) + '    ' +
+        rnd.choice(['Signature', 'Authorized Signatory', 'Seal and Stamp']),
+    ]
+    # A few documents are unrelated scans that should fail verification
+    if rnd.random() < 0.1:
+        lines = ['Fee receipt', f'Received from {person["name"]}', f'Amount: Rs. {rnd.randint(500, 5000)}']
+    text = '\n'.join(lines)
+    chars = [OCR_SLIPS[ch] if ch in OCR_SLIPS and rnd.random() < 0.02 else ch for ch in text]
+    return fields, ''.join(chars)
+
+
+def write_pdf(path, text):
+    """One-page PDF of the text, rendered as a scanned page would be"""
+    from PIL import Image, ImageDraw, ImageFont
+    try:
+        font = ImageFont.truetype('DejaVuSans.ttf', 28)
+    except OSError:
+        font = ImageFont.load_default()
+    page = Image.new('RGB', (1240, 1754), 'white')
+    draw = ImageDraw.Draw(page)
+    for row, line in enumerate(text.splitlines()):
+        draw.text((100, 200 + row * 60), line, fill='black', font=font)
+    page.save(path, 'PDF', resolution=150)
+
+
+def sample_pdfs(directory, count, seed=0):
+    """count sample certificate PDFs in directory; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'sample_od_{i:03d}.pdf')
+        if not os.path.exists(path):
+            write_pdf(path, od_document(rnd, student(i))[1])
+        paths.append(path)
+    return paths
+
+
+def generate(database, students, days, od_requests, uploads=None, seed=42):
+    """Fill database at the given scale; returns row counts and timings"""
+    import migrations
+    from password_hashing import PASSWORD_HASH_METHOD
+    from werkzeug.security import generate_password_hash
+    from blob_store import BlobStore
+    from od_verification import verify_od_content
+
+    timings = {}
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(database)
+    migrations.migrate(conn)
+    migrations.seed_defaults(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    start = time.perf_counter()
+    password = generate_password_hash(STUDENT_PASSWORD, PASSWORD_HASH_METHOD)
+    people = [student(i) for i in range(students)]
+    conn.executemany('''INSERT OR IGNORE INTO users (username, password, role, student_id, name, department, year)
+                        VALUES (?, ?, 'student', ?, ?, ?, ?)''',
+                     [(p['username'], password, p['student_id'], p['name'], p['department'], p['year'])
+                      for p in people])
+    conn.commit()
+    timings['users_s'] = time.perf_counter() - start
+
+    # Each student has a steady attendance habit: most are regular, some often absent
+    start = time.perf_counter()
+    habits = [min(0.98, max(0.4, rnd.gauss(0.85, 0.1))) for _ in people]
+    attendance_rows = 0
+    for day in working_days(days):
+        rows = []
+        for person, habit in zip(people, habits):
+            roll = rnd.random()
+            if roll < 0.02:
+                rows.append((person['student_id'], person['name'], day, '00:00:00', 'on_duty', 1.0))
+            elif roll < habit:
+                marked = f'{8 + (roll < 0.5):02d}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}'
+                rows.append((person['student_id'], person['name'], day, marked, 'present',
+                             round(rnd.uniform(0.75, 0.99), 2)))
+        conn.executemany('''INSERT OR IGNORE INTO attendance (student_id, student_name, date, time, status, confidence)
+                            VALUES (?, ?, ?, ?, ?, ?)''', rows)
+        conn.commit()
+        attendance_rows += len(rows)
+    timings['attendance_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = BlobStore(uploads or os.path.join(os.path.dirname(os.path.abspath(database)), 'od_uploads'))
+    documents = []
+    for path in sample_pdfs(os.path.join(store.root, 'samples'), min(20, max(1, od_requests)), seed):
+        with open(path, 'rb') as f:
+            documents.append(store.put(f, 'pdf')[1])
+    rows = []
+    for i in range(od_requests):
+        person = rnd.choice(people) if people else student(0)
+        fields, ocr_text = od_document(rnd, person)
+        is_valid = verify_od_content(ocr_text)[0]
+        status = rnd.choices(['pending', 'approved', 'rejected'], [0.3, 0.55 if is_valid else 0.1, 0.15])[0]
+        rows.append((person['student_id'], person['name'], fields['activity_type'], fields['activity_name'],
+                     fields['event_date'], fields['event_venue'], fields['organized_by'],
+                     fields['coordinator_name'], fields['coordinator_contact'], fields['od_reason'],
+                     rnd.choice(documents), ocr_text, status, is_valid))
+    conn.executemany('''INSERT INTO od_requests
+                        (student_id, student_name, activity_type, activity_name, event_date, event_venue,
+                         organized_by, coordinator_name, coordinator_contact, od_reason, od_file_path,
+                         ocr_text, status, verified_by_ocr, ocr_status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'done')''', rows)
+    conn.commit()
+    timings['od_requests_s'] = time.perf_counter() - start
+
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return {'students': students, 'attendance_rows': attendance_rows, 'od_requests': od_requests,
+            'timings': {name: round(seconds, 2) for name, seconds in timings.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='college.db')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--od-requests', type=int, default=5000)
+    parser.add_argument('--uploads', help='blob store for OD documents (default: od_uploads next to --database)')
+    parser.add_argument('--pdfs', help='also write sample OD PDFs to this directory')
+    parser.add_argument('--pdf-count', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary = generate(args.database, args.students, args.days, args.od_requests, args.uploads, args.seed)
+    if args.pdfs:
+        summary['sample_pdfs'] = len(sample_pdfs(args.pdfs, args.pdf_count, args.seed))
+    print(json.dumps({'database': args.database, **summary}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""End-to-end load test: a scripted start-of-day traffic model, per-route latency as JSON.
+
+Run from backend/:
+    python benchmarks/load_test.py --students 2000 --concurrency 32 --output load.json
+    python benchmarks/load_test.py --url http://localhost:5000 --students 2000
+
+Without --url the app runs in-process behind the Flask test client, against
+a fresh database filled by generate_data.py in a temporary directory, with
+its background services (inference pool, OCR queue, write log) started as
+in production. With --url the requests go over HTTP to a running server,
+which should be serving a database from generate_data.py with at least
+--students students.
+
+Phases run in order while admins poll their dashboard throughout:
+    login_storm       every student logs in and opens the student dashboard
+    attendance_burst  every logged-in student posts a face image to mark attendance
+    od_uploads        students upload sample OD certificate PDFs
+Face images come from registered_faces/; which student a frame matches
+depends on the enrolled gallery, so the outcome of a mark is recorded as
+its status code and only latency is compared between runs.
+
+The report has throughput per phase and, per route, request and status
+counts, requests/sec and p50/p95/p99/max latency in milliseconds.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generate_data  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class LocalClient:
+    """The app in this process, through the Flask test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, token=None, json_body=None, fields=None, files=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        data = None
+        if fields is not None or files:
+            data = dict(fields or {})
+            data.update({name: (io.BytesIO(content), filename) for name, (filename, content) in (files or {}).items()})
+        response = self.client.open(path, method=method, headers=headers, json=json_body, data=data)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """A running server over HTTP (urllib; one connection per request)"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def send(self, method, path, token=None, json_body=None, fields=None, files=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif fields is not None or files:
+            boundary = uuid.uuid4().hex
+            parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+                     for name, value in (fields or {}).items()]
+            for name, (filename, content) in (files or {}).items():
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                             f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode()
+                             + content + b'\r\n')
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        request = urllib.request.Request(self.url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except OSError:
+            return 0, None
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+class Recorder:
+    def __init__(self, client):
+        self.client = client
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    def send(self, route, method, path, **kwargs):
+        start = time.perf_counter()
+        status, body = self.client.send(method, path, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][status] += 1
+        return status, body
+
+    def report(self, seconds):
+        return {
+            route: {
+                'requests': len(values),
+                'status': {str(status): count for status, count in sorted(self.statuses[route].items())},
+                'rps': round(len(values) / seconds, 1),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'max_ms': round(max(values), 2)
+            } for route, values in sorted(self.latencies.items())
+        }
+
+
+def run_phase(recorder, concurrency, work, items):
+    requests_before = sum(len(values) for values in recorder.latencies.values())
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(work, items))
+    seconds = time.perf_counter() - start
+    requests = sum(len(values) for values in recorder.latencies.values()) - requests_before
+    return results, {'seconds': round(seconds, 2), 'requests': requests, 'rps': round(requests / seconds, 1)}
+
+
+def start_local(workdir, args):
+    database = os.path.join(workdir, 'attendance.db')
+    os.environ['DATABASE_PATH'] = database
+    os.environ.setdefault('ATTENDANCE_LOG_PATH', os.path.join(workdir, 'attendance_marks.log'))
+    summary = generate_data.generate(database, args.students, args.days, args.od_requests,
+                                     os.path.join(workdir, 'od_uploads'), args.seed)
+    os.chdir(BACKEND)
+    sys.path.insert(0, BACKEND)
+    import app as backend  # noqa: E402
+    from blob_store import BlobStore  # noqa: E402
+    backend.init_db()
+    backend.load_models()
+    # Uploads made during the run stay in the temporary directory
+    backend.blobs = BlobStore(os.path.join(workdir, 'od_uploads'))
+    backend.start_services()
+    return backend, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='target a running server instead of the app in-process')
+    parser.add_argument('--students', type=int, default=2000, help='students that log in and mark attendance')
+    parser.add_argument('--days', type=int, default=60, help='attendance history to generate (in-process only)')
+    parser.add_argument('--od-requests', type=int, default=2000, help='OD history to generate (in-process only)')
+    parser.add_argument('--uploads', type=int, default=100, help='OD documents uploaded during the run')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--pollers', type=int, default=2, help='admins polling the dashboard')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    backend = dataset = None
+    if args.url:
+        client = HttpClient(args.url)
+    else:
+        backend, dataset = start_local(workdir, args)
+        client = LocalClient(backend.app)
+    recorder = Recorder(client)
+
+    faces = [open(path, 'rb').read() for path in sorted(glob.glob(os.path.join(BACKEND, 'registered_faces', '*.jpg')))]
+    if not faces:
+        sys.exit('❌ No face images found in registered_faces/')
+    pdfs = [open(path, 'rb').read() for path in generate_data.sample_pdfs(os.path.join(workdir, 'pdfs'), 10, args.seed)]
+
+    status, body = client.send('POST', '/api/login', json_body={'username': 'admin', 'password': args.admin_password})
+    if status != 200:
+        sys.exit(f'❌ Admin login failed ({status})')
+    admin_token = body['token']
+
+    stop = threading.Event()
+
+    def poll():
+        while not stop.is_set():
+            recorder.send('GET /api/admin/dashboard', 'GET', '/api/admin/dashboard', token=admin_token)
+            recorder.send('GET /api/admin/od-requests', 'GET', '/api/admin/od-requests?status=pending',
+                          token=admin_token)
+            stop.wait(args.poll_interval)
+
+    pollers = [threading.Thread(target=poll, daemon=True) for _ in range(args.pollers)]
+    for poller in pollers:
+        poller.start()
+
+    def login(i):
+        status, body = recorder.send('POST /api/login', 'POST', '/api/login',
+                                     json_body={'username': generate_data.username(i),
+                                                'password': generate_data.STUDENT_PASSWORD})
+        if status != 200:
+            return None
+        recorder.send('GET /api/student/dashboard', 'GET', '/api/student/dashboard', token=body['token'])
+        return body['token']
+
+    def mark(item):
+        i, token = item
+        recorder.send('POST /api/student/mark-attendance', 'POST', '/api/student/mark-attendance', token=token,
+                      files={'image': ('frame.jpg', faces[i % len(faces)])})
+
+    def upload(item):
+        i, token = item
+        fields, _ = generate_data.od_document(generate_data.random.Random(i), generate_data.student(i))
+        recorder.send('POST /api/student/upload-od', 'POST', '/api/student/upload-od', token=token,
+                      fields=fields, files={'od_file': ('certificate.pdf', pdfs[i % len(pdfs)])})
+
+    phases = {}
+    started = time.perf_counter()
+    tokens, phases['login_storm'] = run_phase(recorder, args.concurrency, login, range(args.students))
+    logged_in = [(i, token) for i, token in enumerate(tokens) if token]
+    _, phases['attendance_burst'] = run_phase(recorder, args.concurrency, mark, logged_in)
+    _, phases['od_uploads'] = run_phase(recorder, args.concurrency, upload, logged_in[:args.uploads])
+    seconds = time.perf_counter() - started
+    stop.set()
+    for poller in pollers:
+        poller.join()
+
+    report = {
+        'target': args.url or 'in-process',
+        'config': {'students': args.students, 'concurrency': args.concurrency, 'uploads': args.uploads,
+                   'pollers': args.pollers, 'poll_interval': args.poll_interval},
+        'dataset': dataset,
+        'seconds': round(seconds, 2),
+        'phases': phases,
+        'routes': recorder.report(seconds)
+    }
+    if backend:
+        backend.stop_services()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Content-addressed store for uploaded OD documents.
+
+Each document is kept once, at <root>/<ab>/<cd>/<sha256>.<ext>, however
+many requests reference it. The SHA-256 is computed while the upload is
+written, so it doubles as the OCR cache key and the download ETag.
+First-page thumbnails are rendered on first request and cached under
+<root>/thumbs/ by the same hash.
+
+Uploads to the OD endpoint are spooled by the request parser straight into
+an UploadSpool inside the store (see UploadRequest in app.py), so put()
+only has to rename the finished file into place.
+
+Run from backend/:
+    python blob_store.py adopt-legacy    move flat od_uploads/od_*.ext files into the store
+"""
+import os
+import re
+import sys
+import hashlib
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE', 320))
+THUMBNAIL_QUALITY = 80
+MIMETYPES = {'pdf': 'application/pdf', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+_BLOB_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+
+def local_path(path):
+    """Stored od_file_path as a path on this machine (rows written on Windows use backslashes)"""
+    return os.path.normpath(path.replace('\\', '/'))
+
+
+class UploadSpool:
+    """Temporary file in the store that hashes everything written to it.
+
+    Handed to werkzeug as the stream of an uploaded file. The temporary file
+    is deleted on close unless BlobStore.put() has moved it into place.
+    """
+
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        self.file = os.fdopen(fd, 'w+b')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def close(self):
+        self.file.close()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        self.thumbs = os.path.join(root, 'thumbs')
+        os.makedirs(self.thumbs, exist_ok=True)
+        self.stats = {'stored': 0, 'deduplicated': 0, 'thumbnails_rendered': 0}
+
+    def spool(self):
+        return UploadSpool(self.root)
+
+    def path_for(self, content_hash, extension):
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], f'{content_hash}.{extension}')
+
+    def put(self, stream, extension):
+        """Store a file-like object; returns (content_hash, path).
+
+        An UploadSpool is moved into place as is; any other stream is copied
+        in chunks and hashed on the way. A document already in the store is
+        not written again.
+        """
+        spool = stream if isinstance(stream, UploadSpool) else self.spool()
+        try:
+            if spool is not stream:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    spool.write(chunk)
+            content_hash = spool.sha256.hexdigest()
+            path = self.path_for(content_hash, extension)
+            if os.path.exists(path):
+                self.stats['deduplicated'] += 1
+            else:
+                spool.file.flush()
+                os.fsync(spool.file.fileno())
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(spool.path, path)
+                spool.path = None
+                self.stats['stored'] += 1
+        finally:
+            spool.close()
+        return content_hash, path
+
+    def contains(self, path):
+        root = os.path.realpath(self.root)
+        return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+    def content_hash(self, path):
+        """SHA-256 of a stored document; read from the name for store paths, hashed for legacy files"""
+        name = os.path.basename(path)
+        if _BLOB_NAME.match(name):
+            return name.split('.')[0]
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def thumbnail(self, path, content_hash=None):
+        """Path of the JPEG thumbnail of the document's first page, rendering it on first use.
+
+        Raises ValueError when the document cannot be rendered.
+        """
+        content_hash = content_hash or self.content_hash(path)
+        thumb_path = os.path.join(self.thumbs, content_hash[:2], f'{content_hash}.jpg')
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        from PIL import Image
+        try:
+            if path.lower().endswith('.pdf'):
+                import pdf2image
+                # Rendered straight at thumbnail width rather than at OCR resolution
+                image = pdf2image.convert_from_path(path, first_page=1, last_page=1, size=(THUMBNAIL_SIZE, None))[0]
+            else:
+                image = Image.open(path)
+                image.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))  # JPEG: decode at reduced scale
+            image = image.convert('RGB')
+            image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        except Exception as e:
+            raise ValueError(f'Could not render preview: {e}')
+
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(thumb_path), prefix='.thumb-')
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, 'JPEG', quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, thumb_path)
+        self.stats['thumbnails_rendered'] += 1
+        return thumb_path
+
+
+def adopt_legacy(conn, store):
+    """Move documents saved before the store existed into it and repoint their rows; returns files moved"""
+    moved = 0
+    rows = conn.execute("SELECT DISTINCT od_file_path FROM od_requests").fetchall()
+    for (old_path,) in rows:
+        path = local_path(old_path)
+        name = os.path.basename(path)
+        if _BLOB_NAME.match(name) or not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            _, new_path = store.put(f, name.rsplit('.', 1)[-1].lower())
+        conn.execute("UPDATE od_requests SET od_file_path = ? WHERE od_file_path = ?", (new_path, old_path))
+        conn.execute("UPDATE ocr_jobs SET file_path = ? WHERE file_path = ?", (new_path, old_path))
+        conn.commit()
+        os.remove(path)
+        moved += 1
+    return moved
+
+
+if __name__ == '__main__':
+    import db
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'adopt-legacy':
+        sys.exit('usage: python blob_store.py adopt-legacy')
+    conn = db.connect()
+    moved = adopt_legacy(conn, BlobStore(os.environ.get('UPLOAD_FOLDER', 'od_uploads')))
+    conn.close()
+    print(f"✅ Moved {moved} legacy document(s) into the blob store")
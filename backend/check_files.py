@@ -1,6 +1,8 @@
 import os
 import pickle
 
+import embedding_store
+
 print("🔍 Checking Colab files integration...")
 
 # Check face_data.pkl
@@ -16,6 +18,25 @@ if os.path.exists('face_data.pkl'):
 else:
     print("❌ face_data.pkl not found!")
 
+# Check the memory-mapped embedding store
+if os.path.exists(embedding_store.EMBEDDING_STORE_PATH):
+    try:
+        store = embedding_store.EmbeddingFile(embedding_store.EMBEDDING_STORE_PATH)
+        problems = store.validate()
+        if problems:
+            for problem in problems:
+                print(f"❌ {store.path}: {problem}")
+        else:
+            print(f"✅ {store.path}: format v{store.version}, {len(set(store.ids))} students, "
+                  f"{len(store)} embeddings of dim {store.dim}")
+        if not store.meta.get('legacy_converted'):
+            print("   Pickles not converted yet: run python enrollment.py convert")
+    except embedding_store.EmbeddingFormatError as e:
+        print(f"❌ Error reading {embedding_store.EMBEDDING_STORE_PATH}: {e}")
+else:
+    print(f"⚠️  {embedding_store.EMBEDDING_STORE_PATH} not found, recognition reads the pickles; "
+          "run python enrollment.py convert")
+
 # Check registered_faces
 if os.path.exists('registered_faces'):
     image_files = [f for f in os.listdir('registered_faces') if f.endswith(('.jpg', '.png'))]
@@ -0,0 +1,164 @@
+import os
+import queue
+import sqlite3
+import threading
+from time import perf_counter
+from contextlib import contextmanager
+
+from flask import g
+
+import metrics
+
+DATABASE = os.environ.get('DATABASE_PATH', 'attendance.db')
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 16))
+# Negative cache_size is in KiB
+CACHE_SIZE_KIB = int(os.environ.get('DB_CACHE_SIZE_KIB', 16 * 1024))
+MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', 128 * 1024 * 1024))
+BUSY_TIMEOUT = float(os.environ.get('DB_BUSY_TIMEOUT', 5))
+# Compiled statements kept per connection; long-lived connections make this pay off
+STATEMENT_CACHE_SIZE = 256
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Adds statement time to the current request's SQL total (see metrics)"""
+
+    def execute(self, *args):
+        if not metrics.sql_timing():
+            return super().execute(*args)
+        start = perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            metrics.add_sql_time(perf_counter() - start)
+
+    def executemany(self, *args):
+        if not metrics.sql_timing():
+            return super().executemany(*args)
+        start = perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            metrics.add_sql_time(perf_counter() - start)
+
+    def fetchone(self):
+        if not metrics.sql_timing():
+            return super().fetchone()
+        start = perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            metrics.add_sql_time(perf_counter() - start)
+
+    def fetchmany(self, *args):
+        if not metrics.sql_timing():
+            return super().fetchmany(*args)
+        start = perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            metrics.add_sql_time(perf_counter() - start)
+
+    def fetchall(self):
+        if not metrics.sql_timing():
+            return super().fetchall()
+        start = perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            metrics.add_sql_time(perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute* would bypass cursor(), and so the timing
+    def execute(self, *args):
+        if not metrics.sql_timing():
+            return super().execute(*args)
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        if not metrics.sql_timing():
+            return super().executemany(*args)
+        return self.cursor().executemany(*args)
+
+
+def connect(path=DATABASE):
+    """Open a tuned connection: WAL, synchronous=NORMAL and a larger page cache"""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=TimedConnection)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived connections shared by request threads"""
+
+    def __init__(self, path=DATABASE, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=BUSY_TIMEOUT):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.path)
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError('Timed out waiting for a database connection')
+
+    def release(self, conn):
+        # Never hand an open transaction to the next borrower
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+pool = ConnectionPool()
+
+
+def get_db():
+    """Connection for the current request, returned to the pool at teardown"""
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db
+
+
+def close_db(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,133 @@
+"""Versioned binary embedding file, opened with numpy.memmap.
+
+Layout (little-endian):
+    header    64 bytes: magic, version, flags, count, dim, id width, CRC-32 of
+              the matrix, and the offsets of the id table and metadata
+    matrix    count x dim float32, L2-normalised rows, starting at byte 64
+    id table  count fixed-width UTF-8 student ids, one per matrix row
+    metadata  JSON: student names plus whatever the writer adds
+
+Opening a file reads the header, id table and metadata (a few bytes per
+row) and maps the matrix, which is nearly all of the file; its pages are
+only touched when a search reads them, and every process that maps the
+file shares one page-cache copy. Files are replaced by rename, so a
+process keeps reading the version it opened.
+"""
+import os
+import json
+import zlib
+import struct
+
+import numpy as np
+
+from face_index import l2_normalize
+
+EMBEDDING_STORE_PATH = os.environ.get('EMBEDDING_STORE_PATH', 'face_embeddings.femb')
+MAGIC = b'FEMB'
+VERSION = 1
+FLAG_NORMALIZED = 1
+HEADER = struct.Struct('<4sHHQIIIQQQ')
+HEADER_SIZE = 64
+CRC_CHUNK_ROWS = 65536
+
+
+class EmbeddingFormatError(ValueError):
+    """Not an embedding file, an unsupported version, or a damaged one"""
+
+
+def _crc32(matrix):
+    crc = 0
+    for start in range(0, len(matrix), CRC_CHUNK_ROWS):
+        crc = zlib.crc32(np.ascontiguousarray(matrix[start:start + CRC_CHUNK_ROWS]).data, crc)
+    return crc
+
+
+class EmbeddingFile:
+    """A memory-mapped embedding file; matrix rows belong to ids[i]"""
+
+    def __init__(self, path=EMBEDDING_STORE_PATH):
+        self.path = path
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+                raise EmbeddingFormatError(f'{path} is not an embedding file')
+            (_, self.version, self.flags, self.count, self.dim, id_width, self.crc32,
+             ids_offset, meta_offset, meta_length) = HEADER.unpack_from(header)
+            if self.version != VERSION:
+                raise EmbeddingFormatError(f'{path} has format version {self.version}, expected {VERSION}')
+            if (ids_offset != HEADER_SIZE + self.count * self.dim * 4
+                    or meta_offset != ids_offset + self.count * id_width or meta_offset + meta_length != size):
+                raise EmbeddingFormatError(f'{path} is truncated or its header is damaged')
+            f.seek(meta_offset)
+            self.meta = json.loads(f.read(meta_length))
+
+        if self.count:
+            self.matrix = np.memmap(path, dtype='<f4', mode='r', offset=HEADER_SIZE, shape=(self.count, self.dim))
+            id_table = np.memmap(path, dtype=f'S{id_width}', mode='r', offset=ids_offset, shape=(self.count,))
+            self.ids = [student_id.decode() for student_id in id_table.tolist()]
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+            self.ids = []
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def names(self):
+        """One display name per row"""
+        names = self.meta.get('names', {})
+        return [names.get(student_id, student_id) for student_id in self.ids]
+
+    def validate(self):
+        """Problems found by reading the whole matrix; an empty list means the file is sound"""
+        problems = []
+        if self.count and _crc32(self.matrix) != self.crc32:
+            problems.append('matrix checksum mismatch')
+        if self.count and not np.isfinite(self.matrix).all():
+            problems.append('matrix contains NaN or infinite values')
+        if self.count and self.flags & FLAG_NORMALIZED:
+            norms = np.linalg.norm(self.matrix, axis=1)
+            if not np.allclose(norms, 1.0, atol=1e-3):
+                problems.append(f'{int((abs(norms - 1.0) > 1e-3).sum())} row(s) are not unit length')
+        if any(not student_id for student_id in self.ids):
+            problems.append('empty student id in the id table')
+        unnamed = set(self.ids) - set(self.meta.get('names', {}))
+        if unnamed:
+            problems.append(f'no name for {len(unnamed)} student(s)')
+        return problems
+
+
+def open_store(path=EMBEDDING_STORE_PATH):
+    """The EmbeddingFile at path, or None if there is none yet"""
+    return EmbeddingFile(path) if os.path.exists(path) else None
+
+
+def write(path, embeddings, ids, names, meta=None):
+    """Write embeddings (one row per id) to path, normalising the rows.
+
+    names maps student_id to display name; meta is any extra
+    JSON-serialisable data the caller wants kept alongside.
+    """
+    count = len(ids)
+    matrix = l2_normalize(embeddings) if count else np.empty((0, 0), dtype=np.float32)
+    if len(matrix) != count:
+        raise ValueError('embeddings and ids must have the same length')
+    encoded = [student_id.encode() for student_id in ids]
+    id_width = max((len(student_id) for student_id in encoded), default=1) or 1
+    meta_bytes = json.dumps({**(meta or {}), 'names': {sid: names[sid] for sid in dict.fromkeys(ids)}}).encode()
+    dim = matrix.shape[1] if count else 0
+    ids_offset = HEADER_SIZE + matrix.nbytes
+    meta_offset = ids_offset + count * id_width
+    header = HEADER.pack(MAGIC, VERSION, FLAG_NORMALIZED, count, dim, id_width, _crc32(matrix),
+                         ids_offset, meta_offset, len(meta_bytes))
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(matrix.astype('<f4', copy=False).data)
+        f.write(np.array(encoded, dtype=f'S{id_width}').tobytes())
+        f.write(meta_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,281 @@
+"""Incremental face enrollment into the memory-mapped embedding store.
+
+Only images in registered_faces/ that are new or whose SHA-256 changed
+are embedded; everything else keeps its stored embedding. The store is an
+embedding_store file whose metadata records each row's source image, the
+hash of every enrolled image and the students removed through it. Once a
+student is in the store, or has been removed through it, load_gallery
+ignores their pickle-era embeddings; after `convert` the pickles are not
+read at all.
+
+Run from backend/:
+    python enrollment.py convert  copy face_data.pkl and the DeepFace caches into the store
+    python enrollment.py sync     embed new/changed images, drop deleted ones
+    python enrollment.py list     show enrolled students
+A running server picks up CLI changes through POST /api/admin/enroll/sync.
+Every load-modify-save of the store happens under EnrollmentLock, which
+holds an flock on a lock file next to the store, so server workers and
+the CLI never overwrite each other's changes.
+"""
+import os
+import sys
+import pickle
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialised
+    fcntl = None
+
+import numpy as np
+
+import embedding_store
+from embedding_store import EMBEDDING_STORE_PATH
+from recognition import FACE_DATA_PATH, REGISTERED_FACES_DIR, load_legacy
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def hash_image(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class EnrollmentLock:
+    """Exclusive lock on <store>.lock, across threads and processes"""
+
+    def __init__(self, path=EMBEDDING_STORE_PATH):
+        self.path = path + '.lock'
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            try:
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def student_id_for(image_path):
+    return os.path.splitext(os.path.basename(image_path))[0]
+
+
+class EnrollmentStore:
+    """The gallery's embedding file plus the bookkeeping enrollment needs.
+
+    rows[i] = {'student_id', 'name', 'source'} describes matrix row i;
+    source is the registered_faces/ file it came from, or None for rows
+    converted from the legacy pickles. sources maps each enrolled image
+    to its SHA-256.
+    """
+
+    def __init__(self, path=EMBEDDING_STORE_PATH):
+        self.path = path
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.rows = []
+        self.sources = {}
+        # Students unenrolled here; kept so legacy pickles don't bring them back
+        self.removed = set()
+        # Set once the pickles' embeddings have been converted into the store
+        self.legacy_converted = False
+        store = embedding_store.open_store(path)
+        if store is not None:
+            self.matrix = store.matrix
+            row_sources = store.meta.get('row_sources', [None] * len(store))
+            self.rows = [{'student_id': student_id, 'name': name, 'source': source}
+                         for student_id, name, source in zip(store.ids, store.names, row_sources)]
+            self.sources = store.meta.get('sources', {})
+            self.removed = set(store.meta.get('removed', []))
+            self.legacy_converted = store.meta.get('legacy_converted', False)
+
+    def students(self):
+        return {row['student_id']: row['name'] for row in self.rows}
+
+    def overrides(self):
+        """Students whose legacy pickle embeddings must be ignored"""
+        return set(self.students()) | self.removed
+
+    def put(self, source, sha256, student_id, name, embeddings):
+        """Replace whatever came from source, and the student's converted legacy rows, with new embeddings"""
+        self._drop(lambda row: row['source'] == source or (row['source'] is None and row['student_id'] == student_id))
+        self.sources[source] = sha256
+        self.removed.discard(student_id)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.matrix = embeddings if len(self.rows) == 0 else np.vstack([self.matrix, embeddings])
+        self.rows.extend({'student_id': student_id, 'name': name, 'source': source} for _ in embeddings)
+
+    def put_legacy(self, embeddings, ids, names):
+        """Append embeddings converted from the pickles (no source image)"""
+        if len(ids):
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            self.matrix = embeddings if len(self.rows) == 0 else np.vstack([self.matrix, embeddings])
+            self.rows.extend({'student_id': sid, 'name': name, 'source': None} for sid, name in zip(ids, names))
+        self.legacy_converted = True
+
+    def remove_source(self, source):
+        self.sources.pop(source, None)
+        removed = self._drop(lambda row: row['source'] == source)
+        student_id = student_id_for(source)
+        if student_id not in self.students():
+            self.removed.add(student_id)
+        return removed
+
+    def remove_student(self, student_id):
+        for row in self.rows:
+            if row['student_id'] == student_id and row['source']:
+                self.sources.pop(row['source'], None)
+        self.removed.add(student_id)
+        return self._drop(lambda row: row['student_id'] == student_id)
+
+    def _drop(self, predicate):
+        keep = [i for i, row in enumerate(self.rows) if not predicate(row)]
+        removed = len(self.rows) - len(keep)
+        if removed:
+            self.matrix = np.asarray(self.matrix[keep], dtype=np.float32) if keep else np.empty((0, 0), np.float32)
+            self.rows = [self.rows[i] for i in keep]
+        return removed
+
+    def save(self):
+        """Rewrite the embedding file (atomically) and map it again"""
+        ids = [row['student_id'] for row in self.rows]
+        embedding_store.write(self.path, self.matrix, ids, self.students(), meta={
+            'row_sources': [row['source'] for row in self.rows],
+            'sources': self.sources,
+            'removed': sorted(self.removed),
+            'legacy_converted': self.legacy_converted,
+        })
+        self.matrix = embedding_store.EmbeddingFile(self.path).matrix
+
+
+def convert_legacy(store, face_data_path=FACE_DATA_PATH, faces_dir=REGISTERED_FACES_DIR):
+    """Copy the pickles' embeddings into the store, skipping students it already owns.
+
+    Afterwards load_gallery maps the store alone and never unpickles.
+    Returns the number of rows converted; the caller saves the store.
+    """
+    embeddings, ids, names = load_legacy(face_data_path, faces_dir, skip=store.overrides())
+    store.put_legacy(embeddings, ids, names)
+    return len(ids)
+
+
+def embed_image(embedder, image_path):
+    """Embedding of the most prominent face in an image file"""
+    with open(image_path, 'rb') as f:
+        embeddings, _ = embedder.embed(f.read())
+    if len(embeddings) == 0:
+        raise ValueError('No face detected in the image')
+    return embeddings[:1]
+
+
+def enroll_image(store, embedder, image_path, name=None):
+    """Embed one image into the store if it is new or changed.
+
+    Returns (student_id, name, embeddings), or None when the stored hash
+    already matches. The caller saves the store.
+    """
+    source = os.path.basename(image_path)
+    sha256 = hash_image(image_path)
+    if store.sources.get(source) == sha256:
+        return None
+    student_id = student_id_for(image_path)
+    name = name or store.students().get(student_id) or student_id
+    embeddings = embed_image(embedder, image_path)
+    store.put(source, sha256, student_id, name, embeddings)
+    return student_id, name, embeddings
+
+
+def sync(store, embedder, faces_dir=REGISTERED_FACES_DIR, names=None):
+    """Bring the store in line with faces_dir.
+
+    names maps student_id to display name for new students. Returns
+    (changed, removed, errors): changed student ids, student ids whose
+    images disappeared, and per-file embedding failures.
+    """
+    names = names or {}
+    images = sorted(f for f in os.listdir(faces_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+    changed, errors = [], []
+    for image in images:
+        try:
+            result = enroll_image(store, embedder, os.path.join(faces_dir, image),
+                                  names.get(student_id_for(image)))
+        except ValueError as e:
+            errors.append({'file': image, 'error': str(e)})
+            continue
+        if result:
+            changed.append(result[0])
+
+    removed = []
+    for source in set(store.sources) - set(images):
+        student_id = student_id_for(source)
+        store.remove_source(source)
+        removed.append(student_id)
+    store.save()
+    return changed, removed, errors
+
+
+def apply_to(face_recog, store, student_ids):
+    """Hot-swap the given students' embeddings in a live FaceRecognition"""
+    for student_id in student_ids:
+        face_recog.remove_student(student_id)
+        rows = [i for i, row in enumerate(store.rows) if row['student_id'] == student_id]
+        if rows:
+            face_recog.add_student(student_id, store.rows[rows[0]]['name'], np.asarray(store.matrix[rows]))
+
+
+def student_names(face_data_path=FACE_DATA_PATH):
+    """student_id -> name from the users table, falling back to face_data.pkl"""
+    import db
+    names = {}
+    if os.path.exists(face_data_path):
+        with open(face_data_path, 'rb') as f:
+            data = pickle.load(f)
+        names.update(zip(data['ids'], data['names']))
+    conn = db.connect()
+    try:
+        names.update(conn.execute("SELECT student_id, name FROM users WHERE role = 'student'").fetchall())
+    finally:
+        conn.close()
+    return names
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'sync'
+    if command not in ('list', 'convert', 'sync'):
+        sys.exit(f"Unknown command '{command}' (expected convert, sync or list)")
+    with EnrollmentLock():
+        store = EnrollmentStore()
+        if command == 'list':
+            for student_id, name in store.students().items():
+                count = sum(row['student_id'] == student_id for row in store.rows)
+                print(f"   {student_id}: {name} ({count} embedding(s))")
+            print(f"✅ {len(store.students())} enrolled students, {len(store.rows)} embeddings")
+        elif command == 'convert':
+            converted = convert_legacy(store)
+            store.save()
+            print(f"✅ Converted {converted} legacy embedding(s); {len(store.rows)} embeddings in {store.path}")
+        else:
+            from recognition import FaceEmbedder
+            changed, removed, errors = sync(store, FaceEmbedder(), names=student_names())
+            for error in errors:
+                print(f"❌ {error['file']}: {error['error']}")
+            print(f"✅ Enrolled {len(changed)} new/changed image(s), removed {len(removed)}; "
+                  f"{len(store.rows)} embeddings stored")
@@ -0,0 +1,351 @@
+"""Approximate nearest-neighbour indexes over the enrolled Facenet embeddings.
+
+FACE_INDEX_MODE picks how FaceRecognition searches the gallery:
+
+    exact   brute-force cosine over the whole matrix (recognition.EmbeddingMatrix)
+    ivf     inverted file: k-means cells, only the FACE_INDEX_NPROBE closest are scanned
+    hnsw    hnswlib graph (optional, see requirements-optional.txt), FACE_INDEX_EF controls the beam width
+
+Both ANN indexes expose the EmbeddingMatrix interface (ids, names, search,
+add, remove, students) and are persisted next to the gallery, tagged with a
+fingerprint of the gallery files they were built from so a changed gallery
+triggers a rebuild. Saves go through a temporary file and a rename, so
+several server processes can share FACE_INDEX_PATH, and an index that fails
+to load is simply rebuilt. Raising nprobe / ef trades latency for recall.
+"""
+import os
+import json
+import uuid
+import hashlib
+
+import numpy as np
+
+FACE_INDEX_MODE = os.environ.get('FACE_INDEX_MODE', 'exact')
+FACE_INDEX_PATH = os.environ.get('FACE_INDEX_PATH', 'face_ann')
+# IVF: cells (0 = sqrt(gallery size)) and cells scanned per query
+FACE_INDEX_NLIST = int(os.environ.get('FACE_INDEX_NLIST', 0))
+FACE_INDEX_NPROBE = int(os.environ.get('FACE_INDEX_NPROBE', 8))
+# HNSW: graph degree, build-time and query-time beam widths
+FACE_INDEX_M = int(os.environ.get('FACE_INDEX_M', 16))
+FACE_INDEX_EF_CONSTRUCTION = int(os.environ.get('FACE_INDEX_EF_CONSTRUCTION', 200))
+FACE_INDEX_EF = int(os.environ.get('FACE_INDEX_EF', 64))
+
+KMEANS_ITERATIONS = 20
+KMEANS_SAMPLE_PER_CELL = 64
+# Leading bytes of each gallery file that go into its fingerprint (the embedding store's header)
+FINGERPRINT_HEAD_BYTES = 64
+
+
+def l2_normalize(vectors):
+    """Row-wise L2 normalisation into a contiguous float32 matrix"""
+    vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def fingerprint(paths):
+    """Identifies the gallery files an index was built from without reading the embeddings.
+
+    Each file contributes its size, mtime and leading bytes; for the
+    embedding store those are its header, which carries a CRC of the matrix.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(path.encode() + b'\0')
+        try:
+            stat = os.stat(path)
+            with open(path, 'rb') as f:
+                head = f.read(FINGERPRINT_HEAD_BYTES)
+        except FileNotFoundError:
+            continue
+        digest.update(f'{stat.st_size}:{stat.st_mtime_ns}\0'.encode() + head)
+    return digest.hexdigest()
+
+
+def _temporary(path):
+    """Per-process temporary name next to path, to be renamed over it"""
+    return f'{path}.{os.getpid()}.tmp'
+
+
+def _top_k(rows, scores, k):
+    """Best k (rows, scores) by descending score, padded with -1 / -inf"""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores)
+    rows, scores = rows[order], scores[order]
+    if len(rows) < k:
+        rows = np.concatenate([rows, np.full(k - len(rows), -1, dtype=np.int64)])
+        scores = np.concatenate([scores, np.full(k - len(scores), -np.inf, dtype=np.float32)])
+    return rows, scores
+
+
+def kmeans(vectors, cells, rng, iterations=KMEANS_ITERATIONS):
+    """Spherical k-means on unit vectors; returns unit centroids"""
+    sample = vectors
+    if len(vectors) > cells * KMEANS_SAMPLE_PER_CELL:
+        sample = vectors[rng.choice(len(vectors), cells * KMEANS_SAMPLE_PER_CELL, replace=False)]
+    centroids = sample[rng.choice(len(sample), cells, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed cells that lost all their points
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = l2_normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: each embedding lives in its closest k-means cell.
+
+    A query scores the centroids, then only the rows of its nprobe best
+    cells. Removed rows are tombstoned; add() files new rows into existing
+    cells, and train() re-clusters when the gallery has outgrown them.
+    """
+
+    def __init__(self, embeddings, ids, names, nlist=FACE_INDEX_NLIST, nprobe=FACE_INDEX_NPROBE, seed=0):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.nprobe = nprobe
+        self.matrix = l2_normalize(embeddings) if len(self.ids) else np.empty((0, 0), dtype=np.float32)
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self._rng = np.random.default_rng(seed)
+        self.train(nlist)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def train(self, nlist=0):
+        live = np.flatnonzero(self.alive)
+        nlist = nlist or max(1, int(np.sqrt(len(live))))
+        nlist = min(nlist, len(live)) or 1
+        if len(live):
+            self.centroids = kmeans(self.matrix[live], nlist, self._rng)
+        else:
+            self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.assignment = np.full(len(self.ids), -1, dtype=np.int64)
+        self._assign(live)
+
+    def _assign(self, rows):
+        if len(self.centroids) == 0:
+            return
+        self.assignment[rows] = np.argmax(self.matrix[rows] @ self.centroids.T, axis=1)
+        live = self.alive & (self.assignment >= 0)
+        order = np.argsort(self.assignment[live], kind='stable')
+        rows_sorted = np.flatnonzero(live)[order]
+        bounds = np.searchsorted(self.assignment[rows_sorted], np.arange(len(self.centroids) + 1))
+        self.lists = [rows_sorted[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def search(self, probes, k=1):
+        """Same contract as EmbeddingMatrix.search; short results pad with -1"""
+        probes = l2_normalize(probes)
+        if len(self) == 0:
+            empty = np.empty((len(probes), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        k = min(k, len(self))
+        nprobe = min(self.nprobe, len(self.centroids))
+        cells = np.argpartition(-(probes @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        indices = np.empty((len(probes), k), dtype=np.int64)
+        scores = np.empty((len(probes), k), dtype=np.float32)
+        for i, probe in enumerate(probes):
+            rows = np.concatenate([self.lists[cell] for cell in cells[i]])
+            indices[i], scores[i] = _top_k(rows, self.matrix[rows] @ probe, k)
+        return indices, scores
+
+    def add(self, embeddings, ids, names):
+        if len(self.ids) == 0:
+            self.__init__(embeddings, ids, names, nprobe=self.nprobe)
+            return
+        start = len(self.ids)
+        self.matrix = np.vstack([self.matrix, l2_normalize(embeddings)])
+        self.ids.extend(ids)
+        self.names.extend(names)
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        self.assignment = np.concatenate([self.assignment, np.full(len(ids), -1, dtype=np.int64)])
+        # Cells trained on a much smaller gallery get too crowded to stay fast
+        if len(self) > 4 * len(self.centroids) ** 2:
+            self.train()
+        else:
+            self._assign(np.arange(start, len(self.ids)))
+
+    def remove(self, student_id):
+        rows = [i for i, sid in enumerate(self.ids) if sid == student_id]
+        self.alive[rows] = False
+        self._assign(np.empty(0, dtype=np.int64))
+        return len(rows)
+
+    def students(self):
+        return {self.ids[i]: self.names[i] for i in np.flatnonzero(self.alive)}
+
+    def save(self, path, source_fingerprint):
+        tmp = _temporary(path + '.ivf.npz')
+        with open(tmp, 'wb') as f:
+            np.savez(f, matrix=self.matrix, ids=np.asarray(self.ids, dtype=str),
+                     names=np.asarray(self.names, dtype=str), alive=self.alive, centroids=self.centroids,
+                     assignment=self.assignment, nprobe=self.nprobe, fingerprint=source_fingerprint)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path + '.ivf.npz')
+
+    @classmethod
+    def load(cls, path, nprobe=FACE_INDEX_NPROBE):
+        """(index, fingerprint) or (None, None) if nothing is saved"""
+        if not os.path.exists(path + '.ivf.npz'):
+            return None, None
+        data = np.load(path + '.ivf.npz')
+        index = cls.__new__(cls)
+        index.matrix = data['matrix']
+        index.ids = data['ids'].tolist()
+        index.names = data['names'].tolist()
+        index.alive = data['alive']
+        index.centroids = data['centroids']
+        index.nprobe = nprobe
+        index._rng = np.random.default_rng(0)
+        index.assignment = data['assignment']
+        index._assign(np.empty(0, dtype=np.int64))
+        return index, str(data['fingerprint'])
+
+
+class HNSWIndex:
+    """hnswlib graph over unit vectors with inner-product distance.
+
+    Row numbers are the hnswlib labels; removed rows are marked deleted in
+    the graph and their slots reused by later adds.
+    """
+
+    def __init__(self, embeddings, ids, names, m=FACE_INDEX_M, ef_construction=FACE_INDEX_EF_CONSTRUCTION,
+                 ef=FACE_INDEX_EF, graph=None):
+        import hnswlib
+        self.ids = list(ids)
+        self.names = list(names)
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.ef = ef
+        vectors = l2_normalize(embeddings) if len(self.ids) else None
+        if graph is None:
+            dim = vectors.shape[1] if vectors is not None else 128
+            graph = hnswlib.Index(space='ip', dim=dim)
+            graph.init_index(max_elements=max(len(self.ids), 1024), ef_construction=ef_construction, M=m,
+                             allow_replace_deleted=True)
+            if vectors is not None:
+                graph.add_items(vectors, np.arange(len(self.ids)))
+        self.graph = graph
+        self.graph.set_ef(ef)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @property
+    def dim(self):
+        return self.graph.dim
+
+    def search(self, probes, k=1):
+        probes = l2_normalize(probes)
+        if len(self) == 0:
+            empty = np.empty((len(probes), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        k = min(k, len(self))
+        self.graph.set_ef(max(self.ef, k))
+        labels, distances = self.graph.knn_query(probes, k=k)
+        # ip distance is 1 - cosine similarity
+        return labels.astype(np.int64), (1 - distances).astype(np.float32)
+
+    def add(self, embeddings, ids, names):
+        vectors = l2_normalize(embeddings)
+        needed = self.graph.get_current_count() + len(ids)
+        if needed > self.graph.get_max_elements():
+            self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+        labels = np.arange(len(self.ids), len(self.ids) + len(ids))
+        self.graph.add_items(vectors, labels, replace_deleted=True)
+        self.ids.extend(ids)
+        self.names.extend(names)
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+
+    def remove(self, student_id):
+        rows = [i for i, sid in enumerate(self.ids) if sid == student_id and self.alive[i]]
+        for row in rows:
+            self.graph.mark_deleted(row)
+        self.alive[rows] = False
+        return len(rows)
+
+    def students(self):
+        return {self.ids[i]: self.names[i] for i in np.flatnonzero(self.alive)}
+
+    def save(self, path, source_fingerprint):
+        # The graph gets a fresh name and the metadata, renamed into place last, points at it,
+        # so a reader never pairs one save's graph with another's ids
+        directory = os.path.dirname(path)
+        graph_name = f'{os.path.basename(path)}.{uuid.uuid4().hex}.hnsw'
+        self.graph.save_index(os.path.join(directory, graph_name))
+        previous = None
+        try:
+            with open(path + '.hnsw.json') as f:
+                previous = json.load(f).get('graph')
+        except (OSError, ValueError):
+            pass
+        tmp = _temporary(path + '.hnsw.json')
+        with open(tmp, 'w') as f:
+            json.dump({'ids': self.ids, 'names': self.names, 'alive': self.alive.tolist(),
+                       'dim': self.graph.dim, 'graph': graph_name, 'fingerprint': source_fingerprint}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path + '.hnsw.json')
+        if previous and previous != graph_name:
+            try:
+                os.remove(os.path.join(directory, previous))
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def load(cls, path, ef=FACE_INDEX_EF):
+        if not os.path.exists(path + '.hnsw.json'):
+            return None, None
+        import hnswlib
+        with open(path + '.hnsw.json') as f:
+            meta = json.load(f)
+        graph = hnswlib.Index(space='ip', dim=meta['dim'])
+        graph.load_index(os.path.join(os.path.dirname(path), meta['graph']), allow_replace_deleted=True)
+        index = cls(np.empty((0, meta['dim'])), [], [], ef=ef, graph=graph)
+        index.ids, index.names = meta['ids'], meta['names']
+        index.alive = np.asarray(meta['alive'], dtype=bool)
+        return index, meta['fingerprint']
+
+
+INDEX_TYPES = {'ivf': IVFIndex, 'hnsw': HNSWIndex}
+
+
+def build_index(gallery, source, mode=FACE_INDEX_MODE, path=FACE_INDEX_PATH):
+    """Index for gallery (an EmbeddingMatrix) in the given mode.
+
+    source is the fingerprint() of the files the gallery was loaded from.
+    ANN indexes are loaded from path when they were built from the same
+    files, otherwise (or if the saved index cannot be read) rebuilt and saved.
+    """
+    if mode == 'exact':
+        return gallery
+    if mode not in INDEX_TYPES:
+        raise ValueError(f"Unknown FACE_INDEX_MODE '{mode}' (expected exact, ivf or hnsw)")
+    index_type = INDEX_TYPES[mode]
+    if mode == 'hnsw':
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError:
+            raise ValueError("FACE_INDEX_MODE 'hnsw' needs the optional hnswlib package "
+                             "(see requirements-optional.txt)")
+    try:
+        index, saved = index_type.load(path)
+    except Exception as e:
+        print(f"⚠️ Saved {mode} face index could not be loaded, rebuilding: {e}")
+        index, saved = None, None
+    if index is not None and saved == source:
+        return index
+    index = index_type(gallery.matrix, gallery.ids, gallery.names)
+    index.save(path, source)
+    print(f"🧭 Built {mode} face index over {len(index)} embeddings")
+    return index
@@ -0,0 +1,128 @@
+"""Short-lived caches in front of face recognition and attendance marking.
+
+Kiosks keep sending near-identical frames while a student stands in front
+of the camera. RecognitionCache remembers the match for a frame's
+perceptual hash (dHash) per client, so repeats within FRAME_CACHE_TTL skip
+inference. MarkCache remembers which (student_id, date) pairs this process
+has already seen marked, so repeat marks are answered without touching the
+database. Attendance is one row per student per day, so the day is the
+period marks are deduplicated over.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import preprocess
+
+FRAME_CACHE_TTL = float(os.environ.get('FRAME_CACHE_TTL', 10))
+FRAME_CACHE_SIZE = int(os.environ.get('FRAME_CACHE_SIZE', 1024))
+# Hashes of a client's last few frames are kept; a new frame reuses a result
+# when at most this many of the 64 hash bits differ
+FRAME_HASH_DISTANCE = int(os.environ.get('FRAME_HASH_DISTANCE', 4))
+FRAMES_PER_CLIENT = 4
+MARK_CACHE_TTL = float(os.environ.get('MARK_CACHE_TTL', 900))
+MARK_CACHE_SIZE = int(os.environ.get('MARK_CACHE_SIZE', 100000))
+# Frames are decoded at reduced size just for hashing
+HASH_DECODE_SIDE = 64
+
+
+def dhash(image_bytes):
+    """64-bit difference hash of an image: brightness gradients on a 9x8 grayscale thumbnail"""
+    import cv2
+    image, _ = preprocess.decode(image_bytes, min_side=HASH_DECODE_SIDE)
+    gray = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(gray[:, 1:] > gray[:, :-1]).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class RecognitionCache:
+    """Recent recognition results per client, looked up by frame similarity.
+
+    Results are scoped to a client (user or address) so one kiosk's frame
+    never answers for another. clear() after the gallery changes.
+    """
+
+    def __init__(self, ttl=FRAME_CACHE_TTL, max_clients=FRAME_CACHE_SIZE, max_distance=FRAME_HASH_DISTANCE):
+        self.ttl = ttl
+        self.max_clients = max_clients
+        self.max_distance = max_distance
+        # client -> [(expires, frame_hash, result)], newest last
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, client, frame_hash):
+        """(True, result) for a cached similar frame, otherwise (False, None)"""
+        now = time.monotonic()
+        with self._lock:
+            frames = [entry for entry in self._clients.get(client, ()) if entry[0] >= now]
+            for _, cached_hash, result in reversed(frames):
+                if hamming(frame_hash, cached_hash) <= self.max_distance:
+                    self._clients.move_to_end(client)
+                    self.hits += 1
+                    return True, result
+            self.misses += 1
+            return False, None
+
+    def put(self, client, frame_hash, result):
+        now = time.monotonic()
+        with self._lock:
+            frames = [entry for entry in self._clients.pop(client, ()) if entry[0] >= now]
+            frames.append((now + self.ttl, frame_hash, result))
+            self._clients[client] = frames[-FRAMES_PER_CLIENT:]
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'clients': len(self._clients)
+            }
+
+
+class MarkCache:
+    """(student_id, date) pairs known to be marked already, for MARK_CACHE_TTL"""
+
+    def __init__(self, ttl=MARK_CACHE_TTL, max_size=MARK_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.absorbed = 0
+
+    def seen(self, student_id, date):
+        key = (student_id, date)
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None or expires < time.monotonic():
+                self._entries.pop(key, None)
+                return False
+            self.absorbed += 1
+            return True
+
+    def add(self, student_id, date):
+        key = (student_id, date)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = time.monotonic() + self.ttl
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'absorbed': self.absorbed, 'size': len(self._entries)}
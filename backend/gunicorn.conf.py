@@ -0,0 +1,51 @@
+"""gunicorn settings; run from backend/:  gunicorn -c gunicorn.conf.py
+
+Needs gunicorn, plus uvicorn and asgiref for the ASGI worker class. The
+lifecycle hooks below call into wsgi.py.
+"""
+import os
+
+import wsgi
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+wsgi_app = 'asgi:application' if 'uvicorn' in worker_class.lower() else 'wsgi:load_app()'
+
+# Face inference and OCR run in their own process pools, so web workers mostly
+# wait on I/O: a few processes with several threads each. Every worker loads
+# its own gallery (memory-mapped, so shared) and inference pool, so the CPUs
+# are divided between the workers' pools rather than multiplied.
+cpus = os.cpu_count() or 1
+workers = int(os.environ.get('GUNICORN_WORKERS', min(4, max(2, cpus // 2))))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+os.environ.setdefault('INFERENCE_WORKERS', str(max(1, cpus // (2 * workers))))
+os.environ.setdefault('OCR_WORKERS', str(max(1, cpus // (2 * workers))))
+os.environ.setdefault('OCR_CONCURRENT_JOBS', '1')
+
+# Model warm-up happens after the worker has booted, so allow for it
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers slowly to bound leaks in native libraries; jitter avoids restarting them together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 20000))
+max_requests_jitter = max_requests // 10
+# Imported per worker, after the fork, so HUP reloads code and nothing is shared by accident
+preload_app = False
+accesslog = '-'
+
+
+def on_starting(server):
+    wsgi.prepare()
+
+
+def post_worker_init(worker):
+    wsgi.start_services()
+
+
+def worker_exit(server, worker):
+    wsgi.stop_services()
+
+
+def child_exit(server, worker):
+    # Runs in the master for clean exits and crashes alike
+    wsgi.recover_worker(worker.pid)
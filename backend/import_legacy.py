@@ -0,0 +1,202 @@
+"""Import legacy JSON attendance records into the attendance table.
+
+Streams top-level JSON arrays element by element, so memory stays flat no
+matter how large the archive is, and inserts rows with executemany in
+batched transactions. Progress is checkpointed per file in the same
+transaction as each batch: an interrupted run resumes where it stopped,
+and re-running is a no-op thanks to the (student_id, date) unique key.
+
+Run from backend/:
+    python import_legacy.py                    import the default legacy files
+    python import_legacy.py path/to/file.json  import specific files
+    python import_legacy.py --reset            forget checkpoints and rescan
+"""
+import os
+import re
+import glob
+import json
+import codecs
+import argparse
+from datetime import datetime
+
+import db
+import migrations
+
+DEFAULT_SOURCES = [
+    'attendance_records/attendance_*.json',
+    'data/attendance_records/attendance.json',
+    'data/students.json',
+]
+BATCH_SIZE = 5000
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_array(path, start_offset=0, chunk_size=CHUNK_SIZE):
+    """Yield (element, end_byte_offset) for each element of a top-level JSON array.
+
+    start_offset must be 0 or an offset previously yielded for this file.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        # offset is the file byte offset of buffer[pos]
+        buffer, pos, offset = '', 0, start_offset
+        expect = '[' if start_offset == 0 else ','
+        eof = False
+
+        def advance(new_pos):
+            nonlocal pos, offset
+            offset += len(buffer[pos:new_pos].encode())
+            pos = new_pos
+
+        while True:
+            advance(_WHITESPACE.match(buffer, pos).end())
+            if pos == len(buffer):
+                if eof:
+                    # An empty file is treated as an empty array
+                    if expect not in ('[', ','):
+                        raise ValueError(f'{path}: unexpected end of file')
+                    return
+                # Keep only the unconsumed tail so the buffer stays around one element + one chunk
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + utf8.decode(chunk, final=eof), 0
+                continue
+
+            char = buffer[pos]
+            if expect == '[':
+                if char == '﻿':  # byte order mark
+                    advance(pos + 1)
+                    continue
+                if char != '[':
+                    raise ValueError(f'{path}: expected a JSON array')
+                advance(pos + 1)
+                expect = 'first'
+            elif char == ']' and expect in ('first', ','):
+                return
+            elif expect == ',':
+                if char != ',':
+                    raise ValueError(f'{path}: expected "," or "]" at byte {offset}')
+                advance(pos + 1)
+                expect = 'value'
+            else:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    end = None
+                # A value is only complete once its separator has been read: "1.5e" decodes as 1.5
+                if end is not None and not eof:
+                    following = _WHITESPACE.match(buffer, end).end()
+                    if following == len(buffer) or buffer[following] not in ',]':
+                        end = None
+                if end is None:
+                    chunk = f.read(chunk_size)
+                    eof = not chunk
+                    buffer, pos = buffer[pos:] + utf8.decode(chunk, final=eof), 0
+                    continue
+                advance(end)
+                expect = ','
+                yield element, offset
+
+
+def normalize(record):
+    """Map a legacy record onto an attendance row, or None if unusable"""
+    student_id = record.get('student_id')
+    if not student_id:
+        return None
+    timestamp = record.get('timestamp')
+    try:
+        parsed = datetime.fromisoformat(timestamp) if timestamp else None
+    except (TypeError, ValueError):  # malformed timestamp: skip the record rather than the file
+        return None
+    date = record.get('date') or (parsed and parsed.strftime('%Y-%m-%d'))
+    time = record.get('time') or (parsed and parsed.strftime('%H:%M:%S')) or '00:00:00'
+    if not date:
+        return None
+    return (str(student_id), record.get('name') or record.get('student_name') or str(student_id),
+            date, time, record.get('status', 'present'), record.get('confidence'))
+
+
+def import_file(conn, path, batch_size=BATCH_SIZE):
+    """Import one file from its checkpoint; returns (records_seen, rows_inserted, records_skipped)"""
+    stat = os.stat(path)
+    source = os.path.abspath(path)
+    row = conn.execute('''SELECT byte_offset, records, size, mtime, completed FROM import_checkpoints
+                          WHERE source = ?''', (source,)).fetchone()
+    start_offset, records = 0, 0
+    if row:
+        byte_offset, records, size, mtime, completed = row
+        if completed and size == stat.st_size and mtime == stat.st_mtime:
+            return 0, 0, 0
+        # Legacy writers only ever append, so an unshrunk file keeps its parsed prefix
+        if stat.st_size >= byte_offset:
+            start_offset = byte_offset
+        else:
+            records = 0
+
+    seen = inserted = skipped = 0
+    batch = []
+
+    def flush(offset, completed=False):
+        nonlocal inserted
+        c = conn.cursor()
+        c.executemany('''INSERT INTO attendance (student_id, student_name, date, time, status, confidence)
+                         VALUES (?, ?, ?, ?, ?, ?)
+                         ON CONFLICT (student_id, date) DO NOTHING''', batch)
+        inserted += c.rowcount if c.rowcount > 0 else 0
+        c.execute('''INSERT INTO import_checkpoints (source, byte_offset, records, size, mtime, completed, updated_at)
+                     VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                     ON CONFLICT (source) DO UPDATE SET
+                         byte_offset = excluded.byte_offset, records = excluded.records,
+                         size = excluded.size, mtime = excluded.mtime,
+                         completed = excluded.completed, updated_at = excluded.updated_at''',
+                  (source, offset, records + seen, stat.st_size, stat.st_mtime, completed))
+        conn.commit()
+        batch.clear()
+
+    offset = start_offset
+    for record, offset in iter_json_array(path, start_offset):
+        seen += 1
+        normalized = normalize(record) if isinstance(record, dict) else None
+        if normalized:
+            batch.append(normalized)
+        else:
+            skipped += 1
+        if len(batch) >= batch_size:
+            flush(offset)
+    flush(offset, completed=True)
+    return seen, inserted, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import legacy JSON attendance records')
+    parser.add_argument('paths', nargs='*', help='JSON files (default: the legacy record locations)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--reset', action='store_true', help='ignore saved checkpoints')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(path for pattern in DEFAULT_SOURCES for path in glob.glob(pattern))
+    conn = db.connect()
+    migrations.migrate(conn)
+    if args.reset:
+        conn.execute("DELETE FROM import_checkpoints")
+        conn.commit()
+
+    for path in paths:
+        try:
+            seen, inserted, skipped = import_file(conn, path, args.batch_size)
+        except ValueError as e:  # JSONDecodeError included
+            conn.rollback()
+            print(f"❌ {path}: {e}")
+            continue
+        print(f"📥 {path}: {seen} new records, {inserted} attendance rows inserted, {skipped} unusable records skipped")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from recognition import FaceEmbedder, MODEL_NAME, DETECTOR_BACKEND
+
+# 0 workers runs inference in-process on the request thread
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', min(2, os.cpu_count() or 1)))
+# Requests allowed to wait for a worker before new ones are turned away
+INFERENCE_QUEUE_SIZE = int(os.environ.get('INFERENCE_QUEUE_SIZE', 8))
+INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', 30))
+INFERENCE_SUBMIT_TIMEOUT = float(os.environ.get('INFERENCE_SUBMIT_TIMEOUT', 0.5))
+
+
+class InferenceBusy(Exception):
+    """Raised when the inference queue is full"""
+
+
+# Per-process embedder, built once by _init_worker
+_embedder = None
+
+
+def _init_worker(model_name, detector_backend):
+    global _embedder
+    _embedder = FaceEmbedder(model_name, detector_backend)
+    _embedder.warm_up()
+
+
+def _ready():
+    return os.getpid()
+
+
+def _embed(image):
+    return _embedder.embed(image)
+
+
+def _detect_and_embed(images):
+    return _embedder.detect_and_embed(images)
+
+
+class InferenceService:
+    """Warm DeepFace models in a pool of worker processes.
+
+    Exposes the same embed() / detect_and_embed() interface as FaceEmbedder,
+    so FaceRecognition can use either. Work is admitted through a bounded
+    set of slots; when all are taken submit() waits briefly and then raises
+    InferenceBusy so handlers can shed load instead of piling up.
+    """
+
+    def __init__(self, workers=INFERENCE_WORKERS, queue_size=INFERENCE_QUEUE_SIZE,
+                 timeout=INFERENCE_TIMEOUT, model_name=MODEL_NAME, detector_backend=DETECTOR_BACKEND):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        if workers > 0:
+            # spawn, not fork: TensorFlow state does not survive a fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_name, detector_backend))
+            self._local = None
+        else:
+            self._executor = None
+            self._local = FaceEmbedder(model_name, detector_backend)
+            self._local_lock = threading.Lock()
+
+    def start(self):
+        """Warm every worker (or the in-process model) before serving traffic"""
+        if self._executor is None:
+            self._local.warm_up()
+            print("🔥 Face model warmed up in-process")
+            return
+        pids = {future.result() for future in [self._executor.submit(_ready) for _ in range(self.workers)]}
+        print(f"🔥 Face model warmed up in {len(pids)} inference worker(s)")
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    def _admit(self):
+        if not self._slots.acquire(timeout=INFERENCE_SUBMIT_TIMEOUT):
+            raise InferenceBusy('Recognition is busy, please retry')
+        with self._lock:
+            self._pending += 1
+
+    def submit(self, fn, *args):
+        self._admit()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _run(self, fn, local_fn, *args):
+        if self._executor is None:
+            # The in-process model acts as a single worker: one call runs, the admitted rest queue
+            self._admit()
+            try:
+                with self._local_lock:
+                    return local_fn(*args)
+            finally:
+                self._release()
+
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise InferenceBusy('Recognition timed out, please retry')
+
+    def embed(self, image):
+        return self._run(_embed, self._local and self._local.embed, image)
+
+    def detect_and_embed(self, images):
+        return self._run(_detect_and_embed, self._local and self._local.detect_and_embed, images)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
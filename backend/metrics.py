@@ -0,0 +1,174 @@
+"""Prometheus-style metrics and per-request stage traces.
+
+Every request is timed into a histogram by method, route and status, and
+named stages (JWT decode, user lookup, SQL, OCR, face embed and match,
+...) into a second histogram by stage. Gauges are callbacks read at
+scrape time. GET /metrics serves the text exposition format.
+
+Sending `X-Debug-Trace: 1` returns the request's stages as a
+Server-Timing header. SQL time is summed per request by db's cursors and
+recorded once, as the 'sql' stage, so the per-statement cost is a clock
+read. Streamed responses are timed to their first byte.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+PREFIX = 'attendance_'
+# Seconds; from a cached SQL lookup up to a multi-page OCR job
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Per-request state: [sql_seconds] while a request is being timed, trace list when X-Debug-Trace is set
+_sql_seconds = ContextVar('sql_seconds', default=None)
+_trace = ContextVar('trace', default=None)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total:.6f}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+        self.gauges = []
+
+    def histogram(self, name, help_text, labels=()):
+        histogram = Histogram(PREFIX + name, help_text, labels)
+        self.histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name, help_text, read):
+        """read() is called at scrape time; a gauge whose read() fails is left out"""
+        self.gauges.append((PREFIX + name, help_text, read))
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for name, help_text, read in self.gauges:
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}'])
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+request_seconds = registry.histogram('http_request_duration_seconds', 'Request latency by route',
+                                     ('method', 'route', 'status'))
+stage_seconds = registry.histogram('stage_duration_seconds', 'Time spent per processing stage', ('stage',))
+
+
+def observe_stage(stage, seconds):
+    if not METRICS_ENABLED:
+        return
+    stage_seconds.observe(seconds, stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_timings(timings):
+    """Feed a preprocess.stage timings dict (ms per stage) into the stage histogram"""
+    for stage, ms in timings.items():
+        observe_stage(stage, ms / 1000)
+
+
+def add_sql_time(seconds):
+    accumulated = _sql_seconds.get()
+    if accumulated is not None:
+        accumulated[0] += seconds
+
+
+def sql_timing():
+    """True while the current request is being timed, i.e. cursors should time statements"""
+    return _sql_seconds.get() is not None
+
+
+def init_app(app):
+    from flask import request, g
+
+    @app.before_request
+    def start_timer():
+        if not METRICS_ENABLED:
+            return
+        g.metrics_start = time.perf_counter()
+        g.metrics_tokens = [_sql_seconds.set([0.0])]
+        if request.headers.get('X-Debug-Trace'):
+            g.metrics_tokens.append(_trace.set([]))
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        sql_seconds = _sql_seconds.get()
+        if sql_seconds and sql_seconds[0]:
+            observe_stage('sql', sql_seconds[0])
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_seconds.observe(elapsed, request.method, route, response.status_code)
+        trace = _trace.get()
+        if trace is not None:
+            response.headers['Server-Timing'] = ', '.join(
+                [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in trace] + [f'total;dur={elapsed * 1000:.2f}'])
+        return response
+
+    @app.teardown_request
+    def reset_context(exception=None):
+        for token in reversed(g.pop('metrics_tokens', [])):
+            token.var.reset(token)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        from flask import Response
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
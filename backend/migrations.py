@@ -0,0 +1,403 @@
+"""Versioned schema migrations, tracked in PRAGMA user_version.
+
+Run from backend/:
+    python migrations.py                 apply pending migrations
+    python migrations.py --check-plans   show query plans for the hot queries
+"""
+import sys
+
+from werkzeug.security import generate_password_hash
+
+import db
+
+
+def add_column(c, table, column, declaration):
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in c.fetchall()}:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def baseline_schema(c):
+    # Users table
+    c.execute('''CREATE TABLE IF NOT EXISTS users
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  username TEXT UNIQUE NOT NULL,
+                  password TEXT NOT NULL,
+                  role TEXT NOT NULL,
+                  student_id TEXT,
+                  name TEXT,
+                  department TEXT,
+                  year TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+    # Attendance table
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  student_id TEXT NOT NULL,
+                  student_name TEXT NOT NULL,
+                  date TEXT NOT NULL,
+                  time TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  confidence REAL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+    # OD Requests table with extracurricular focus
+    c.execute('''CREATE TABLE IF NOT EXISTS od_requests
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  student_id TEXT NOT NULL,
+                  student_name TEXT NOT NULL,
+                  activity_type TEXT NOT NULL,
+                  activity_name TEXT NOT NULL,
+                  event_date TEXT NOT NULL,
+                  event_venue TEXT,
+                  organized_by TEXT,
+                  coordinator_name TEXT,
+                  coordinator_contact TEXT,
+                  od_reason TEXT NOT NULL,
+                  od_file_path TEXT NOT NULL,
+                  ocr_text TEXT,
+                  status TEXT DEFAULT 'pending',
+                  admin_notes TEXT,
+                  verified_by_ocr BOOLEAN DEFAULT FALSE,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    add_column(c, 'od_requests', 'ocr_status', "TEXT DEFAULT 'done'")
+
+    # Extracurricular activities catalog
+    c.execute('''CREATE TABLE IF NOT EXISTS activities
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT NOT NULL,
+                  type TEXT NOT NULL,
+                  description TEXT,
+                  approved BOOLEAN DEFAULT TRUE)''')
+
+    # Background OCR jobs
+    c.execute('''CREATE TABLE IF NOT EXISTS ocr_jobs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  od_request_id INTEGER NOT NULL,
+                  file_path TEXT NOT NULL,
+                  file_type TEXT NOT NULL,
+                  content_hash TEXT,
+                  status TEXT NOT NULL DEFAULT 'queued',
+                  pages INTEGER,
+                  verification_message TEXT,
+                  detected_activity TEXT,
+                  error TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  started_at TIMESTAMP,
+                  finished_at TIMESTAMP)''')
+    add_column(c, 'ocr_jobs', 'content_hash', 'TEXT')
+
+    # OCR results cached by document hash
+    c.execute('''CREATE TABLE IF NOT EXISTS ocr_cache
+                 (cache_key TEXT PRIMARY KEY,
+                  content_hash TEXT NOT NULL,
+                  ocr_text TEXT NOT NULL,
+                  is_valid BOOLEAN,
+                  verification_message TEXT,
+                  detected_activity TEXT,
+                  rules_version INTEGER,
+                  size_bytes INTEGER NOT NULL,
+                  created_at REAL NOT NULL,
+                  last_used_at REAL NOT NULL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used_at)")
+    c.execute('''CREATE TABLE IF NOT EXISTS ocr_cache_stats
+                 (name TEXT PRIMARY KEY,
+                  value INTEGER NOT NULL DEFAULT 0)''')
+    c.execute("INSERT OR IGNORE INTO ocr_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+
+
+def unique_attendance_per_day(c):
+    """One attendance row per (student_id, date).
+
+    Existing duplicates are collapsed: an approved OD ('on_duty') wins over
+    a face mark, otherwise the earliest mark of the day is kept. The same
+    rule is applied on write: marks use ON CONFLICT DO NOTHING, OD
+    approval uses ON CONFLICT DO UPDATE.
+    """
+    c.execute('''DELETE FROM attendance WHERE id NOT IN (
+                     SELECT id FROM (
+                         SELECT id, ROW_NUMBER() OVER (
+                             PARTITION BY student_id, date
+                             ORDER BY status = 'on_duty' DESC, id) AS rank
+                         FROM attendance)
+                     WHERE rank = 1)''')
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_id, date)")
+
+
+def hot_query_indexes(c):
+    # Admin dashboard: today's count per status
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_status ON attendance (date, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)")
+    # Student dashboard / listing: per-student stats and newest first
+    c.execute("CREATE INDEX IF NOT EXISTS idx_od_student_status ON od_requests (student_id, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_od_student_created ON od_requests (student_id, created_at)")
+    # Admin listing filtered by status, newest first; also serves COUNT/GROUP BY status
+    c.execute("CREATE INDEX IF NOT EXISTS idx_od_status_created ON od_requests (status, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_od_created ON od_requests (created_at)")
+    # OCR dispatcher claims the oldest queued job
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ocr_jobs_status ON ocr_jobs (status, id)")
+
+
+def _attendance_rollup_delta(row, sign):
+    """Trigger statement adding sign * row (NEW or OLD) to attendance_daily_rollup"""
+    group = "COALESCE((SELECT {column} FROM users WHERE student_id = %s.student_id AND role = 'student' LIMIT 1), '')"
+    return f'''INSERT INTO attendance_daily_rollup (date, department, year, present, on_duty)
+              VALUES ({row}.date, {group.format(column='department') % row}, {group.format(column='year') % row},
+                      {sign} * ({row}.status = 'present'), {sign} * ({row}.status = 'on_duty'))
+              ON CONFLICT (date, department, year) DO UPDATE SET
+                  present = present + excluded.present, on_duty = on_duty + excluded.on_duty;'''
+
+
+def _student_rollup_delta(row, sign):
+    return f'''INSERT INTO student_rollup (department, year, students)
+              SELECT COALESCE({row}.department, ''), COALESCE({row}.year, ''), {sign}
+              WHERE {row}.role = 'student'
+              ON CONFLICT (department, year) DO UPDATE SET students = students + excluded.students;'''
+
+
+def _od_rollup_delta(row, sign):
+    return f'''INSERT INTO od_status_rollup (status, count) VALUES ({row}.status, {sign})
+              ON CONFLICT (status) DO UPDATE SET count = count + excluded.count;'''
+
+
+def summary_rollups(c):
+    """Counters kept in step with their source tables by triggers (see rollups.py)"""
+    import rollups
+
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance_daily_rollup
+                 (date TEXT NOT NULL,
+                  department TEXT NOT NULL,
+                  year TEXT NOT NULL,
+                  present INTEGER NOT NULL DEFAULT 0,
+                  on_duty INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (date, department, year))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS student_rollup
+                 (department TEXT NOT NULL,
+                  year TEXT NOT NULL,
+                  students INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (department, year))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS od_status_rollup
+                 (status TEXT PRIMARY KEY,
+                  count INTEGER NOT NULL DEFAULT 0)''')
+
+    triggers = {
+        'attendance_rollup_insert': ('AFTER INSERT ON attendance', [_attendance_rollup_delta('NEW', 1)]),
+        'attendance_rollup_update': ('AFTER UPDATE OF student_id, date, status ON attendance',
+                                     [_attendance_rollup_delta('OLD', -1), _attendance_rollup_delta('NEW', 1)]),
+        'attendance_rollup_delete': ('AFTER DELETE ON attendance', [_attendance_rollup_delta('OLD', -1)]),
+        'student_rollup_insert': ('AFTER INSERT ON users', [_student_rollup_delta('NEW', 1)]),
+        'student_rollup_update': ('AFTER UPDATE OF role, department, year ON users',
+                                  [_student_rollup_delta('OLD', -1), _student_rollup_delta('NEW', 1)]),
+        'student_rollup_delete': ('AFTER DELETE ON users', [_student_rollup_delta('OLD', -1)]),
+        'od_rollup_insert': ('AFTER INSERT ON od_requests', [_od_rollup_delta('NEW', 1)]),
+        'od_rollup_update': ('AFTER UPDATE OF status ON od_requests',
+                             [_od_rollup_delta('OLD', -1), _od_rollup_delta('NEW', 1)]),
+        'od_rollup_delete': ('AFTER DELETE ON od_requests', [_od_rollup_delta('OLD', -1)]),
+    }
+    for name, (event, statements) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {' '.join(statements)} END")
+
+    rollups.rebuild(c)
+
+
+def import_checkpoints(c):
+    """Per-file progress of import_legacy.py, committed with each batch"""
+    c.execute('''CREATE TABLE IF NOT EXISTS import_checkpoints
+                 (source TEXT PRIMARY KEY,
+                  byte_offset INTEGER NOT NULL DEFAULT 0,
+                  records INTEGER NOT NULL DEFAULT 0,
+                  size INTEGER,
+                  mtime REAL,
+                  completed BOOLEAN DEFAULT FALSE,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+
+def write_log_state(c):
+    """Last attendance write-log entry applied to the table, per log file (see write_log.py)"""
+    c.execute('''CREATE TABLE IF NOT EXISTS write_log_state
+                 (source TEXT PRIMARY KEY,
+                  applied_seq INTEGER NOT NULL DEFAULT 0)''')
+
+
+def report_indexes(c):
+    # Reports join attendance and OD rows back to the student's department
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_student_id ON users (student_id)")
+
+
+def od_full_text_search(c):
+    """FTS5 index over OD request text fields, kept current by triggers (see od_search.py)"""
+    import od_search
+
+    od_search.create(c)
+
+
+def _attendance_stored_delta(row, sign):
+    """Trigger statement adding sign * row (OLD) to the bucket stored on the row"""
+    return f'''INSERT INTO attendance_daily_rollup (date, department, year, present, on_duty)
+              VALUES ({row}.date, COALESCE({row}.department, ''), COALESCE({row}.year, ''),
+                      {sign} * ({row}.status = 'present'), {sign} * ({row}.status = 'on_duty'))
+              ON CONFLICT (date, department, year) DO UPDATE SET
+                  present = present + excluded.present, on_duty = on_duty + excluded.on_duty;'''
+
+
+def _attendance_regroup(condition):
+    """Trigger statements that re-read the student's group for the matching attendance rows.
+
+    Their counts leave the stored buckets, the rows take the student's
+    current department/year, and the counts are added to the new buckets.
+    """
+    def delta(sign):
+        return f'''INSERT INTO attendance_daily_rollup (date, department, year, present, on_duty)
+                  SELECT date, department, year, {sign} * SUM(status = 'present'), {sign} * SUM(status = 'on_duty')
+                  FROM attendance WHERE {condition} GROUP BY date, department, year
+                  ON CONFLICT (date, department, year) DO UPDATE SET
+                      present = present + excluded.present, on_duty = on_duty + excluded.on_duty;'''
+
+    import rollups
+
+    return [delta(-1), f"{rollups.STAMP_GROUPS} WHERE {condition};", delta(1)]
+
+
+def attendance_rollup_groups(c):
+    """Attendance rows remember the bucket they were counted in.
+
+    v4's triggers looked the student's department/year up again on every
+    UPDATE and DELETE, so a student who changed group, or whose account
+    arrived after their marks, was subtracted from a different bucket
+    than they were added to. Rows now carry department/year, and changes
+    to users move the student's counts between buckets.
+    """
+    import rollups
+
+    add_column(c, 'attendance', 'department', 'TEXT')
+    add_column(c, 'attendance', 'year', 'TEXT')
+    for name in ('attendance_rollup_insert', 'attendance_rollup_update', 'attendance_rollup_delete'):
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    triggers = {
+        'attendance_rollup_insert': ('AFTER INSERT ON attendance', _attendance_regroup('id = NEW.id')[1:]),
+        'attendance_rollup_update': ('AFTER UPDATE OF student_id, date, status ON attendance',
+                                     [_attendance_stored_delta('OLD', -1)] + _attendance_regroup('id = NEW.id')[1:]),
+        'attendance_rollup_delete': ('AFTER DELETE ON attendance', [_attendance_stored_delta('OLD', -1)]),
+        'attendance_regroup_insert': ('AFTER INSERT ON users', _attendance_regroup('student_id = NEW.student_id')),
+        'attendance_regroup_update': ('AFTER UPDATE OF role, student_id, department, year ON users',
+                                      _attendance_regroup('student_id IN (OLD.student_id, NEW.student_id)')),
+        'attendance_regroup_delete': ('AFTER DELETE ON users', _attendance_regroup('student_id = OLD.student_id')),
+    }
+    for name, (event, statements) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {' '.join(statements)} END")
+
+    # Stamps every existing row with its bucket and recounts
+    rollups.rebuild(c)
+
+
+# (version, description, function) -- append only, never edit a released migration
+MIGRATIONS = [
+    (1, 'baseline schema', baseline_schema),
+    (2, 'deduplicate attendance and enforce (student_id, date) uniqueness', unique_attendance_per_day),
+    (3, 'indexes for dashboard and listing queries', hot_query_indexes),
+    (4, 'trigger-maintained attendance and OD rollups', summary_rollups),
+    (5, 'legacy import checkpoints', import_checkpoints),
+    (6, 'attendance write log state', write_log_state),
+    (7, 'indexes for report queries', report_indexes),
+    (8, 'full-text search over OD requests', od_full_text_search),
+    (9, 'attendance rows keep their rollup bucket', attendance_rollup_groups),
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration, each in its own transaction"""
+    current = schema_version(conn)
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"🗄️  Migrated database to v{version}: {description}")
+
+
+def seed_defaults(conn):
+    """Default admin account and sample extracurricular activities; existing rows are kept"""
+    c = conn.cursor()
+    
+    # Insert default admin user
+    try:
+        c.execute("INSERT INTO users (username, password, role, name) VALUES (?, ?, ?, ?)",
+                  ('admin', generate_password_hash('admin123'), 'admin', 'System Administrator'))
+    except:
+        pass
+    
+    # Insert sample extracurricular activities
+    activities = [
+        ('Inter-College Sports Tournament', 'sports', 'Basketball, Cricket, Football competitions'),
+        ('National Level Hackathon', 'hackathon', '24-hour coding competition'),
+        ('Cultural Fest', 'cultural', 'Music, Dance, Drama competitions'),
+        ('Technical Symposium', 'technical', 'Paper presentation, Project expo'),
+        ('Workshop on AI/ML', 'workshop', 'Hands-on training session'),
+        ('Sports Practice', 'sports', 'Regular team practice sessions'),
+        ('Robotics Competition', 'technical', 'Inter-department robotics challenge'),
+        ('Debate Competition', 'cultural', 'Inter-college debate championship'),
+        ('Code Debugging Contest', 'technical', 'Debugging competition'),
+        ('Athletics Meet', 'sports', 'Track and field events')
+    ]
+    
+    for activity in activities:
+        try:
+            c.execute("INSERT INTO activities (name, type, description) VALUES (?, ?, ?)", activity)
+        except:
+            pass
+    
+    conn.commit()
+
+
+# Query shapes used by the dashboards and listings, with sample parameters
+HOT_QUERIES = {
+    'student today status': ("SELECT status FROM attendance WHERE student_id = ? AND date = ?", ('23IT56', '2025-11-01')),
+    'student od stats': ("SELECT status, COUNT(*) FROM od_requests WHERE student_id = ? GROUP BY status", ('23IT56',)),
+    'student recent od': ("SELECT activity_name, event_date, status FROM od_requests WHERE student_id = ? "
+                          "ORDER BY created_at DESC LIMIT 3", ('23IT56',)),
+    'admin total students': ("SELECT COUNT(*) FROM users WHERE role = 'student'", ()),
+    'admin today attendance': ("SELECT COUNT(*) FROM attendance WHERE date = ?", ('2025-11-01',)),
+    'admin pending od': ("SELECT COUNT(*) FROM od_requests WHERE status = 'pending'", ()),
+    'admin od breakdown': ("SELECT status, COUNT(*) FROM od_requests GROUP BY status", ()),
+    'admin recent od': ("SELECT id FROM od_requests ORDER BY created_at DESC LIMIT 5", ()),
+    'admin od by status': ("SELECT id FROM od_requests WHERE status = ? ORDER BY created_at DESC", ('pending',)),
+    'student od page': ("SELECT id, created_at FROM od_requests WHERE student_id = ? AND (created_at, id) < (?, ?) "
+                        "ORDER BY created_at DESC, id DESC LIMIT ?", ('23IT56', '2025-11-01 00:00:00', 10, 51)),
+    'admin od page': ("SELECT id, created_at FROM od_requests WHERE status = ? AND (created_at, id) < (?, ?) "
+                      "ORDER BY created_at DESC, id DESC LIMIT ?", ('pending', '2025-11-01 00:00:00', 10, 51)),
+    'ocr claim': ("SELECT id FROM ocr_jobs WHERE status = 'queued' ORDER BY id LIMIT 1", ()),
+}
+
+
+def check_query_plans(conn):
+    """EXPLAIN QUERY PLAN for each hot query; returns the names that scan a table or sort"""
+    offenders = []
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        # 'SCAN t USING ... INDEX' walks an index; a bare 'SCAN t' or a temp b-tree does not
+        bad = any((step.startswith('SCAN') and 'INDEX' not in step) or 'TEMP B-TREE' in step for step in plan)
+        if bad:
+            offenders.append(name)
+        print(f"{'❌' if bad else '✅'} {name}")
+        for step in plan:
+            print(f"     {step}")
+    return offenders
+
+
+if __name__ == '__main__':
+    conn = db.connect()
+    migrate(conn)
+    if '--check-plans' in sys.argv:
+        sys.exit(1 if check_query_plans(conn) else 0)
+    print(f"Database at schema v{schema_version(conn)}")
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from time import perf_counter
+
+from PIL import Image
+import pytesseract
+import pdf2image
+
+# Anything that changes OCR output must be part of ocr_settings() so cached text is not reused
+PDF_DPI = 200
+TESSERACT_LANG = 'eng'
+TESSERACT_CONFIG = ''
+
+
+@lru_cache(maxsize=1)
+def tesseract_version():
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return 'unknown'
+
+
+def ocr_settings():
+    return f"tesseract={tesseract_version()};lang={TESSERACT_LANG};config={TESSERACT_CONFIG};dpi={PDF_DPI}"
+
+
+def count_pdf_pages(file_path):
+    return pdf2image.pdfinfo_from_path(file_path)['Pages']
+
+
+def ocr_page_timed(file_path, file_type, page=1):
+    """OCR a single page; returns (text, {'ocr_render': s, 'tesseract': s}).
+
+    PDFs are rendered one page at a time. Runs in OCR worker processes, so
+    the timings travel back with the text for the caller to record.
+    """
+    start = perf_counter()
+    if file_type == 'pdf':
+        image = pdf2image.convert_from_path(file_path, dpi=PDF_DPI, first_page=page, last_page=page)[0]
+    else:
+        image = Image.open(file_path)
+    # Closed straight away so long-lived pool workers don't collect open file handles
+    with image:
+        rendered = perf_counter()
+        text = pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG)
+    return text, {'ocr_render': rendered - start, 'tesseract': perf_counter() - rendered}
+
@@ -0,0 +1,95 @@
+import os
+import time
+import hashlib
+
+import metrics
+from ocr import ocr_settings
+from od_verification import verify_od_content, VERIFICATION_RULES_VERSION
+
+OCR_CACHE_MAX_BYTES = int(os.environ.get('OCR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+OCR_CACHE_MAX_AGE_DAYS = float(os.environ.get('OCR_CACHE_MAX_AGE_DAYS', 180))
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def cache_key(content_hash):
+    """SHA-256 of the document plus the OCR engine version and settings"""
+    return hashlib.sha256(f"{content_hash}|{ocr_settings()}".encode()).hexdigest()
+
+
+def lookup(c, content_hash, count=True):
+    """Cached (ocr_text, is_valid, message, detected_activity) or None.
+
+    Counts the hit or miss unless count is False. A verdict computed under older verification
+    rules is re-scored from the cached text and written back.
+    """
+    key = cache_key(content_hash)
+    c.execute('''SELECT ocr_text, is_valid, verification_message, detected_activity, rules_version
+                 FROM ocr_cache WHERE cache_key = ?''', (key,))
+    row = c.fetchone()
+    if row is None:
+        if count:
+            c.execute("UPDATE ocr_cache_stats SET value = value + 1 WHERE name = 'misses'")
+        return None
+
+    ocr_text, is_valid, message, detected_activity, rules_version = row
+    if rules_version != VERIFICATION_RULES_VERSION:
+        with metrics.timed('verification'):
+            is_valid, message, detected_activity = verify_od_content(ocr_text)
+        c.execute('''UPDATE ocr_cache SET is_valid = ?, verification_message = ?, detected_activity = ?,
+                            rules_version = ? WHERE cache_key = ?''',
+                  (is_valid, message, detected_activity, VERIFICATION_RULES_VERSION, key))
+    c.execute("UPDATE ocr_cache SET last_used_at = ? WHERE cache_key = ?", (time.time(), key))
+    if count:
+        c.execute("UPDATE ocr_cache_stats SET value = value + 1 WHERE name = 'hits'")
+    return ocr_text, bool(is_valid), message, detected_activity
+
+
+def store(c, content_hash, ocr_text, is_valid, message, detected_activity):
+    now = time.time()
+    c.execute('''INSERT OR REPLACE INTO ocr_cache
+                 (cache_key, content_hash, ocr_text, is_valid, verification_message, detected_activity,
+                  rules_version, size_bytes, created_at, last_used_at)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+              (cache_key(content_hash), content_hash, ocr_text, is_valid, message, detected_activity,
+               VERIFICATION_RULES_VERSION, len(ocr_text.encode()), now, now))
+    evict(c, now)
+
+
+def evict(c, now=None):
+    """Drop entries older than the max age, then least recently used ones over the size budget"""
+    now = now or time.time()
+    c.execute("DELETE FROM ocr_cache WHERE created_at < ?", (now - OCR_CACHE_MAX_AGE_DAYS * 86400,))
+    c.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_cache")
+    excess = c.fetchone()[0] - OCR_CACHE_MAX_BYTES
+    if excess <= 0:
+        return
+
+    doomed = []
+    for key, size in c.connection.execute("SELECT cache_key, size_bytes FROM ocr_cache ORDER BY last_used_at"):
+        if excess <= 0:
+            break
+        doomed.append((key,))
+        excess -= size
+    c.executemany("DELETE FROM ocr_cache WHERE cache_key = ?", doomed)
+
+
+def stats(c):
+    c.execute("SELECT name, value FROM ocr_cache_stats")
+    counters = dict(c.fetchall())
+    c.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM ocr_cache")
+    entries, size_bytes = c.fetchone()
+    hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        'entries': entries,
+        'size_bytes': size_bytes
+    }
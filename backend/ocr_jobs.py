@@ -0,0 +1,172 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr import count_pdf_pages, ocr_page_timed
+from od_verification import verify_od_content
+import ocr_cache
+import db
+import metrics
+
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', os.cpu_count() or 1))
+# Jobs processed at once; each fans its pages out over the worker pool
+OCR_CONCURRENT_JOBS = int(os.environ.get('OCR_CONCURRENT_JOBS', 2))
+OCR_POLL_INTERVAL = float(os.environ.get('OCR_POLL_INTERVAL', 5))
+
+
+def enqueue(c, od_request_id, file_path, file_type, content_hash=None):
+    """Queue OCR for an OD request inside the caller's transaction"""
+    c.execute("INSERT INTO ocr_jobs (od_request_id, file_path, file_type, content_hash) VALUES (?, ?, ?, ?)",
+              (od_request_id, file_path, file_type, content_hash))
+    return c.lastrowid
+
+
+def requeue_interrupted(db_path=db.DATABASE):
+    conn = db.connect(db_path)
+    conn.execute("UPDATE ocr_jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+    conn.commit()
+    conn.close()
+
+
+def job_to_dict(job):
+    return {
+        'id': job[0],
+        'od_request_id': job[1],
+        'status': job[2],
+        'pages': job[3],
+        'verification': {
+            'is_valid': bool(job[10]),
+            'message': job[4],
+            'detected_activity': job[5]
+        },
+        'error': job[6],
+        'created_at': job[7],
+        'started_at': job[8],
+        'finished_at': job[9]
+    }
+
+
+def get_job(c, job_id):
+    c.execute('''SELECT j.id, j.od_request_id, j.status, j.pages, j.verification_message,
+                        j.detected_activity, j.error, j.created_at, j.started_at, j.finished_at,
+                        r.verified_by_ocr, r.student_id
+                 FROM ocr_jobs j JOIN od_requests r ON r.id = j.od_request_id
+                 WHERE j.id = ?''', (job_id,))
+    return c.fetchone()
+
+
+class OCRJobQueue:
+    """SQLite-backed OCR queue drained by background dispatcher threads.
+
+    Uploads insert a 'queued' row; dispatchers claim the oldest one, OCR its
+    pages in parallel on a process pool and write ocr_text/verified_by_ocr
+    back to od_requests. Jobs left 'running' by a crash are re-queued on start.
+    """
+
+    def __init__(self, db_path=db.DATABASE, workers=OCR_WORKERS, concurrent_jobs=OCR_CONCURRENT_JOBS):
+        self.db_path = db_path
+        self.workers = workers
+        self.concurrent_jobs = concurrent_jobs
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._claim_lock = threading.Lock()
+        self._threads = []
+        self._executor = None
+
+    def start(self, recover=True):
+        """Start the dispatchers; recover re-queues jobs a crash left 'running'.
+
+        Pass recover=False when several processes share the queue, and call
+        requeue_interrupted() once before any of them start.
+        """
+        if recover:
+            requeue_interrupted(self.db_path)
+
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        for _ in range(self.concurrent_jobs):
+            thread = threading.Thread(target=self._dispatch, daemon=True, name='ocr-dispatcher')
+            thread.start()
+            self._threads.append(thread)
+        print(f"📄 OCR queue started ({self.workers} worker process(es))")
+
+    def notify(self):
+        """Wake a dispatcher after a job has been committed"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    def queue_depth(self):
+        with db.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM ocr_jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def _claim(self, conn):
+        with self._claim_lock:
+            job = conn.execute('''SELECT id, od_request_id, file_path, file_type, content_hash FROM ocr_jobs
+                                  WHERE status = 'queued' ORDER BY id LIMIT 1''').fetchone()
+            if job is None:
+                return None
+            # The status check keeps two processes sharing the database from claiming the same job
+            claimed = conn.execute('''UPDATE ocr_jobs SET status = 'running', started_at = CURRENT_TIMESTAMP
+                                      WHERE id = ? AND status = ?''', (job[0], 'queued')).rowcount
+            if claimed:
+                conn.execute("UPDATE od_requests SET ocr_status = 'running' WHERE id = ?", (job[1],))
+            conn.commit()
+            return job if claimed else None
+
+    def _dispatch(self):
+        # Each dispatcher keeps its own connection for its lifetime
+        conn = db.connect(self.db_path)
+        while not self._stopping.is_set():
+            job = self._claim(conn)
+            if job is None:
+                self._wakeup.wait(OCR_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._process(conn, *job)
+        conn.close()
+
+    def _process(self, conn, job_id, od_request_id, file_path, file_type, content_hash):
+        try:
+            content_hash = content_hash or ocr_cache.hash_file(file_path)
+            # An identical document may have been OCR'd while this job was queued;
+            # the upload already counted this document's hit or miss
+            cached = ocr_cache.lookup(conn.cursor(), content_hash, count=False)
+            conn.commit()  # don't hold the write lock while OCR runs
+            if cached:
+                pages = None
+                text, is_valid, verification_message, detected_activity = cached
+            else:
+                pages = count_pdf_pages(file_path) if file_type == 'pdf' else 1
+                futures = [self._executor.submit(ocr_page_timed, file_path, file_type, page)
+                           for page in range(1, pages + 1)]
+                results = [future.result() for future in futures]
+                text = ''.join(page_text for page_text, _ in results).strip()
+                for _, timings in results:
+                    for stage, seconds in timings.items():
+                        metrics.observe_stage(stage, seconds)
+        except Exception as e:
+            conn.execute('''UPDATE ocr_jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP
+                            WHERE id = ?''', (str(e), job_id))
+            conn.execute('''UPDATE od_requests SET ocr_status = 'failed', ocr_text = ?
+                            WHERE id = ?''', (f"OCR Error: {str(e)}", od_request_id))
+            conn.commit()
+            return
+
+        if not cached:
+            with metrics.timed('verification'):
+                is_valid, verification_message, detected_activity = verify_od_content(text)
+            ocr_cache.store(conn.cursor(), content_hash, text, is_valid, verification_message, detected_activity)
+        conn.execute('''UPDATE ocr_jobs SET status = 'done', pages = ?, verification_message = ?,
+                               detected_activity = ?, finished_at = CURRENT_TIMESTAMP
+                        WHERE id = ?''', (pages, verification_message, detected_activity, job_id))
+        conn.execute('''UPDATE od_requests SET ocr_status = 'done', ocr_text = ?, verified_by_ocr = ?
+                        WHERE id = ?''', (text, is_valid, od_request_id))
+        conn.commit()
@@ -0,0 +1,118 @@
+"""Full-text search over OD requests, backed by an SQLite FTS5 index.
+
+od_search (migration v8) is an external-content FTS5 table: it stores only
+the inverted index and reads column values back from od_requests by rowid.
+Triggers keep it in step with every insert, delete and update of an indexed
+column, inside the same transaction as the write.
+
+Run from backend/:
+    python od_search.py --rebuild    rebuild the index from od_requests
+    python od_search.py --optimize   merge index segments after a bulk import
+    python od_search.py QUERY...     search from the command line
+"""
+import sys
+
+import db
+
+# Indexed od_requests columns, in FTS column order
+COLUMNS = ['activity_name', 'organized_by', 'coordinator_name', 'coordinator_contact', 'event_venue', 'ocr_text']
+# bm25 weight per column: a hit in a short, typed-in field says more than one in a page of OCR text
+WEIGHTS = [4.0, 3.0, 3.0, 3.0, 2.0, 1.0]
+
+SNIPPET_OPEN, SNIPPET_CLOSE, SNIPPET_ELLIPSIS = '[', ']', '…'
+SNIPPET_TOKENS = 12
+
+RESULT_COLUMNS = ['id', 'student_id', 'student_name', 'activity_type', 'activity_name', 'event_date',
+                  'organized_by', 'coordinator_name', 'status', 'verified_by_ocr', 'created_at']
+
+
+def create(c):
+    """FTS table, sync triggers and initial build (migration v8)"""
+    columns = ', '.join(COLUMNS)
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS od_search USING fts5
+                  ({columns}, content='od_requests', content_rowid='id',
+                   tokenize='unicode61 remove_diacritics 2', prefix='2 3')''')
+
+    new_values = ', '.join(f'NEW.{column}' for column in COLUMNS)
+    old_values = ', '.join(f'OLD.{column}' for column in COLUMNS)
+    insert = f"INSERT INTO od_search (rowid, {columns}) VALUES (NEW.id, {new_values});"
+    delete = f"INSERT INTO od_search (od_search, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});"
+    triggers = {
+        'od_search_insert': ('AFTER INSERT ON od_requests', [insert]),
+        # Status and review updates leave the index alone
+        'od_search_update': (f'AFTER UPDATE OF {columns} ON od_requests', [delete, insert]),
+        'od_search_delete': ('AFTER DELETE ON od_requests', [delete]),
+    }
+    for name, (event, statements) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {' '.join(statements)} END")
+
+    rebuild(c)
+
+
+def rebuild(c):
+    c.execute("INSERT INTO od_search (od_search) VALUES ('rebuild')")
+
+
+def optimize(c):
+    c.execute("INSERT INTO od_search (od_search) VALUES ('optimize')")
+
+
+def match_expression(text):
+    """FTS5 MATCH expression for free text typed by a user.
+
+    Every term must match; each is quoted so punctuation in phone numbers,
+    emails or names is tokenized rather than parsed as query syntax. A
+    trailing * keeps its prefix meaning. Raises ValueError when no term is left.
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith('*')
+        term = term.rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    if not terms:
+        raise ValueError('Search query is empty')
+    return ' '.join(terms)
+
+
+def search(c, text, limit, offset=0, status=None):
+    """Best-ranked matches first; returns (rows, has_more).
+
+    Each row is RESULT_COLUMNS followed by the snippet and the bm25 score
+    (lower is better). Ranking scores every match, but only the rows of
+    the requested page are joined back to od_requests and get a snippet.
+    """
+    weights = ', '.join(str(weight) for weight in WEIGHTS)
+    status_join, status_where = ('JOIN od_requests ON od_requests.id = od_search.rowid',
+                                 'AND od_requests.status = :status') if status else ('', '')
+    columns = ', '.join(f'od.{column}' for column in RESULT_COLUMNS)
+    # CROSS JOIN keeps the page as the outer loop, so the second MATCH is a rowid lookup
+    sql = f'''WITH ranked AS (SELECT od_search.rowid AS id, bm25(od_search, {weights}) AS score
+                              FROM od_search {status_join}
+                              WHERE od_search MATCH :match {status_where}
+                              ORDER BY score, id DESC LIMIT :limit OFFSET :offset)
+              SELECT {columns}, snippet(od_search, -1, :open, :close, :ellipsis, :tokens), ranked.score
+              FROM ranked CROSS JOIN od_search CROSS JOIN od_requests od
+              WHERE od_search MATCH :match AND od_search.rowid = ranked.id AND od.id = ranked.id
+              ORDER BY ranked.score, ranked.id DESC'''
+    c.execute(sql, {'match': match_expression(text), 'status': status, 'limit': limit + 1, 'offset': offset,
+                    'open': SNIPPET_OPEN, 'close': SNIPPET_CLOSE, 'ellipsis': SNIPPET_ELLIPSIS,
+                    'tokens': SNIPPET_TOKENS})
+    rows = c.fetchall()
+    return rows[:limit], len(rows) > limit
+
+
+if __name__ == '__main__':
+    conn = db.connect()
+    if '--rebuild' in sys.argv or '--optimize' in sys.argv:
+        (rebuild if '--rebuild' in sys.argv else optimize)(conn.cursor())
+        conn.commit()
+        print(f"✅ Search index {'rebuilt' if '--rebuild' in sys.argv else 'optimized'}")
+    elif len(sys.argv) > 1:
+        rows, has_more = search(conn.cursor(), ' '.join(sys.argv[1:]), 20)
+        for row in rows:
+            print(f"#{row[0]} {row[1]} {row[4]} ({row[8]})  {row[-2]}")
+        print(f"{len(rows)} result(s){', more available' if has_more else ''}")
+    else:
+        sys.exit('usage: python od_search.py --rebuild | --optimize | QUERY...')
+    conn.close()
@@ -0,0 +1,163 @@
+"""OD document verification: keyword scoring of OCR text in a single pass.
+
+The text is folded with one translate table, split into words once, and
+each distinct word is looked up in a precompiled table of every keyword
+and its plurals.
+Keywords therefore only match whole words, so 'od' no longer fires inside
+'good' or 'method'. Characters tesseract commonly confuses are folded
+together in keywords and text alike (o/0, i/l/1/|, s/5, 'rn' for 'm'),
+and the words of a phrase may be separated by any whitespace or hyphens.
+
+Rescore stored OCR text after changing the rules (no OCR is re-run), from backend/:
+    python od_verification.py rescore [--batch-size 500]
+"""
+import re
+import sys
+import string
+
+import db
+
+# Bump when the rules change; cached verdicts are then recomputed from cached text
+VERIFICATION_RULES_VERSION = 3
+MIN_TOTAL_SCORE = 3
+
+# Keywords for extracurricular activities; ties go to the earlier category
+ACTIVITY_KEYWORDS = {
+    'sports': ['sports', 'tournament', 'match', 'game', 'practice', 'coach', 'team', 'athlete'],
+    'technical': ['hackathon', 'workshop', 'symposium', 'technical', 'coding', 'programming', 'project'],
+    'cultural': ['cultural', 'fest', 'music', 'dance', 'drama', 'debate', 'competition'],
+    'general': ['certificate', 'participation', 'event', 'activity', 'program', 'college', 'institute']
+}
+
+# Other spellings that count as the keyword they map to
+KEYWORD_SPELLINGS = {'programme': 'program'}
+
+# Verification keywords
+VERIFICATION_KEYWORDS = [
+    'on duty', 'od', 'permission', 'authorized', 'approved', 'coordinator',
+    'faculty', 'head', 'department', 'signature', 'stamp', 'official'
+]
+
+# Characters OCR output commonly swaps are folded to one form, in keywords and text
+# alike; punctuation becomes a word break
+_FOLD = str.maketrans({**{char: ' ' for char in string.punctuation if char != '|'},
+                       '0': 'o', '5': 's', '1': 'i', 'l': 'i', '|': 'i'})
+# Phrases are joined into one word; any whitespace (or hyphens, folded to spaces) may separate their words
+_PHRASES = [(keyword.split()[-1], re.compile(r'\b' + r'\s+'.join(keyword.split()) + r'\b'), keyword.replace(' ', ''))
+            for keyword in VERIFICATION_KEYWORDS if ' ' in keyword]
+
+
+def _fold(text):
+    return text.lower().translate(_FOLD).replace('rn', 'm')
+
+
+def _build_lookup():
+    """Folded word (and its plurals) -> (category, keyword)"""
+    lookup = {}
+    groups = [(category, keyword) for category, keywords in ACTIVITY_KEYWORDS.items() for keyword in keywords]
+    groups += [('verification', keyword) for keyword in VERIFICATION_KEYWORDS]
+    spellings = [(keyword, keyword) for _, keyword in groups]
+    spellings += [(spelling, keyword) for spelling, keyword in KEYWORD_SPELLINGS.items()]
+    category_of = {keyword: category for category, keyword in groups}
+    for spelling, keyword in spellings:
+        word = _fold(spelling.replace(' ', ''))
+        for form in (word, word + 's', word + 'es'):
+            lookup.setdefault(form, (category_of[keyword], keyword))
+    return lookup
+
+
+_LOOKUP = _build_lookup()
+
+
+def score_od_content(text):
+    """Per-category breakdown: distinct keywords found in each category and the total score"""
+    text = _fold(text)
+    for last_word, pattern, joined in _PHRASES:
+        if last_word in text:
+            text = pattern.sub(joined, text)
+    found = {_LOOKUP[word] for word in set(text.split()) if word in _LOOKUP}
+    matched = {category: [] for category in [*ACTIVITY_KEYWORDS, 'verification']}
+    for category, keyword in found:
+        matched[category].append(keyword)
+    scores = {category: len(keywords) for category, keywords in matched.items()}
+    return {'scores': scores, 'matched': matched, 'total': sum(scores.values())}
+
+
+def verify_od_content(text):
+    """Enhanced OD verification for extracurricular activities"""
+    breakdown = score_od_content(text)
+    category_scores = {category: breakdown['scores'][category] for category in ACTIVITY_KEYWORDS}
+
+    # Determine activity type
+    detected_activity = max(category_scores, key=category_scores.get)
+
+    if breakdown['total'] >= MIN_TOTAL_SCORE:
+        return True, f"Valid {detected_activity.capitalize()} activity detected", detected_activity
+    else:
+        return False, "Insufficient evidence of valid extracurricular activity", None
+
+
+def rescore_od_requests(conn, batch_size=500):
+    """Recompute verified_by_ocr for every OD request from its stored OCR text.
+
+    Walks od_requests by id in batches, one transaction each, and only
+    writes rows whose verdict changed. The verification message and detected
+    activity of the requests' finished OCR jobs are brought up to date in the
+    same transaction. Returns (rows checked, rows changed).
+    """
+    checked = changed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''SELECT id, ocr_text, verified_by_ocr FROM od_requests
+                               WHERE id > ? AND ocr_status = 'done' AND ocr_text IS NOT NULL
+                               ORDER BY id LIMIT ?''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        updates, job_updates = [], []
+        for request_id, ocr_text, verified in rows:
+            if ocr_text.startswith('OCR Error:'):
+                is_valid = False
+            else:
+                is_valid, message, detected_activity = verify_od_content(ocr_text)
+                job_updates.append((message, detected_activity, request_id, message, detected_activity))
+            if bool(verified) != is_valid:
+                updates.append((is_valid, request_id))
+        conn.executemany("UPDATE od_requests SET verified_by_ocr = ? WHERE id = ?", updates)
+        conn.executemany('''UPDATE ocr_jobs SET verification_message = ?, detected_activity = ?
+                            WHERE od_request_id = ? AND status = 'done'
+                            AND (verification_message IS NOT ? OR detected_activity IS NOT ?)''', job_updates)
+        conn.commit()
+        checked += len(rows)
+        changed += len(updates)
+        last_id = rows[-1][0]
+    return checked, changed
+
+
+def rescore_ocr_cache(conn, batch_size=500):
+    """Bring cached verdicts computed under older rules up to date; returns rows rescored"""
+    rescored = 0
+    while True:
+        rows = conn.execute('''SELECT cache_key, ocr_text FROM ocr_cache
+                               WHERE rules_version IS NOT ? LIMIT ?''',
+                            (VERIFICATION_RULES_VERSION, batch_size)).fetchall()
+        if not rows:
+            break
+        conn.executemany('''UPDATE ocr_cache SET is_valid = ?, verification_message = ?, detected_activity = ?,
+                                   rules_version = ? WHERE cache_key = ?''',
+                         [(*verify_od_content(ocr_text), VERIFICATION_RULES_VERSION, cache_key)
+                          for cache_key, ocr_text in rows])
+        conn.commit()
+        rescored += len(rows)
+    return rescored
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rescore':
+        sys.exit('usage: python od_verification.py rescore [--batch-size N]')
+    batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1]) if '--batch-size' in sys.argv else 500
+    conn = db.connect()
+    checked, changed = rescore_od_requests(conn, batch_size)
+    cached = rescore_ocr_cache(conn, batch_size)
+    conn.close()
+    print(f"✅ Rescored {checked} OD request(s), {changed} verdict(s) changed; "
+          f"{cached} cached verdict(s) updated to rules v{VERIFICATION_RULES_VERSION}")
@@ -0,0 +1,71 @@
+import json
+import base64
+import hashlib
+
+from flask import request, jsonify
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor string; raises ValueError when malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def keyset_page(c, columns, table, where, params, limit, cursor=None):
+    """One page ordered by (created_at, id) DESC, seeking past the cursor.
+
+    Fetches limit + 1 rows to learn whether another page exists. Returns
+    (rows, next_cursor); columns must include created_at and id.
+    """
+    conditions = list(where)
+    params = list(params)
+    if cursor:
+        conditions.append('(created_at, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    c.execute(sql, params + [limit + 1])
+    rows = c.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+    return rows, next_cursor
+
+
+def etag_json(payload):
+    """jsonify(payload) with an ETag; 304 when the client already has this page"""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    etag = hashlib.sha256(body.encode()).hexdigest()[:32]
+    if etag in request.if_none_match:
+        response = jsonify()
+        response.status_code = 304
+        response.set_data(b'')
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,100 @@
+"""Password hashing and verification off the request threads.
+
+scrypt / pbkdf2 are slow on purpose, so a burst of logins could hold
+every server thread. PasswordHasher runs them on PASSWORD_HASH_WORKERS
+dedicated threads behind a bounded queue, and turns logins away with
+PasswordHashingBusy (a 503) once PASSWORD_HASH_QUEUE_SIZE are waiting.
+Stored hashes made with other parameters than PASSWORD_HASH_METHOD are
+rehashed on the user's next successful login.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+import metrics
+
+# werkzeug method string for new and upgraded hashes, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000';
+# stored hashes made with other parameters are rehashed on the user's next login
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+# hashlib's scrypt and pbkdf2 release the GIL, so threads hash in parallel
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+# Logins allowed to wait for a hashing thread before new ones are turned away
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 64))
+PASSWORD_HASH_SUBMIT_TIMEOUT = float(os.environ.get('PASSWORD_HASH_SUBMIT_TIMEOUT', 5))
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def canonical_method(method):
+    """werkzeug method string with its defaults filled in, as it appears in a stored hash"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class PasswordHasher:
+    """Runs the deliberately slow KDF on a few dedicated threads.
+
+    A login burst then queues here instead of occupying every server thread,
+    so other routes keep being served. Admission works like InferenceService:
+    a bounded set of slots, and PasswordHashingBusy when none frees up in time.
+    Time spent waiting for a thread is recorded as the password_hash_wait stage.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE,
+                 method=PASSWORD_HASH_METHOD):
+        self.method = method
+        self.canonical = canonical_method(method)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=PASSWORD_HASH_SUBMIT_TIMEOUT):
+            raise PasswordHashingBusy('Too many logins in progress, please retry')
+        with self._lock:
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            return fn(*args), started, time.perf_counter()
+
+        try:
+            result, started, finished = self._executor.submit(task).result()
+            # Recorded here, on the request thread, so the stages reach its Server-Timing header too
+            metrics.observe_stage('password_hash_wait', started - submitted)
+            metrics.observe_stage('password_hash', finished - started)
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return canonical_method(stored_hash.split('$', 1)[0]) != self.canonical
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,108 @@
+"""Cheap decode and face pre-filter in front of the DeepFace pipeline.
+
+Phone uploads are decoded at reduced size (libjpeg DCT scaling, so the
+full-size bitmap never exists) and an OpenCV Haar cascade looks for faces
+on a DETECT_MAX_SIDE grayscale copy. Frames without a face are rejected before any model runs;
+otherwise only the padded face regions go on to DeepFace for alignment
+and embedding.
+"""
+import io
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+import numpy as np
+
+# Uploads are decoded at the smallest 1/2, 1/4 or 1/8 scale whose longest side
+# stays at or above this; face crops are cut from that image
+WORK_MIN_SIDE = int(os.environ.get('FACE_WORK_MIN_SIDE', 1024))
+# Longest side of the grayscale copy the pre-filter detector scans
+DETECT_MAX_SIDE = int(os.environ.get('FACE_DETECT_MAX_SIDE', 480))
+# Padding around each detection, as a fraction of the box, so alignment has context
+FACE_MARGIN = 0.25
+MIN_FACE_PIXELS = 20
+CASCADE_FILE = 'haarcascade_frontalface_default.xml'
+
+
+@contextmanager
+def stage(timings, name):
+    """Add the wall time of the block to timings[name], in ms"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(timings.get(name, 0) + (perf_counter() - start) * 1000, 2)
+
+
+def _downscale(image, max_side):
+    import cv2
+    height, width = image.shape[:2]
+    factor = max_side / max(height, width)
+    if factor >= 1:
+        return image, 1.0
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), factor
+
+
+def decode(image_bytes, min_side=WORK_MIN_SIDE):
+    """Decode upload bytes to a BGR array at reduced size.
+
+    The header is read first to pick the reduction, then libjpeg decodes
+    straight to 1/2, 1/4 or 1/8 scale (IMREAD_REDUCED_*; other formats are
+    decoded whole and shrunk). Returns (image, scale) where scale maps
+    decoded pixels back to the original upload's pixels.
+    """
+    import cv2
+    from PIL import Image
+    try:
+        original_side = max(Image.open(io.BytesIO(image_bytes)).size)
+    except Exception:
+        raise ValueError('Could not decode image')
+    flag = cv2.IMREAD_COLOR
+    for reduction, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                    (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if original_side / reduction >= min_side:
+            flag = reduced_flag
+            break
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flag)
+    if image is None:
+        raise ValueError('Could not decode image')
+    return image, original_side / max(image.shape[:2])
+
+
+class FacePrefilter:
+    """Low-resolution Haar cascade that finds candidate face boxes"""
+
+    def __init__(self, max_side=DETECT_MAX_SIDE):
+        self.max_side = max_side
+        self._local = threading.local()
+
+    @property
+    def cascade(self):
+        # A CascadeClassifier must not be shared by threads running detection at once
+        # (in-process inference serves several requests at a time), so each thread loads its own
+        cascade = getattr(self._local, 'cascade', None)
+        if cascade is None:
+            import cv2
+            cascade = self._local.cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, CASCADE_FILE))
+        return cascade
+
+    def detect(self, image):
+        """(x, y, w, h) boxes in image coordinates, largest first"""
+        import cv2
+        gray, factor = _downscale(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), self.max_side)
+        boxes = self.cascade.detectMultiScale(cv2.equalizeHist(gray), scaleFactor=1.15, minNeighbors=5,
+                                              minSize=(MIN_FACE_PIXELS, MIN_FACE_PIXELS))
+        boxes = [tuple(int(round(v / factor)) for v in box) for box in boxes]
+        return sorted(boxes, key=lambda box: box[2] * box[3], reverse=True)
+
+
+def crop(image, box, margin=FACE_MARGIN):
+    """Padded crop around box; returns (crop, (x_offset, y_offset))"""
+    x, y, w, h = box
+    pad_x, pad_y = int(w * margin), int(h * margin)
+    height, width = image.shape[:2]
+    left, top = max(0, x - pad_x), max(0, y - pad_y)
+    right, bottom = min(width, x + w + pad_x), min(height, y + h + pad_y)
+    return image[top:bottom, left:right], (left, top)
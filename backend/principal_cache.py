@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL', 300))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of resolved users for token_required.
+
+    Entries are keyed by (username, role claim) so a token minted for a
+    different role never reuses another principal. invalidate() drops every
+    entry for a username; it only reaches this process, so other workers
+    converge within the TTL.
+    """
+
+    def __init__(self, ttl=PRINCIPAL_CACHE_TTL, max_size=PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._keys_by_username = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._auth_count = 0
+        self._auth_seconds = 0.0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key, principal):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (time.monotonic() + self.ttl, dict(principal))
+            self._keys_by_username.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, username):
+        with self._lock:
+            for key in list(self._keys_by_username.get(username, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_username.clear()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_username.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_username[key[0]]
+
+    def record_auth(self, seconds):
+        with self._lock:
+            self._auth_count += 1
+            self._auth_seconds += seconds
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries),
+                'avg_auth_ms': round(self._auth_seconds * 1000 / self._auth_count, 3) if self._auth_count else 0.0
+            }
@@ -0,0 +1,421 @@
+import os
+import glob
+import ntpath
+import pickle
+import threading
+
+import numpy as np
+
+import preprocess
+import face_index
+import embedding_store
+from face_index import l2_normalize
+
+FACE_DATA_PATH = 'face_data.pkl'
+REGISTERED_FACES_DIR = 'registered_faces'
+MODEL_NAME = 'Facenet'
+DETECTOR_BACKEND = 'opencv'
+# DeepFace's cosine distance threshold for Facenet is 0.40, i.e. similarity >= 0.60
+MATCH_THRESHOLD = 0.60
+# Run the cheap decode + Haar pre-filter before DeepFace (see preprocess.py)
+FACE_PREFILTER = os.environ.get('FACE_PREFILTER', '1') == '1'
+
+
+class EmbeddingMatrix:
+    """Enrolled embeddings kept as one L2-normalised float32 matrix.
+
+    Row i belongs to ids[i] / names[i]. A student may own several rows
+    (e.g. one from face_data.pkl and one from the DeepFace cache).
+    """
+
+    def __init__(self, embeddings, ids, names, normalized=False):
+        if len(embeddings) != len(ids) or len(ids) != len(names):
+            raise ValueError('embeddings, ids and names must have the same length')
+        self.ids = list(ids)
+        self.names = list(names)
+        if len(self.ids):
+            # Already-normalised rows (e.g. a memory-mapped store) are used without copying
+            self.matrix = embeddings if normalized else l2_normalize(embeddings)
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def search(self, probes, k=1):
+        """Top-k cosine search for a batch of probes.
+
+        Returns (indices, scores), both shaped (n_probes, k) and sorted by
+        descending similarity.
+        """
+        probes = l2_normalize(probes)
+        n = len(self.ids)
+        if n == 0:
+            empty = np.empty((len(probes), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        scores = probes @ self.matrix.T
+        k = min(k, n)
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), scores.shape).copy()
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def add(self, embeddings, ids, names):
+        vectors = l2_normalize(embeddings)
+        self.matrix = vectors if len(self.ids) == 0 else np.vstack([self.matrix, vectors])
+        self.ids.extend(ids)
+        self.names.extend(names)
+
+    def remove(self, student_id):
+        keep = [i for i, sid in enumerate(self.ids) if sid != student_id]
+        removed = len(self.ids) - len(keep)
+        self.matrix = self.matrix[keep] if keep else np.empty((0, 0), dtype=np.float32)
+        self.ids = [self.ids[i] for i in keep]
+        self.names = [self.names[i] for i in keep]
+        return removed
+
+    def students(self):
+        """student_id -> name, in first-seen order"""
+        return dict(zip(self.ids, self.names))
+
+
+def load_legacy(face_data_path=FACE_DATA_PATH, faces_dir=REGISTERED_FACES_DIR, skip=()):
+    """(embeddings, ids, names) from face_data.pkl and the DeepFace Facenet caches, minus students in skip"""
+    embeddings, ids, names, id_to_name = [], [], [], {}
+    if os.path.exists(face_data_path):
+        with open(face_data_path, 'rb') as f:
+            data = pickle.load(f)
+        for encoding, student_id, name in zip(data['encodings'], data['ids'], data['names']):
+            id_to_name.setdefault(student_id, name)
+            if student_id not in skip:
+                embeddings.append(encoding)
+                ids.append(student_id)
+                names.append(name)
+
+    for cache_path in sorted(glob.glob(os.path.join(faces_dir, 'ds_model_facenet_*.pkl'))):
+        with open(cache_path, 'rb') as f:
+            representations = pickle.load(f)
+        for rep in representations:
+            # identities were written on Windows, e.g. 'registered_faces\\23IT56.jpg'
+            student_id = os.path.splitext(ntpath.basename(rep['identity']))[0]
+            if student_id in skip:
+                continue
+            embeddings.append(rep['embedding'])
+            ids.append(student_id)
+            names.append(id_to_name.get(student_id, student_id))
+    return np.asarray(embeddings, dtype=np.float32), ids, names
+
+
+def store_generation(store_path=None):
+    """(mtime, size, inode) of the embedding store, which every enrollment rewrites; None if there is none"""
+    try:
+        stat = os.stat(store_path or embedding_store.EMBEDDING_STORE_PATH)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def gallery_fingerprint(face_data_path=FACE_DATA_PATH, faces_dir=REGISTERED_FACES_DIR, store_path=None):
+    """face_index.fingerprint() of the files load_gallery reads; take it before loading"""
+    paths = [store_path or embedding_store.EMBEDDING_STORE_PATH, face_data_path]
+    paths += sorted(glob.glob(os.path.join(faces_dir, 'ds_model_facenet_*.pkl')))
+    return face_index.fingerprint(paths)
+
+
+def load_gallery(face_data_path=FACE_DATA_PATH, faces_dir=REGISTERED_FACES_DIR, store_path=None):
+    """Map the embedding store, adding face_data.pkl and the DeepFace caches until they are converted.
+
+    Once `python enrollment.py convert` has run, the store's matrix is used
+    in place (memory-mapped, already normalised) and no pickle is read.
+    Before that, students in the store (or removed through it) come from
+    the store only and the pickles supply everyone else.
+    """
+    store = embedding_store.open_store(store_path or embedding_store.EMBEDDING_STORE_PATH)
+    if store is not None and store.meta.get('legacy_converted'):
+        return EmbeddingMatrix(store.matrix, store.ids, store.names, normalized=True)
+
+    matrix, ids, names = np.empty((0, 0), dtype=np.float32), [], []
+    skip = set()
+    if store is not None:
+        matrix, ids, names = store.matrix, store.ids, store.names
+        skip = set(ids) | set(store.meta.get('removed', []))
+    embeddings, legacy_ids, legacy_names = load_legacy(face_data_path, faces_dir, skip)
+    if len(legacy_ids):
+        matrix = embeddings if len(ids) == 0 else np.vstack([matrix, embeddings])
+    return EmbeddingMatrix(matrix, ids + legacy_ids, names + legacy_names)
+
+
+def decode_image(image_bytes):
+    """Decode uploaded image bytes into a BGR array for DeepFace"""
+    import cv2
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('Could not decode image')
+    return image
+
+
+def as_image(image):
+    """Accept either raw upload bytes or an already decoded BGR array"""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return decode_image(bytes(image))
+    return image
+
+
+class FaceEmbedder:
+    """DeepFace detector + Facenet model; turns frames into embeddings.
+
+    With the pre-filter on (the default), uploads are decoded at reduced
+    size and DeepFace only sees the padded regions the cheap detector found.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, detector_backend=DETECTOR_BACKEND, prefilter=FACE_PREFILTER):
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self.prefilter = preprocess.FacePrefilter() if prefilter else None
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from deepface import DeepFace
+            self._model = DeepFace.build_model(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        """Build the model and detectors and run one dummy forward pass"""
+        from deepface.detectors import DetectorWrapper
+        DetectorWrapper.build_model(self.detector_backend)
+        if self.prefilter is not None:
+            self.prefilter.cascade
+        height, width = self.model.input_shape
+        self.model.model(np.zeros((1, height, width, 3), dtype=np.float32), training=False)
+
+    def _extract_faces(self, image):
+        from deepface import DeepFace
+        faces = DeepFace.extract_faces(img_path=image, detector_backend=self.detector_backend,
+                                       enforce_detection=False, align=True)
+        # With enforce_detection=False a frame without faces comes back whole at confidence 0
+        return [face for face in faces if face['confidence'] > 0]
+
+    def detect_faces(self, image, timings=None):
+        """Aligned face crops for every face in a frame.
+
+        Facial areas are in the uploaded image's pixels. Adds 'decode' and
+        'detect' times (ms) to timings when given.
+        """
+        timings = {} if timings is None else timings
+        scale = 1.0
+        with preprocess.stage(timings, 'decode'):
+            if isinstance(image, (bytes, bytearray, memoryview)):
+                if self.prefilter is None:
+                    image = decode_image(bytes(image))
+                else:
+                    image, scale = preprocess.decode(bytes(image))
+
+        with preprocess.stage(timings, 'detect'):
+            if self.prefilter is None:
+                return self._extract_faces(image)
+            faces = []
+            for box in self.prefilter.detect(image):
+                region, (left, top) = preprocess.crop(image, box)
+                found = self._extract_faces(region)
+                if not found:
+                    continue  # the cascade's false positive
+                face = max(found, key=lambda f: f['confidence'])
+                area = face['facial_area']
+                face['facial_area'] = {
+                    'x': int((area['x'] + left) * scale),
+                    'y': int((area['y'] + top) * scale),
+                    'w': int(area['w'] * scale),
+                    'h': int(area['h'] * scale)
+                }
+                faces.append(face)
+            return faces
+
+    def embed_faces(self, faces):
+        """Embed crops from detect_faces() in a single model forward pass"""
+        if not faces:
+            return np.empty((0, 0), dtype=np.float32)
+        from deepface.modules import preprocessing
+        model = self.model
+        target_size = model.input_shape
+        batch = []
+        for face in faces:
+            img = face['face'][:, :, ::-1]  # RGB -> BGR, as DeepFace.represent does
+            img = preprocessing.resize_image(img=img, target_size=(target_size[1], target_size[0]))
+            batch.append(preprocessing.normalize_input(img=img, normalization='base'))
+        return np.asarray(model.model(np.concatenate(batch), training=False), dtype=np.float32)
+
+    def embed(self, image):
+        """Embeddings for every face detected in a frame, and per-stage timings in ms"""
+        timings = {}
+        faces = self.detect_faces(image, timings)
+        with preprocess.stage(timings, 'embed'):
+            embeddings = self.embed_faces(faces)
+        return embeddings, timings
+
+    def detect_and_embed(self, images):
+        """Detect faces across several frames and embed all crops together.
+
+        Returns (frame_indexes, facial_areas, embeddings, errors, timings)
+        with one entry per face; frames that fail to decode are reported in
+        errors, and timings sums each stage over all frames.
+        """
+        faces, frame_indexes, errors = [], [], []
+        timings = {}
+        for frame_index, image in enumerate(images):
+            try:
+                detected = self.detect_faces(image, timings)
+            except ValueError as e:
+                errors.append({'frame': frame_index, 'error': str(e)})
+                continue
+            for face in detected:
+                faces.append(face)
+                frame_indexes.append(frame_index)
+        with preprocess.stage(timings, 'embed'):
+            embeddings = self.embed_faces(faces)
+        return frame_indexes, [face['facial_area'] for face in faces], embeddings, errors, timings
+
+
+class FaceRecognition:
+    def __init__(self, face_data_path=FACE_DATA_PATH, faces_dir=REGISTERED_FACES_DIR,
+                 threshold=MATCH_THRESHOLD, embedder=None, index_mode=None):
+        self.threshold = threshold
+        self.faces_dir = faces_dir
+        # Anything with embed() / detect_and_embed(), e.g. an InferenceService
+        self.embedder = embedder or FaceEmbedder()
+        self.face_data_path = face_data_path
+        self.index_mode = index_mode or face_index.FACE_INDEX_MODE
+        # The exact gallery is the source of truth; in ANN modes the index is derived from it
+        self.generation = store_generation()
+        source = gallery_fingerprint(face_data_path, faces_dir)
+        self.gallery = load_gallery(face_data_path, faces_dir)
+        self.index = face_index.build_index(self.gallery, source, self.index_mode)
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._refresh_students()
+        print(f"✅ Loaded {len(self.known_face_names)} registered faces "
+              f"({len(self.index)} embeddings, {self.index_mode} index)")
+
+    def reload(self):
+        """Rebuild the gallery and index from disk and swap them in; matching continues meanwhile"""
+        generation = store_generation()
+        source = gallery_fingerprint(self.face_data_path, self.faces_dir)
+        gallery = load_gallery(self.face_data_path, self.faces_dir)
+        index = face_index.build_index(gallery, source, self.index_mode)
+        with self._lock:
+            self.gallery, self.index = gallery, index
+            self.generation = generation
+            self._refresh_students()
+
+    def reload_if_changed(self):
+        """Reload if the embedding store changed since this process loaded it; returns True if it did.
+
+        Under gunicorn each worker holds its own gallery, and enrolling
+        through one worker only patches that worker's copy. Every enrollment
+        rewrites the store, so the other workers notice on their next match
+        at the cost of one stat() and reload from disk.
+        """
+        if store_generation() == self.generation:
+            return False
+        with self._reload_lock:
+            if store_generation() == self.generation:
+                return False  # another thread of this worker reloaded meanwhile
+            self.reload()
+        return True
+
+    def _refresh_students(self):
+        # One entry per student, in first-seen order
+        students = self.index.students()
+        self.known_face_ids = list(students)
+        self.known_face_names = list(students.values())
+
+    def add_student(self, student_id, name, embeddings):
+        """Add embeddings for one student to the live index (and persist an ANN index)"""
+        ids, names = [student_id] * len(embeddings), [name] * len(embeddings)
+        with self._lock:
+            if self.index is not self.gallery:
+                self.index.add(embeddings, ids, names)
+            self.gallery.add(embeddings, ids, names)
+            self._save_index()
+            self._refresh_students()
+            # The caller wrote the store first, so this process is now up to date with it
+            self.generation = store_generation()
+
+    def remove_student(self, student_id):
+        """Drop every embedding of a student; returns how many were removed"""
+        with self._lock:
+            removed = self.gallery.remove(student_id)
+            if self.index is not self.gallery:
+                self.index.remove(student_id)
+            self._save_index()
+            self._refresh_students()
+            self.generation = store_generation()
+        return removed
+
+    def _save_index(self):
+        # Callers have already written the embedding store, so the files now match the patched gallery
+        if self.index is not self.gallery:
+            self.index.save(face_index.FACE_INDEX_PATH, gallery_fingerprint(self.face_data_path, self.faces_dir))
+
+    def embed(self, image):
+        """(embeddings, timings) for every face in a frame (bytes or BGR array)"""
+        return self.embedder.embed(image)
+
+    def recognize_frames(self, images):
+        """Detect, embed and match every face across several frames.
+
+        All crops go through the model together. Returns (faces, errors,
+        timings): one dict per face with its frame index, facial area and
+        best match, the frames that could not be decoded, and per-stage ms.
+        """
+        frame_indexes, facial_areas, embeddings, errors, timings = self.embedder.detect_and_embed(images)
+        with preprocess.stage(timings, 'match'):
+            matches = self.match(embeddings, k=1)
+        faces = [
+            {
+                'frame': frame_index,
+                'facial_area': facial_area,
+                'match': candidates[0] if candidates else None
+            } for frame_index, facial_area, candidates in zip(frame_indexes, facial_areas, matches)
+        ]
+        return faces, errors, timings
+
+    def match(self, embeddings, k=1):
+        """Match a batch of embeddings; one list of top-k candidates per probe"""
+        if len(embeddings) == 0:
+            return []
+        with self._lock:
+            indices, scores = self.index.search(embeddings, k)
+            ids, names = self.index.ids, self.index.names
+        results = []
+        for row_indices, row_scores in zip(indices, scores):
+            # ANN indexes pad with -1 when they find fewer than k candidates
+            results.append([
+                {
+                    'student_id': ids[i],
+                    'name': names[i],
+                    'confidence': round(float(score), 4),
+                    'matched': bool(score >= self.threshold)
+                } for i, score in zip(row_indices, row_scores) if i >= 0
+            ])
+        return results
+
+    def identify(self, image):
+        """(best enrolled match for the most prominent face or None, timings)"""
+        embeddings, timings = self.embed(image)
+        if len(embeddings) == 0:
+            return None, timings
+        with preprocess.stage(timings, 'match'):
+            candidates = self.match(embeddings[:1], k=1)[0]
+        if not candidates or not candidates[0]['matched']:
+            return None, timings
+        return candidates[0], timings
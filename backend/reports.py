@@ -0,0 +1,168 @@
+"""Attendance and OD reports streamed as CSV, XLSX or Parquet.
+
+Each report is a single set-based query; rows are pulled with fetchmany and
+written out chunk by chunk, so a whole-college semester export never sits in
+memory. CSV is encoded straight into the response. XLSX and Parquet are
+container formats that can only be finished at the end, so they are built
+in a spooled temporary file (memory up to SPOOL_MAX_BYTES, then disk) and
+streamed from there. openpyxl and pyarrow are optional dependencies; a format
+whose package is missing is refused with a ReportError (a 400 from the API).
+"""
+import io
+import csv
+import tempfile
+
+import db
+
+FETCH_SIZE = 2000
+CSV_CHUNK_BYTES = 64 * 1024
+FILE_CHUNK_BYTES = 256 * 1024
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# Days on which any attendance was taken count as class days
+_CLASS_DAYS = '''SELECT date FROM attendance_daily_rollup
+                 WHERE date BETWEEN :date_from AND :date_to
+                 GROUP BY date HAVING SUM(present + on_duty) > 0'''
+
+# name -> (columns as (name, type), query); queries take :date_from, :date_to and :department
+REPORTS = {
+    'student-attendance': (
+        [('student_id', 'string'), ('name', 'string'), ('department', 'string'), ('year', 'string'),
+         ('class_days', 'int'), ('present', 'int'), ('on_duty', 'int'), ('absent', 'int'),
+         ('attendance_pct', 'float')],
+        f'''WITH days AS (SELECT COUNT(*) AS n FROM ({_CLASS_DAYS})),
+                 marks AS (SELECT student_id, SUM(status = 'present') AS present, SUM(status = 'on_duty') AS on_duty
+                           FROM attendance WHERE date BETWEEN :date_from AND :date_to
+                           GROUP BY student_id)
+            SELECT u.student_id, u.name, u.department, u.year, days.n,
+                   COALESCE(m.present, 0), COALESCE(m.on_duty, 0),
+                   MAX(days.n - COALESCE(m.present, 0) - COALESCE(m.on_duty, 0), 0),
+                   ROUND(100.0 * (COALESCE(m.present, 0) + COALESCE(m.on_duty, 0)) / NULLIF(days.n, 0), 2)
+            FROM users u CROSS JOIN days
+            LEFT JOIN marks m ON m.student_id = u.student_id
+            WHERE u.role = 'student' AND (:department IS NULL OR u.department = :department)
+            ORDER BY u.department, u.year, u.student_id'''
+    ),
+    'daily-register': (
+        [('date', 'string'), ('student_id', 'string'), ('name', 'string'), ('department', 'string'),
+         ('year', 'string'), ('status', 'string'), ('time', 'string'), ('confidence', 'float')],
+        f'''SELECT d.date, u.student_id, u.name, u.department, u.year,
+                   COALESCE(a.status, 'absent'), a.time, a.confidence
+            FROM ({_CLASS_DAYS}) d CROSS JOIN users u
+            LEFT JOIN attendance a ON a.student_id = u.student_id AND a.date = d.date
+            WHERE u.role = 'student' AND (:department IS NULL OR u.department = :department)
+            ORDER BY d.date, u.department, u.year, u.student_id'''
+    ),
+    'od-summary': (
+        [('student_id', 'string'), ('name', 'string'), ('department', 'string'), ('activity_type', 'string'),
+         ('requests', 'int'), ('approved', 'int'), ('pending', 'int'), ('rejected', 'int'),
+         ('verified_by_ocr', 'int')],
+        '''SELECT r.student_id, MAX(r.student_name), u.department, r.activity_type, COUNT(*),
+                  SUM(r.status = 'approved'), SUM(r.status = 'pending'), SUM(r.status = 'rejected'),
+                  SUM(r.verified_by_ocr)
+           FROM od_requests r
+           LEFT JOIN users u ON u.student_id = r.student_id AND u.role = 'student'
+           WHERE r.event_date BETWEEN :date_from AND :date_to
+             AND (:department IS NULL OR u.department = :department)
+           GROUP BY r.student_id, r.activity_type
+           ORDER BY u.department, r.student_id, r.activity_type'''
+    ),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Formats whose writer is an optional dependency, listed in requirements-optional.txt
+OPTIONAL_PACKAGES = {'xlsx': 'openpyxl', 'parquet': 'pyarrow'}
+
+
+class ReportError(Exception):
+    """Unknown report or format, or a format whose optional library is missing"""
+
+
+def _batches(report, date_from, date_to, department):
+    columns, sql = REPORTS[report]
+    # A dedicated connection: the generator outlives the view that created it.
+    # The open SELECT keeps one WAL snapshot, so the export is consistent.
+    with db.pool.connection() as conn:
+        c = conn.execute(sql, {'date_from': date_from, 'date_to': date_to, 'department': department})
+        while True:
+            rows = c.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield rows
+
+
+def _csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for rows in batches:
+        writer.writerows(rows)
+        if buffer.tell() >= CSV_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx(columns, batches, out):
+    from openpyxl import Workbook
+    # write_only keeps rows out of memory, spilling the sheet XML to a temp file
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('report')
+    sheet.append([name for name, _ in columns])
+    for rows in batches:
+        for row in rows:
+            sheet.append(row)
+    workbook.save(out)
+
+
+def _parquet(columns, batches, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in batches:
+            # One row group per fetched batch, built column-wise
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _spooled(build, columns, batches):
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as out:
+        build(columns, batches, out)
+        out.seek(0)
+        while True:
+            chunk = out.read(FILE_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ReportError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    package = OPTIONAL_PACKAGES.get(fmt)
+    if package:
+        try:
+            __import__(package)
+        except ImportError:
+            raise ReportError(f"{fmt.upper()} export is not available: the optional '{package}' package is not "
+                              f"installed on the server (see requirements-optional.txt); CSV export always works")
+
+
+def stream(report, fmt, date_from, date_to, department=None):
+    """Generator of response chunks for report in fmt over [date_from, date_to]"""
+    if report not in REPORTS:
+        raise ReportError(f"Unknown report '{report}' (expected one of: {', '.join(REPORTS)})")
+    check_format(fmt)
+    columns = REPORTS[report][0]
+    batches = _batches(report, date_from, date_to, department)
+    if fmt == 'csv':
+        return _csv(columns, batches)
+    return _spooled(_xlsx if fmt == 'xlsx' else _parquet, columns, batches)
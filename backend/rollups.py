@@ -0,0 +1,181 @@
+"""Incrementally maintained attendance and OD counters.
+
+Triggers (migration v4) keep these tables current inside the same
+transaction as every write to users, attendance and od_requests:
+
+    attendance_daily_rollup  (date, department, year) -> present, on_duty
+    student_rollup           (department, year)       -> enrolled students
+    od_status_rollup         status                   -> count
+
+Absent counts are derived on read as enrolled - present - on_duty.
+Each attendance row records the department/year it is counted under
+(migration v9), so updates and deletes subtract from the bucket the insert
+added to; changes to a student's account move their counts between buckets.
+
+Run from backend/:
+    python rollups.py --verify    compare rollups and the last week's summary with the raw tables
+    python rollups.py --rebuild   recompute rollups from the raw tables
+"""
+import sys
+from datetime import date, datetime, timedelta
+
+import db
+
+# Department/year of an attendance row's student; '' when the student has no account
+STUDENT_GROUP = '''COALESCE((SELECT {column} FROM users
+                             WHERE users.student_id = attendance.student_id AND users.role = 'student'
+                             LIMIT 1), '')'''
+
+# Stamps attendance rows with the bucket they are counted in (columns added by migration v9)
+STAMP_GROUPS = f'''UPDATE attendance SET department = {STUDENT_GROUP.format(column='department')},
+                                      year = {STUDENT_GROUP.format(column='year')}'''
+
+COMPUTE_DAILY = f'''SELECT date, {STUDENT_GROUP.format(column='department')} AS department,
+                           {STUDENT_GROUP.format(column='year')} AS year,
+                           SUM(status = 'present') AS present, SUM(status = 'on_duty') AS on_duty
+                    FROM attendance
+                    GROUP BY 1, 2, 3
+                    HAVING SUM(status = 'present') + SUM(status = 'on_duty') > 0'''
+
+COMPUTE_STUDENTS = '''SELECT COALESCE(department, ''), COALESCE(year, ''), COUNT(*)
+                      FROM users WHERE role = 'student' GROUP BY 1, 2'''
+
+COMPUTE_OD = "SELECT status, COUNT(*) FROM od_requests GROUP BY status"
+
+MAX_SUMMARY_DAYS = 366
+
+
+def rebuild(c):
+    """Recompute every rollup from the raw tables (caller commits)"""
+    if _has_stored_groups(c):
+        c.execute(STAMP_GROUPS)
+    c.execute("DELETE FROM attendance_daily_rollup")
+    c.execute(f"INSERT INTO attendance_daily_rollup (date, department, year, present, on_duty) {COMPUTE_DAILY}")
+    c.execute("DELETE FROM student_rollup")
+    c.execute(f"INSERT INTO student_rollup (department, year, students) {COMPUTE_STUDENTS}")
+    c.execute("DELETE FROM od_status_rollup")
+    c.execute(f"INSERT INTO od_status_rollup (status, count) {COMPUTE_OD}")
+
+
+def _has_stored_groups(c):
+    return 'department' in {row[1] for row in c.execute("PRAGMA table_info(attendance)").fetchall()}
+
+
+def verify(c):
+    """Differences between stored and recomputed rollups, per table"""
+    checks = {
+        'attendance_daily_rollup': (
+            "SELECT date, department, year, present, on_duty FROM attendance_daily_rollup "
+            "WHERE present + on_duty > 0", COMPUTE_DAILY),
+        'student_rollup': ("SELECT department, year, students FROM student_rollup WHERE students > 0",
+                           COMPUTE_STUDENTS),
+        'od_status_rollup': ("SELECT status, count FROM od_status_rollup WHERE count > 0", COMPUTE_OD),
+    }
+    if _has_stored_groups(c):
+        checks['attendance groups'] = (
+            "SELECT id, department, year FROM attendance",
+            f"SELECT id, {STUDENT_GROUP.format(column='department')}, {STUDENT_GROUP.format(column='year')} "
+            "FROM attendance")
+    differences = {}
+    for table, (stored_sql, computed_sql) in checks.items():
+        stored = set(c.execute(stored_sql).fetchall())
+        computed = set(c.execute(computed_sql).fetchall())
+        if stored != computed:
+            differences[table] = {'missing': sorted(computed - stored), 'unexpected': sorted(stored - computed)}
+    return differences
+
+
+def verify_summary(c, date_from, date_to):
+    """daily_summary rows that differ from counts recomputed from the raw tables.
+
+    Covers days without a single mark, where every enrolled student is absent.
+    Returns {'missing': [...], 'unexpected': [...]}, empty lists when they agree.
+    """
+    students = {(department, year): count for department, year, count in c.execute(COMPUTE_STUDENTS).fetchall()}
+    marks = {}
+    for day, department, year, present, on_duty in c.execute(COMPUTE_DAILY).fetchall():
+        if date_from <= day <= date_to:
+            marks[day, department, year] = (present, on_duty)
+
+    computed = set()
+    day, last = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    while day <= last:
+        groups = set(students) | {(department, year) for (d, department, year) in marks if d == day.isoformat()}
+        for department, year in groups:
+            enrolled = students.get((department, year), 0)
+            present, on_duty = marks.get((day.isoformat(), department, year), (0, 0))
+            if enrolled or present or on_duty:
+                computed.add((day.isoformat(), department, year, enrolled, present, on_duty,
+                              max(enrolled - present - on_duty, 0)))
+        day += timedelta(days=1)
+
+    stored = {(row['date'], row['department'], row['year'], row['students'], row['present'], row['on_duty'],
+               row['absent']) for row in daily_summary(c, date_from, date_to)}
+    return {'missing': sorted(computed - stored), 'unexpected': sorted(stored - computed)}
+
+
+def od_counts(c):
+    c.execute("SELECT status, count FROM od_status_rollup WHERE count > 0")
+    return dict(c.fetchall())
+
+
+def total_students(c):
+    c.execute("SELECT COALESCE(SUM(students), 0) FROM student_rollup")
+    return c.fetchone()[0]
+
+
+def daily_summary(c, date_from, date_to):
+    """Per-day, per-department, per-year present / on_duty / absent counts.
+
+    Every day of the range is listed, including days nobody has marked yet,
+    when the whole enrolled body counts as absent. Ranges are capped at
+    MAX_SUMMARY_DAYS days.
+    """
+    c.execute('''WITH RECURSIVE days (date) AS (SELECT date(?)
+                                        UNION ALL
+                                        SELECT date(date, '+1 day') FROM days WHERE date < date(?)
+                                        LIMIT ?),
+                      groups AS (SELECT department, year FROM student_rollup WHERE students > 0
+                                 UNION
+                                 SELECT department, year FROM attendance_daily_rollup WHERE date BETWEEN ? AND ?)
+                 SELECT d.date, g.department, g.year, COALESCE(s.students, 0),
+                        COALESCE(r.present, 0), COALESCE(r.on_duty, 0)
+                 FROM days d CROSS JOIN groups g
+                 LEFT JOIN student_rollup s ON s.department = g.department AND s.year = g.year
+                 LEFT JOIN attendance_daily_rollup r
+                        ON r.date = d.date AND r.department = g.department AND r.year = g.year
+                 WHERE d.date IS NOT NULL
+                 ORDER BY d.date, g.department, g.year''',
+              (date_from, date_to, MAX_SUMMARY_DAYS, date_from, date_to))
+    return [
+        {
+            'date': date,
+            'department': department,
+            'year': year,
+            'students': students,
+            'present': present,
+            'on_duty': on_duty,
+            'absent': max(students - present - on_duty, 0)
+        } for date, department, year, students, present, on_duty in c.fetchall()
+        if students or present or on_duty
+    ]
+
+
+if __name__ == '__main__':
+    conn = db.connect()
+    c = conn.cursor()
+    if '--rebuild' in sys.argv:
+        rebuild(c)
+        conn.commit()
+        print("✅ Rollups rebuilt from raw tables")
+    differences = verify(c)
+    # The last week up to today, which may not have a single mark yet
+    today = datetime.now().date()
+    summary = verify_summary(c, (today - timedelta(days=6)).isoformat(), today.isoformat())
+    if summary['missing'] or summary['unexpected']:
+        differences['daily_summary'] = summary
+    for table, diff in differences.items():
+        print(f"❌ {table}: missing {diff['missing']}, unexpected {diff['unexpected']}")
+    if not differences:
+        print("✅ Rollups match the raw tables")
+    sys.exit(1 if differences else 0)
@@ -0,0 +1,37 @@
+"""Shared fixtures. Run from backend/:  python -m pytest tests"""
+import os
+import sys
+import shutil
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import db  # noqa: E402
+import migrations  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Path of an empty database migrated to the current schema"""
+    path = str(tmp_path / 'attendance.db')
+    conn = db.connect(path)
+    migrations.migrate(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def conn(database):
+    conn = db.connect(database)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def baseline_database(tmp_path):
+    """Copy of the attendance.db shipped with the repo, still on the pre-migration schema"""
+    path = str(tmp_path / 'baseline.db')
+    shutil.copy(os.path.join(BACKEND, 'attendance.db'), path)
+    return path
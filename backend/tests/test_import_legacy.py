@@ -0,0 +1,55 @@
+import json
+
+import import_legacy
+
+
+def records(start, count):
+    return [{'student_id': f'S{i}', 'name': f'Student {i}', 'timestamp': f'2025-01-{6 + i % 20:02d}T09:00:00'}
+            for i in range(start, start + count)]
+
+
+def write(path, items):
+    with open(path, 'w') as f:
+        json.dump(items, f, indent=2)
+
+
+def attendance_rows(conn):
+    return conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+
+
+def test_second_run_is_a_no_op(conn, tmp_path):
+    path = str(tmp_path / 'legacy.json')
+    write(path, records(0, 10))
+    assert import_legacy.import_file(conn, path, batch_size=3) == (10, 10, 0)
+    assert import_legacy.import_file(conn, path, batch_size=3) == (0, 0, 0)
+    assert attendance_rows(conn) == 10
+
+
+def test_rescan_after_reset_inserts_nothing_twice(conn, tmp_path):
+    path = str(tmp_path / 'legacy.json')
+    write(path, records(0, 10))
+    import_legacy.import_file(conn, path)
+    conn.execute("DELETE FROM import_checkpoints")
+    conn.commit()
+    assert import_legacy.import_file(conn, path) == (10, 0, 0)
+    assert attendance_rows(conn) == 10
+
+
+def test_appended_records_resume_from_the_checkpoint(conn, tmp_path):
+    path = str(tmp_path / 'legacy.json')
+    write(path, records(0, 5))
+    import_legacy.import_file(conn, path)
+    write(path, records(0, 5) + records(5, 4))
+    assert import_legacy.import_file(conn, path) == (4, 4, 0)
+    assert attendance_rows(conn) == 9
+
+
+def test_unusable_records_are_skipped_and_counted(conn, tmp_path):
+    path = str(tmp_path / 'legacy.json')
+    write(path, records(0, 2) + [{'student_id': 'S9', 'timestamp': 'yesterday'},
+                                 {'student_id': 'S9', 'timestamp': 20250106},
+                                 {'name': 'no id', 'date': '2025-01-06'},
+                                 {'student_id': 'S9'},
+                                 'not a record'])
+    assert import_legacy.import_file(conn, path) == (7, 2, 5)
+    assert import_legacy.import_file(conn, path) == (0, 0, 0)
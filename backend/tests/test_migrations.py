@@ -0,0 +1,72 @@
+import migrations
+import rollups
+import db
+
+
+def add_student(conn, student_id, department, year):
+    conn.execute('''INSERT INTO users (username, password, role, student_id, name, department, year)
+                    VALUES (?, 'x', 'student', ?, ?, ?, ?)''', (student_id.lower(), student_id, student_id,
+                                                                   department, year))
+
+
+def mark(conn, student_id, date, status='present'):
+    conn.execute('''INSERT INTO attendance (student_id, student_name, date, time, status)
+                    VALUES (?, ?, ?, '09:00:00', ?)''', (student_id, student_id, date, status))
+
+
+def test_fresh_database_reaches_latest_version(conn):
+    assert migrations.schema_version(conn) == migrations.MIGRATIONS[-1][0]
+    assert rollups.verify(conn.cursor()) == {}
+
+
+def test_migrate_is_idempotent(conn, capsys):
+    migrations.migrate(conn)
+    assert capsys.readouterr().out == ''
+    assert migrations.schema_version(conn) == migrations.MIGRATIONS[-1][0]
+
+
+def test_baseline_database_migrates_with_consistent_rollups(baseline_database):
+    conn = db.connect(baseline_database)
+    assert migrations.schema_version(conn) == 0
+    students_before = conn.execute("SELECT COUNT(*) FROM users WHERE role = 'student'").fetchone()[0]
+    migrations.migrate(conn)
+    migrations.seed_defaults(conn)
+    assert migrations.schema_version(conn) == migrations.MIGRATIONS[-1][0]
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE role = 'student'").fetchone()[0] == students_before
+    assert rollups.verify(conn.cursor()) == {}
+    conn.close()
+
+
+def test_rollups_follow_inserts_updates_and_deletes(conn):
+    add_student(conn, 'S1', 'IT', '2')
+    add_student(conn, 'S2', 'CSE', '3')
+    mark(conn, 'S1', '2025-01-06')
+    mark(conn, 'S2', '2025-01-06', 'on_duty')
+    mark(conn, 'S1', '2025-01-07')
+    conn.execute("UPDATE attendance SET status = 'on_duty' WHERE student_id = 'S1' AND date = '2025-01-07'")
+    conn.execute("DELETE FROM attendance WHERE student_id = 'S2'")
+    conn.commit()
+    assert rollups.verify(conn.cursor()) == {}
+
+
+def test_attendance_moves_bucket_when_student_changes_department(conn):
+    add_student(conn, 'S1', 'IT', '2')
+    mark(conn, 'S1', '2025-01-06')
+    conn.execute("UPDATE users SET department = 'CSE' WHERE student_id = 'S1'")
+    conn.commit()
+    assert rollups.verify(conn.cursor()) == {}
+    buckets = conn.execute('''SELECT department, present FROM attendance_daily_rollup
+                              WHERE date = '2025-01-06' AND present > 0''').fetchall()
+    assert buckets == [('CSE', 1)]
+    assert conn.execute("SELECT MIN(present), MIN(on_duty) FROM attendance_daily_rollup").fetchone() >= (0, 0)
+
+
+def test_daily_summary_lists_days_without_marks(conn):
+    add_student(conn, 'S1', 'IT', '2')
+    mark(conn, 'S1', '2025-01-06')
+    conn.commit()
+    c = conn.cursor()
+    summary = rollups.daily_summary(c, '2025-01-06', '2025-01-08')
+    assert [row['date'] for row in summary] == ['2025-01-06', '2025-01-07', '2025-01-08']
+    assert summary[1]['present'] == 0 and summary[1]['absent'] == 1
+    assert rollups.verify_summary(c, '2025-01-06', '2025-01-08') == {'missing': [], 'unexpected': []}
@@ -0,0 +1,40 @@
+import pytest
+
+import od_search
+
+
+def test_terms_are_quoted_and_all_required():
+    assert od_search.match_expression('rotaract madurai') == '"rotaract" "madurai"'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('9876-543-210', '"9876-543-210"'),
+    ('a.b@college.edu', '"a.b@college.edu"'),
+    ('NOT OR AND', '"NOT" "OR" "AND"'),
+    ('col:value (x)', '"col:value" "(x)"'),
+    ('say "hi"', '"say" """hi"""'),
+])
+def test_query_syntax_is_taken_literally(text, expected):
+    assert od_search.match_expression(text) == expected
+
+
+def test_trailing_star_keeps_prefix_meaning():
+    assert od_search.match_expression('goog* ieee') == '"goog"* "ieee"'
+
+
+@pytest.mark.parametrize('text', ['', '   ', '*', '** *'])
+def test_empty_query_is_rejected(text):
+    with pytest.raises(ValueError):
+        od_search.match_expression(text)
+
+
+def test_quoted_expression_runs_against_the_index(conn):
+    conn.execute('''INSERT INTO od_requests (student_id, student_name, activity_type, activity_name, event_date,
+                    event_venue, organized_by, coordinator_name, coordinator_contact, od_reason, od_file_path,
+                    ocr_text, status)
+                    VALUES ('S1', 'Priya', 'technical', 'Hackathon', '2025-01-06', 'Main Auditorium', 'IEEE',
+                    'Dr. Rao', '9876543210', 'Participation', 'x.pdf', 'Call "NOT" OR ask: 9876-543-210', 'pending')''')
+    conn.commit()
+    for text in ['9876-543-210', 'NOT OR', 'ask:', 'hack*']:
+        rows, _ = od_search.search(conn.cursor(), text, 10)
+        assert len(rows) == 1, text
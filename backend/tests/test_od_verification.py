@@ -0,0 +1,37 @@
+import pytest
+
+from od_verification import score_od_content, verify_od_content
+
+
+def matched(text):
+    return {keyword for keywords in score_od_content(text)['matched'].values() for keyword in keywords}
+
+
+@pytest.mark.parametrize('text, not_expected', [
+    ('good method', 'od'),
+    ('the steamer was ahead', 'team'),
+    ('gameplay footage', 'game'),
+    ('matchbox', 'match'),
+    ('unofficial', 'official'),
+])
+def test_keywords_only_match_whole_words(text, not_expected):
+    assert not_expected not in matched(text)
+
+
+def test_unrelated_document_is_not_verified():
+    receipt = 'Fee receipt\nReceived from Priya S with thanks\nAmount: Rs. 2500\nGood day, methodical payment'
+    is_valid, _, detected_activity = verify_od_content(receipt)
+    assert not is_valid
+    assert detected_activity is None
+
+
+def test_ocr_slips_and_spellings_still_match():
+    assert {'participation', 'certificate', 'program'} <= matched('CERTIF1CATE 0F PART1CIPATI0N in the programme')
+    assert 'on duty' in matched('granted On-\nDuty')
+    assert 'tournaments' not in matched('tournaments') and 'tournament' in matched('tournaments')
+
+
+def test_certificate_is_verified_with_its_activity():
+    text = ('CERTIFICATE OF PARTICIPATION\nThis is to certify that Priya played every match of the '
+            'Inter-College Basketball Tournament for the team under coach Ravi. Faculty Coordinator signature')
+    assert verify_od_content(text) == (True, 'Valid Sports activity detected', 'sports')
@@ -0,0 +1,53 @@
+import json
+
+import write_log
+
+
+def attendance(conn):
+    return conn.execute("SELECT student_id, date, status FROM attendance ORDER BY student_id").fetchall()
+
+
+def crashed_log(path, marks, torn_tail=True):
+    """A log as a crashed process leaves it: fsynced marks, maybe a half-written last line"""
+    with open(path, 'w') as f:
+        for seq, (student_id, date) in enumerate(marks, 1):
+            f.write(json.dumps({'seq': seq, 'row': [student_id, student_id, date, '09:00:00', 'present', 0.9]}) + '\n')
+        if torn_tail:
+            f.write('{"seq": %d, "row": ["S9"' % (len(marks) + 1))
+
+
+def test_start_replays_what_a_crash_left_unapplied(database, conn, tmp_path):
+    path = str(tmp_path / 'marks.log')
+    crashed_log(path, [('S1', '2025-01-06'), ('S2', '2025-01-06')])
+    log = write_log.AttendanceWriteLog(path, database)
+    log.start()
+    log.stop()
+    assert attendance(conn) == [('S1', '2025-01-06', 'present'), ('S2', '2025-01-06', 'present')]
+
+
+def test_replay_skips_marks_already_applied(database, conn, tmp_path):
+    path = str(tmp_path / 'marks.log')
+    crashed_log(path, [('S1', '2025-01-06'), ('S2', '2025-01-06'), ('S3', '2025-01-06')], torn_tail=False)
+    # The table writer had committed the first two before the crash
+    conn.execute("INSERT INTO write_log_state (source, applied_seq) VALUES (?, 2)",
+                 (write_log.AttendanceWriteLog(path, database).source,))
+    conn.commit()
+    log = write_log.AttendanceWriteLog(path, database)
+    log.start()
+    log.stop()
+    assert [row[0] for row in attendance(conn)] == ['S3']
+
+
+def test_marks_survive_a_process_that_never_applied_them(database, conn, tmp_path):
+    path = str(tmp_path / 'marks.log')
+    log = write_log.AttendanceWriteLog(path, database, flush_interval_ms=60000, flush_max_rows=1000)
+    log._apply = lambda *args: None  # the table writer never commits, as if killed first
+    log.start()
+    assert log.mark(conn, 'S1', 'Student 1', '2025-01-06', '09:00:00')
+    assert not log.mark(conn, 'S1', 'Student 1', '2025-01-06', '09:05:00')
+    log.stop()
+    assert attendance(conn) == []
+
+    assert write_log.recover(path, database) == 1
+    assert attendance(conn) == [('S1', '2025-01-06', 'present')]
+    assert write_log.recover(path, database) == 0
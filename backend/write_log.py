@@ -0,0 +1,253 @@
+import os
+import glob
+import json
+import queue
+import sqlite3
+import threading
+from time import monotonic
+
+import db
+
+ATTENDANCE_LOG_PATH = os.environ.get('ATTENDANCE_LOG_PATH', 'attendance_marks.log')
+# The table writer commits whenever this many ms have passed or this many marks are waiting
+FLUSH_INTERVAL_MS = float(os.environ.get('ATTENDANCE_FLUSH_INTERVAL_MS', 50))
+FLUSH_MAX_ROWS = int(os.environ.get('ATTENDANCE_FLUSH_MAX_ROWS', 500))
+# Truncate the log once everything in it is in the table and it has grown past this
+LOG_ROTATE_BYTES = int(os.environ.get('ATTENDANCE_LOG_ROTATE_BYTES', 16 * 1024 * 1024))
+DURABLE_TIMEOUT = float(os.environ.get('ATTENDANCE_DURABLE_TIMEOUT', 5))
+# Backoff between attempts when the table write fails (e.g. database is locked), doubling up to the max
+APPLY_RETRY_SECONDS = 0.1
+APPLY_RETRY_MAX_SECONDS = 5
+
+INSERT_ATTENDANCE = '''INSERT INTO attendance (student_id, student_name, date, time, status, confidence)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (student_id, date) DO NOTHING'''
+
+
+class _Mark:
+    __slots__ = ('seq', 'row', 'durable')
+
+    def __init__(self, row):
+        self.seq = None
+        self.row = row
+        self.durable = threading.Event()
+
+
+class AttendanceWriteLog:
+    """Write-behind path for attendance marks.
+
+    mark() hands a row to the log thread, which appends every waiting mark
+    to an append-only JSON-lines file with a single fsync (group commit) and
+    then releases the callers. The table thread inserts logged marks into
+    attendance in one transaction per FLUSH_INTERVAL_MS / FLUSH_MAX_ROWS,
+    recording the last applied sequence number in write_log_state in the
+    same transaction. start() replays whatever a crash left unapplied.
+    """
+
+    def __init__(self, path=ATTENDANCE_LOG_PATH, db_path=db.DATABASE,
+                 flush_interval_ms=FLUSH_INTERVAL_MS, flush_max_rows=FLUSH_MAX_ROWS):
+        self.path = path
+        self.source = os.path.abspath(path)
+        self.db_path = db_path
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_rows = flush_max_rows
+        self.running = False
+        self._incoming = queue.Queue()
+        self._logged = queue.Queue()
+        # (student_id, date) of marks accepted but not yet committed to the table
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._applied_seq = 0
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        conn = db.connect(self.db_path)
+        row = conn.execute("SELECT applied_seq FROM write_log_state WHERE source = ?", (self.source,)).fetchone()
+        self._applied_seq = self._seq = row[0] if row else 0
+        replayed = self._replay(conn)
+        conn.close()
+        # Everything logged is now in the table, so the log can start empty
+        self._file = open(self.path, 'w', encoding='utf-8')
+        os.fsync(self._file.fileno())
+
+        self._stopping.clear()
+        for target, name in ((self._log_writer, 'attendance-log'), (self._table_writer, 'attendance-writer')):
+            thread = threading.Thread(target=target, daemon=True, name=name)
+            thread.start()
+            self._threads.append(thread)
+        self.running = True
+        print(f"📝 Attendance write log started ({replayed} mark(s) replayed)")
+
+    def stop(self):
+        """Drain both threads; marks already logged reach the table first"""
+        self.running = False
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def mark(self, conn, student_id, name, date, time, status='present', confidence=None):
+        """Accept a mark once it is durable in the log.
+
+        conn is only read from, to tell whether the student is already marked
+        for the day. Returns True for a new mark, False if one already exists.
+        Raises TimeoutError if the log does not sync within DURABLE_TIMEOUT.
+        """
+        key = (student_id, date)
+        with self._lock:
+            if key in self._pending or conn.execute("SELECT 1 FROM attendance WHERE student_id = ? AND date = ?",
+                                                    key).fetchone():
+                return False
+            self._pending.add(key)
+        entry = _Mark((student_id, name, date, time, status, confidence))
+        try:
+            self._incoming.put(entry)
+            if not entry.durable.wait(DURABLE_TIMEOUT):
+                raise TimeoutError('Attendance log did not sync in time')
+        except BaseException:
+            # Let a retry through; if this mark is logged after all, the insert ignores the repeat
+            with self._lock:
+                self._pending.discard(key)
+            raise
+        return True
+
+    @property
+    def queue_depth(self):
+        return self._incoming.qsize() + self._logged.qsize()
+
+    def _replay(self, conn):
+        if not os.path.exists(self.path):
+            return 0
+        rows, last_seq = [], self._applied_seq
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn final write from the crash; never acknowledged
+                if entry['seq'] > self._applied_seq:
+                    rows.append(tuple(entry['row']))
+                    last_seq = entry['seq']
+        if rows:
+            self._apply(conn, rows, last_seq)
+        self._seq = last_seq
+        return len(rows)
+
+    def _apply(self, conn, rows, last_seq):
+        conn.executemany(INSERT_ATTENDANCE, rows)
+        conn.execute('''INSERT INTO write_log_state (source, applied_seq) VALUES (?, ?)
+                        ON CONFLICT (source) DO UPDATE SET applied_seq = excluded.applied_seq''',
+                     (self.source, last_seq))
+        conn.commit()
+        self._applied_seq = last_seq
+
+    def _drain(self, source, first):
+        batch = [first]
+        while len(batch) < self.flush_max_rows:
+            try:
+                batch.append(source.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _log_writer(self):
+        while True:
+            try:
+                first = self._incoming.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    self._logged.put(None)
+                    return
+                self._maybe_rotate()
+                continue
+            batch = self._drain(self._incoming, first)
+            lines = []
+            for entry in batch:
+                self._seq += 1
+                entry.seq = self._seq
+                lines.append(json.dumps({'seq': entry.seq, 'row': entry.row}) + '\n')
+            self._file.write(''.join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            for entry in batch:
+                entry.durable.set()
+                self._logged.put(entry)
+
+    def _maybe_rotate(self):
+        if self._applied_seq == self._seq and self._file.tell() > LOG_ROTATE_BYTES:
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+
+    def _table_writer(self):
+        conn = db.connect(self.db_path)
+        done = False
+        while not done:
+            entry = self._logged.get()
+            if entry is None:
+                break
+            deadline = monotonic() + self.flush_interval
+            batch = [entry]
+            while len(batch) < self.flush_max_rows:
+                try:
+                    entry = self._logged.get(timeout=max(0, deadline - monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    done = True
+                    break
+                batch.append(entry)
+            if not self._apply_with_retry(conn, [entry.row for entry in batch], batch[-1].seq):
+                break
+            with self._lock:
+                self._pending.difference_update((entry.row[0], entry.row[2]) for entry in batch)
+        conn.close()
+
+    def _apply_with_retry(self, conn, rows, last_seq):
+        """_apply until it succeeds; False if stop() came first (the marks stay in the log for replay)"""
+        delay = APPLY_RETRY_SECONDS
+        while True:
+            try:
+                self._apply(conn, rows, last_seq)
+                return True
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"⚠️ Attendance write of {len(rows)} mark(s) failed, retrying in {delay:.1f}s: {e}")
+            if self._stopping.wait(delay):
+                return False
+            delay = min(delay * 2, APPLY_RETRY_MAX_SECONDS)
+
+
+def worker_log_path(pid=None, path=ATTENDANCE_LOG_PATH):
+    """Per-process log next to path, e.g. attendance_marks.1234.log, for servers running several workers"""
+    base, extension = os.path.splitext(path)
+    return f'{base}.{pid or os.getpid()}{extension}'
+
+
+def recover(path, db_path=db.DATABASE):
+    """Apply and delete a log no process is writing any more; returns the marks replayed"""
+    if not os.path.exists(path):
+        return 0
+    log = AttendanceWriteLog(path, db_path)
+    conn = db.connect(db_path)
+    row = conn.execute("SELECT applied_seq FROM write_log_state WHERE source = ?", (log.source,)).fetchone()
+    log._applied_seq = row[0] if row else 0
+    replayed = log._replay(conn)
+    # Replayed marks are committed; the file goes before its state row so a crash here only re-replays
+    os.remove(path)
+    conn.execute("DELETE FROM write_log_state WHERE source = ?", (log.source,))
+    conn.commit()
+    conn.close()
+    return replayed
+
+
+def recover_all(path=ATTENDANCE_LOG_PATH, db_path=db.DATABASE):
+    """recover() the shared log and every per-worker log; only safe while no worker is running"""
+    base, extension = os.path.splitext(path)
+    return sum(recover(log_path, db_path) for log_path in [path, *glob.glob(f'{glob.escape(base)}.*{extension}')])
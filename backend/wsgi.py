@@ -0,0 +1,70 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py                     threaded workers (default)
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py
+                                                     ASGI workers serving asgi:application
+
+Start-up is split by where it has to run:
+    prepare()          once, in the gunicorn master before any worker forks:
+                       migrations, default rows, replay of write logs and
+                       re-queueing of interrupted OCR jobs
+    load_app()         once per worker, after the fork: imports app.py (its
+                       module-level setup: upload directories, blob store,
+                       OCR queue object, metrics), then loads the face
+                       gallery, index and inference pool
+    start_services()   once per worker, after the app is loaded: model
+                       warm-up, OCR dispatchers and the worker's own
+                       attendance write log
+The master never imports app.py, so `kill -HUP <master>` starts workers on
+the current code and gallery and retires the old ones after their
+in-flight requests.
+
+Each worker holds its own face gallery. Enrolling through one worker
+rewrites the embedding store, and the others reload it (and clear their
+recognition caches) before their next match; see
+FaceRecognition.reload_if_changed.
+"""
+
+import db
+import migrations
+import ocr_jobs
+import write_log
+
+
+def prepare():
+    conn = db.connect()
+    migrations.migrate(conn)
+    migrations.seed_defaults(conn)
+    conn.close()
+    replayed = write_log.recover_all()
+    if replayed:
+        print(f"📝 Replayed {replayed} attendance mark(s) left by earlier workers")
+    ocr_jobs.requeue_interrupted()
+
+
+def load_app():
+    """The worker's Flask app: app.py's module-global app, with models loaded.
+
+    Not a factory; app.py builds its app and services at import, which is
+    why only workers call this and the master never imports app.py.
+    """
+    import app as backend
+    backend.load_models()
+    return backend.app
+
+
+def start_services():
+    import app as backend
+    backend.start_services(write_log_path=write_log.worker_log_path(), recover_ocr=False)
+
+
+def stop_services():
+    import app as backend
+    backend.stop_services()
+
+
+def recover_worker(pid):
+    """Master side, after a worker exits: commit whatever its write log still holds"""
+    replayed = write_log.recover(write_log.worker_log_path(pid))
+    if replayed:
+        print(f"📝 Replayed {replayed} attendance mark(s) from worker {pid}")
@@ -6,17 +6,22 @@ const ODRequestsTable = ({ onReviewRequest }) => {
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchODRequests();
   }, [filter]);
 
-  const fetchODRequests = async () => {
+  // The endpoint returns one keyset page at a time; cursor asks for the page after it
+  const fetchODRequests = async (cursor = null) => {
     try {
       const token = localStorage.getItem('token');
-      const url = filter === 'all' 
-        ? 'http://localhost:5000/api/admin/od-requests'
-        : `http://localhost:5000/api/admin/od-requests?status=${filter}`;
+      const params = new URLSearchParams();
+      if (filter !== 'all') params.set('status', filter);
+      if (cursor) params.set('cursor', cursor);
+      const query = params.toString();
+      const url = `http://localhost:5000/api/admin/od-requests${query ? `?${query}` : ''}`;
       
       const response = await fetch(url, {
         headers: {
@@ -26,7 +31,9 @@ const ODRequestsTable = ({ onReviewRequest }) => {
       
       if (response.ok) {
         const data = await response.json();
-        setRequests(data.od_requests || []);
+        const page = data.od_requests || [];
+        setRequests(previous => (cursor ? [...previous, ...page] : page));
+        setNextCursor(data.next_cursor || null);
       }
     } catch (error) {
       console.error('Error fetching OD requests:', error);
@@ -35,6 +42,12 @@ const ODRequestsTable = ({ onReviewRequest }) => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchODRequests(nextCursor);
+    setLoadingMore(false);
+  };
+
   const getStatusIcon = (status) => {
     switch (status) {
       case 'approved': return '✅';
@@ -207,7 +220,12 @@ const ODRequestsTable = ({ onReviewRequest }) => {
         <div className="table-info">
           Showing {filteredRequests.length} of {requests.length} requests
         </div>
-        <button className="refresh-btn" onClick={fetchODRequests}>
+        {nextCursor && (
+          <button className="refresh-btn" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? '⏳ Loading...' : '⬇️ Load More'}
+          </button>
+        )}
+        <button className="refresh-btn" onClick={() => fetchODRequests()}>
           🔄 Refresh
         </button>
       </div>
@@ -0,0 +1,110 @@
+import React, { useState, useEffect } from 'react';
+import './ActivityFeed.css';
+import './ODRequestsList.css';
+
+const ODRequestsList = () => {
+  const [requests, setRequests] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  useEffect(() => {
+    fetchODRequests();
+  }, []);
+
+  // The endpoint returns one keyset page at a time; cursor asks for the page after it
+  const fetchODRequests = async (cursor = null) => {
+    try {
+      const token = localStorage.getItem('token');
+      const url = cursor
+        ? `http://localhost:5000/api/student/od-requests?cursor=${encodeURIComponent(cursor)}`
+        : 'http://localhost:5000/api/student/od-requests';
+      
+      const response = await fetch(url, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+        },
+      });
+      
+      if (response.ok) {
+        const data = await response.json();
+        const page = data.od_requests || [];
+        setRequests(previous => (cursor ? [...previous, ...page] : page));
+        setNextCursor(data.next_cursor || null);
+      }
+    } catch (error) {
+      console.error('Error fetching OD requests:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchODRequests(nextCursor);
+    setLoadingMore(false);
+  };
+
+  const getStatusIcon = (status) => {
+    switch (status) {
+      case 'approved': return '✅';
+      case 'pending': return '⏳';
+      case 'rejected': return '❌';
+      default: return '📋';
+    }
+  };
+
+  const getStatusColor = (status) => {
+    switch (status) {
+      case 'approved': return '#10b981';
+      case 'pending': return '#f59e0b';
+      case 'rejected': return '#ef4444';
+      default: return '#6b7280';
+    }
+  };
+
+  if (loading) {
+    return null;
+  }
+
+  return (
+    <div className="activity-feed od-requests-list">
+      <h2>My OD Requests</h2>
+      {requests.length === 0 ? (
+        <div className="no-activities">
+          <div className="no-activities-icon">📄</div>
+          <p>No OD requests yet</p>
+          <span>Requests you upload will appear here</span>
+        </div>
+      ) : (
+        <div className="activities-list">
+          {requests.map((request) => (
+            <div key={request.id} className="activity-item">
+              <div className="activity-icon">
+                {getStatusIcon(request.status)}
+              </div>
+              <div className="activity-content">
+                <h4>{request.activity_name}</h4>
+                <p>Event Date: {request.event_date}</p>
+                {request.admin_notes && <p>Notes: {request.admin_notes}</p>}
+              </div>
+              <div 
+                className="activity-status"
+                style={{ color: getStatusColor(request.status) }}
+              >
+                {request.status}
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+      {nextCursor && (
+        <button className="load-more-btn" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? '⏳ Loading...' : '⬇️ Load More'}
+        </button>
+      )}
+    </div>
+  );
+};
+
+export default ODRequestsList;
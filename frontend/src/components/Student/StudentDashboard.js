@@ -5,6 +5,7 @@ import DashboardStats from './DashboardStats.js';
 import AttendanceModal from './AttendanceModal.js';
 import ODModal from './ODModal.js';
 import ActivityFeed from './ActivityFeed.js';
+import ODRequestsList from './ODRequestsList.js';
 import './StudentDashboard.css';
 
 const StudentDashboard = () => {
@@ -13,6 +14,8 @@ const StudentDashboard = () => {
   const [showAttendanceModal, setShowAttendanceModal] = useState(false);
   const [showODModal, setShowODModal] = useState(false);
   const [loading, setLoading] = useState(true);
+  // Bumped after an upload so the OD list starts again from its first page
+  const [odListKey, setODListKey] = useState(0);
 
   useEffect(() => {
     fetchDashboardData();
@@ -125,6 +128,9 @@ const StudentDashboard = () => {
           <ActivityFeed activities={dashboardData.recent_activities} />
         )}
 
+        {/* OD Requests, paged */}
+        <ODRequestsList key={odListKey} />
+
         {/* Modals */}
         {showAttendanceModal && (
           <AttendanceModal 
@@ -140,6 +146,7 @@ const StudentDashboard = () => {
             onClose={() => {
               setShowODModal(false);
               fetchDashboardData();
+              setODListKey(key => key + 1);
             }}
           />
         )}